@@ -22,6 +22,12 @@ try:
     from main import app
     from mangum import Mangum
     
+    # Services are built on first use; SERVICE_WARMUP opts into building some during the cold start
+    from services.container import container
+    container.warm_up()
+    # Mangum runs with lifespan="off", so the lifespan hook never marks the app ready
+    app.state.ready = True
+    
     # Wrap FastAPI app with Mangum for AWS Lambda/Vercel compatibility
     handler = Mangum(app, lifespan="off")
     
@@ -0,0 +1 @@
+"""Benchmarks: synthetic catalog generator, micro-benchmarks and HTTP load scenario"""
@@ -0,0 +1,47 @@
+"""Compare two benchmark result files and flag regressions
+
+Usage (from backend/):
+    python -m benchmarks.compare results/base.json results/head.json --metric p50_ms --threshold 0.10
+Exits with status 1 when any benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base: dict, head: dict, metric: str, threshold: float):
+    """Rows of (name, base value, head value, relative change, regressed)"""
+    rows = []
+    for name, head_stats in head["results"].items():
+        base_stats = base["results"].get(name)
+        if not base_stats or metric not in base_stats or metric not in head_stats:
+            continue
+        before, after = base_stats[metric], head_stats[metric]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    rows = compare(base, head, args.metric, args.threshold)
+    print(f"{'benchmark':<45} {'base':>10} {'head':>10} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<45} {before:>10.4f} {after:>10.4f} {change:>+7.1%}{flag}")
+    sys.exit(1 if any(row[4] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Generate synthetic property_basics/characteristics/images JSON files
+
+Usage (from backend/):
+    python -m benchmarks.generate_catalog --rows 100000 --out /tmp/catalog_1e5
+"""
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# (city, relative listing volume, median price)
+CITIES: List[Tuple[str, float, int]] = [
+    ("New York, NY", 18.0, 780000),
+    ("Los Angeles, CA", 12.0, 920000),
+    ("Chicago, IL", 8.0, 340000),
+    ("Houston, TX", 7.0, 310000),
+    ("Phoenix, AZ", 5.0, 420000),
+    ("Philadelphia, PA", 4.5, 260000),
+    ("San Antonio, TX", 4.0, 280000),
+    ("San Diego, CA", 4.0, 860000),
+    ("Dallas, TX", 4.0, 390000),
+    ("Austin, TX", 3.5, 540000),
+    ("San Francisco, CA", 3.5, 1250000),
+    ("Seattle, WA", 3.0, 830000),
+    ("Denver, CO", 2.5, 580000),
+    ("Boston, MA", 2.5, 760000),
+    ("Miami, FL", 2.5, 560000),
+    ("Atlanta, GA", 2.0, 400000),
+    ("Nashville, TN", 1.5, 450000),
+    ("Portland, OR", 1.5, 520000),
+    ("Las Vegas, NV", 1.5, 410000),
+    ("Minneapolis, MN", 1.0, 330000),
+]
+
+# (amenity, probability a listing has it)
+AMENITIES: List[Tuple[str, float]] = [
+    ("Parking", 0.55), ("Laundry", 0.45), ("Gym", 0.30), ("Balcony", 0.30),
+    ("Garage", 0.28), ("Security", 0.25), ("Swimming Pool", 0.18), ("Pet Friendly", 0.25),
+    ("Backyard", 0.20), ("Smart Home", 0.12), ("Home Office", 0.12), ("Fitness Center", 0.10),
+    ("Community Pool", 0.08), ("Rooftop Terrace", 0.06), ("Solar Panels", 0.06), ("Two-Car Garage", 0.08),
+    ("Park View", 0.07), ("24/7 Concierge", 0.04), ("BBQ Area", 0.06), ("Energy Efficient", 0.10),
+    ("Private Garden", 0.05), ("Beach Access", 0.02), ("Private Elevator", 0.01), ("Private Dock", 0.01),
+]
+
+KINDS = [("Apartment", 0.45), ("Condo", 0.20), ("House", 0.25), ("Townhouse", 0.07), ("Villa", 0.03)]
+AREAS = ["Downtown", "Midtown", "Suburbs", "Old Town", "Riverside", "Uptown", "Lakeside", "Hills"]
+BEDROOM_WEIGHTS = [(1, 0.18), (2, 0.30), (3, 0.28), (4, 0.15), (5, 0.07), (6, 0.02)]
+IMAGE_POOL = [
+    "https://images.unsplash.com/photo-1568605114967-8130f3a36994?w=800",
+    "https://images.unsplash.com/photo-1568605117032-2721d0a90fae?w=800",
+    "https://images.unsplash.com/photo-1512917774080-9991f1c4c750?w=800",
+    "https://images.unsplash.com/photo-1600596542815-ffad4c1539a9?w=800",
+    "https://images.unsplash.com/photo-1600585154340-be6161a56a0c?w=800",
+    "https://images.unsplash.com/photo-1570129477492-45c003edd2be?w=800",
+]
+
+
+def _weighted(rng: random.Random, items: List[Tuple]) -> Tuple:
+    return rng.choices(items, weights=[item[1] for item in items])[0]
+
+
+def generate_property(rng: random.Random, property_id: int) -> Tuple[Dict, Dict, Dict]:
+    """One listing split across the three source files"""
+    city, _, median_price = _weighted(rng, CITIES)
+    kind = _weighted(rng, KINDS)[0]
+    bedrooms = _weighted(rng, BEDROOM_WEIGHTS)[0]
+    bathrooms = max(1, min(bedrooms, round(bedrooms * rng.uniform(0.5, 1.0))))
+    size_sqft = int(bedrooms * rng.gauss(550, 120) + rng.uniform(200, 500))
+    # Log-normal around the city median, scaled by size
+    price = median_price * math.exp(rng.gauss(0, 0.35)) * (0.6 + bedrooms * 0.15)
+    price = int(round(price, -3))
+    amenities = [name for name, probability in AMENITIES if rng.random() < probability]
+    title = f"{bedrooms} BHK {kind} in {rng.choice(AREAS)}"
+
+    basics = {"id": property_id, "title": title, "price": price, "location": city}
+    characteristics = {
+        "id": property_id,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "size_sqft": size_sqft,
+        "amenities": amenities,
+    }
+    images = {"id": property_id, "images": rng.sample(IMAGE_POOL, rng.randint(1, 3))}
+    return basics, characteristics, images
+
+
+class _JSONArrayWriter:
+    """Streams a JSON array to disk so 10^7-row catalogs never sit in memory"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, "w")
+        self.file.write("[")
+        self.first = True
+
+    def write(self, item: Dict) -> None:
+        self.file.write(("" if self.first else ",\n") + json.dumps(item, separators=(",", ":")))
+        self.first = False
+
+    def close(self) -> None:
+        self.file.write("]\n")
+        self.file.close()
+
+
+def generate_catalog(rows: int, out_dir: str, seed: int = 42) -> Path:
+    """Write property_basics.json, property_characteristics.json and property_images.json"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    writers = [
+        _JSONArrayWriter(out / "property_basics.json"),
+        _JSONArrayWriter(out / "property_characteristics.json"),
+        _JSONArrayWriter(out / "property_images.json"),
+    ]
+    try:
+        for property_id in range(1, rows + 1):
+            for writer, part in zip(writers, generate_property(rng, property_id)):
+                writer.write(part)
+    finally:
+        for writer in writers:
+            writer.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="number of listings (10^3 - 10^7)")
+    parser.add_argument("--out", required=True, help="output directory (use as DATA_DIR)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    out = generate_catalog(args.rows, args.out, args.seed)
+    print(f"✅ Wrote {args.rows} properties to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""End-to-end HTTP load scenario against the FastAPI app with a stubbed LLM
+
+Requests go through the full ASGI stack (middleware, validation, routes, services) in-process,
+so no network or OpenAI key is needed. The stub LLM answers with canned JSON after a fixed delay.
+
+Usage (from backend/):
+    python -m benchmarks.load --rows 100000 --requests 2000 --concurrency 32 --out results/load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.generate_catalog import generate_catalog
+from benchmarks.results import summarize, write_results
+
+# (message, preferences the stub returns for it)
+CHAT_MESSAGES: List[Tuple[str, Dict[str, Any]]] = [
+    ("Show me 3 bedroom homes in Austin under 600k", {"location": "Austin", "bedrooms": 3, "max_price": 600000}),
+    ("Cheapest apartments in Chicago", {"location": "Chicago", "sort_by": "price_asc"}),
+    ("Houses with a pool", {"amenities": ["pool"]}),
+    ("Most expensive homes in San Francisco", {"location": "San Francisco", "sort_by": "price_desc"}),
+    ("2 bedroom condos in Seattle between 400k and 800k", {"location": "Seattle", "bedrooms": 2, "min_price": 400000, "max_price": 800000}),
+]
+
+SEARCH_BODIES = [
+    {"location": "Austin", "min_price": 300000, "max_price": 700000},
+    {"location": "New York", "bedrooms": 2},
+    {"amenities": ["Gym", "Parking"]},
+    {"max_price": 350000, "bathrooms": 2},
+]
+
+
+def install_stub_llm(latency_ms: float) -> None:
+    """Register a 'stub' LLM backend; must run before the first LLM call"""
+    from services.llm_backends import BACKEND_FACTORIES, LLMBackend
+    from services.prompt_builder import SYSTEM_PROMPTS
+
+    canned = {message.lower(): preferences for message, preferences in CHAT_MESSAGES}
+
+    class StubLLMBackend(LLMBackend):
+        name = "stub"
+
+        def is_available(self) -> bool:
+            return True
+
+        def complete(self, messages, model, temperature, max_tokens, timeout=None):
+            time.sleep(latency_ms / 1000)
+            system, user = messages[0]["content"], messages[-1]["content"]
+            if system == SYSTEM_PROMPTS["extract_preferences"]:
+                content = json.dumps(canned.get(user.lower(), {}))
+            elif system == SYSTEM_PROMPTS["extract_property_name"]:
+                content = "null"
+            else:
+                content = "Here are a few listings that match what you asked for."
+            return {"content": content, "usage": {"prompt_tokens": len(system + user) // 4, "completion_tokens": len(content) // 4}}
+
+    BACKEND_FACTORIES["stub"] = StubLLMBackend
+
+
+def build_requests(count: int, rows: int, rng: random.Random) -> List[Tuple[str, str, str, Any]]:
+    """Weighted request mix: (label, method, path, json body)"""
+    mix = []
+    for i in range(count):
+        user_id = f"bench-{rng.randint(1, 200)}"
+        roll = rng.random()
+        if roll < 0.35:
+            mix.append(("search", "POST", "/api/properties/search", rng.choice(SEARCH_BODIES)))
+        elif roll < 0.60:
+            mix.append(("chat", "POST", "/api/chat", {"message": rng.choice(CHAT_MESSAGES)[0], "user_id": user_id}))
+        elif roll < 0.70:
+            mix.append(("chat_followup", "POST", "/api/chat", {"message": "only ones with a pool", "user_id": user_id}))
+        elif roll < 0.80:
+            mix.append(("save", "POST", "/api/properties/save", {"property_id": rng.randint(1, rows), "user_id": user_id}))
+        elif roll < 0.88:
+            mix.append(("saved", "GET", f"/api/properties/saved/{user_id}", None))
+        elif roll < 0.94:
+            ids = rng.sample(range(1, rows + 1), min(rows, 5))
+            mix.append(("compare_batch", "POST", "/api/properties/compare/batch", {"property_ids": ids}))
+        else:
+            mix.append(("predict", "POST", f"/api/properties/{rng.randint(1, rows)}/predict", None))
+    return mix
+
+
+async def run_load(requests: List[Tuple[str, str, str, Any]], concurrency: int) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from main import app
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in requests:
+        queue.put_nowait(item)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def worker():
+            while True:
+                try:
+                    label, method, path, body = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                samples.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors[label] = errors.get(label, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {label: {**summarize(values), "errors": errors.get(label, 0)} for label, values in sorted(samples.items())}
+    all_samples = [value for values in samples.values() for value in values]
+    results["all"] = {
+        **summarize(all_samples),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(all_samples) / elapsed, 2),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="catalog directory (default: generate --rows into a temp dir)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows to generate when --data-dir is not given")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="stub LLM delay per call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or str(generate_catalog(args.rows, tmp))
+        # Configuration is read at import time, so set it before the app is imported
+        os.environ["DATA_DIR"] = data_dir
+        os.environ["LLM_EXTRACT_BACKEND"] = "stub"
+        os.environ["LLM_RESPONSE_BACKEND"] = "stub"
+        os.environ.setdefault("MONGODB_URI", "")
+        install_stub_llm(args.llm_latency_ms)
+
+        from services.property_service import property_service
+        rows = len(property_service.merge_property_data())
+        requests = build_requests(args.requests, rows, random.Random(args.seed))
+        results = asyncio.run(run_load(requests, args.concurrency))
+        write_results(
+            "load",
+            results,
+            {
+                "rows": rows,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "llm_latency_ms": args.llm_latency_ms,
+            },
+            args.out
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Micro-benchmarks for the catalog, search, conversion and prediction hot paths
+
+Usage (from backend/):
+    python -m benchmarks.micro --rows 100000 --out results/micro.json
+    python -m benchmarks.micro --data-dir /tmp/catalog_1e5 --repeat 50
+"""
+import argparse
+import tempfile
+from typing import Any, Dict, Tuple
+
+from benchmarks.generate_catalog import generate_catalog
+from benchmarks.results import measure, write_results
+from config import QUERY_CACHE_CONFIG
+from models.schemas import PredictionRequest, PropertyFilterRequest
+from services.ml_service import MLModelService
+from services.property_service import PropertyService
+
+# Representative filter combinations (popular city + price band, amenity, bedroom count)
+FILTER_SCENARIOS = {
+    "city_price_band": PropertyFilterRequest(location="Austin", min_price=300000, max_price=700000),
+    "amenities": PropertyFilterRequest(amenities=["pool", "gym"]),
+    "bedrooms_max_price": PropertyFilterRequest(bedrooms=3, max_price=500000),
+}
+
+
+def run(data_dir: str, repeat: int) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Run every micro-benchmark; returns the results and the catalog size"""
+    service = PropertyService(data_dir=data_dir)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # Cold load: read and merge the three JSON files
+    results["merge_property_data"] = measure(
+        lambda: service.merge_property_data(use_cache=False), repeat=max(1, min(repeat, 5)), warmup=0
+    )
+    catalog = service.merge_property_data()
+
+    for name, filters in FILTER_SCENARIOS.items():
+        results[f"filter_properties.{name}"] = measure(
+            lambda filters=filters: service.filter_properties(catalog, filters), repeat
+        )
+
+    cache_enabled = QUERY_CACHE_CONFIG["enabled"]
+    try:
+        QUERY_CACHE_CONFIG["enabled"] = False
+        for name, filters in FILTER_SCENARIOS.items():
+            results[f"search_properties.{name}"] = measure(
+                lambda filters=filters: service.search_properties(
+                    filters=filters, sort_by="price", sort_order="asc", limit=100
+                ),
+                repeat
+            )
+        results["search_properties.text_query"] = measure(
+            lambda: service.search_properties(query="villa", limit=100), repeat
+        )
+        QUERY_CACHE_CONFIG["enabled"] = True
+        results["search_properties.cached"] = measure(
+            lambda: service.search_properties(filters=FILTER_SCENARIOS["city_price_band"], sort_by="price", limit=100),
+            repeat
+        )
+    finally:
+        QUERY_CACHE_CONFIG["enabled"] = cache_enabled
+
+    sample = catalog[:100]
+    results["convert_to_property_response.x100"] = measure(
+        lambda: [service.convert_to_property_response(prop) for prop in sample], repeat
+    )
+
+    ml = MLModelService()
+    if ml.is_available():
+        request = PredictionRequest(
+            property_type="SFH", lot_area=6000, bedrooms=3, bathrooms=2, year_built=2012,
+            has_pool=True, has_garage=True, school_rating=8
+        )
+        results["ml_predict"] = measure(lambda: ml.predict(request), repeat * 10)
+        results["ml_predict_many.x20"] = measure(lambda: ml.predict_many(catalog[:20]), repeat)
+    else:
+        print("⚠️ ML model not available, skipping prediction benchmarks")
+
+    return results, len(catalog)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="catalog directory (default: generate --rows into a temp dir)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows to generate when --data-dir is not given")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or str(generate_catalog(args.rows, tmp))
+        results, rows = run(data_dir, args.repeat)
+        write_results(
+            "micro",
+            results,
+            {"data_dir": args.data_dir, "rows": rows, "repeat": args.repeat},
+            args.out
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Timing helpers and the JSON results format shared by the benchmarks"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples_ms)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(percentile(50), 4),
+        "p95_ms": round(percentile(95), 4),
+        "p99_ms": round(percentile(99), 4),
+        "min_ms": round(ordered[0], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Run func `warmup` times untimed, then `repeat` timed runs"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(suite: str, results: Dict[str, Dict[str, Any]], params: Dict[str, Any], out: Optional[str]) -> Dict:
+    """Attach run metadata and write the results as JSON (stdout when out is None)"""
+    document = {
+        "suite": suite,
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **params,
+        },
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if out:
+        Path(out).write_text(text + "\n")
+        print(f"✅ Results written to {out}")
+    else:
+        print(text)
+    return document
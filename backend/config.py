@@ -40,3 +40,230 @@ FILTER_OPERATORS = {
     "in": lambda value, threshold: all(item.lower() in [v.lower() for v in value] for item in threshold) if isinstance(threshold, list) and isinstance(value, list) else False,
 }
 
+# Spatial search: listings without coordinates are geocoded to city centroids at load time; all are indexed on a lat/lon grid
+GEO_CONFIG = {
+    # Grid cell size in degrees (0.02° is about 2.2 km of latitude)
+    "cell_degrees": float(os.getenv("GEO_CELL_DEGREES", "0.02")),
+}
+
+# Facet counts returned by /api/properties/search/faceted
+FACET_CONFIG = {
+    "price_buckets": int(os.getenv("FACET_PRICE_BUCKETS", "10")),
+    # Bedroom counts at or above this are grouped as "N+"
+    "max_bedroom_bucket": int(os.getenv("FACET_MAX_BEDROOM_BUCKET", "5")),
+    # Most frequent values kept for the location and amenity facets
+    "max_values": int(os.getenv("FACET_MAX_VALUES", "50")),
+    # Facet results kept per catalog version (keyed like the search result cache)
+    "cache_entries": int(os.getenv("FACET_CACHE_ENTRIES", "256")),
+}
+
+
+# Chat response generation configuration
+# mode: "llm" always calls the LLM, "template" never does, "auto" follows RESPONSE_INTENT_POLICY
+RESPONSE_CONFIG = {
+    "mode": os.getenv("RESPONSE_MODE", "auto").lower(),
+    "max_listed_properties": int(os.getenv("RESPONSE_MAX_LISTED", "3")),
+}
+
+# Per-intent policy used in "auto" mode: "template" renders locally, "llm" calls the model
+RESPONSE_INTENT_POLICY: Dict[str, str] = {
+    "no_results": os.getenv("RESPONSE_POLICY_NO_RESULTS", "template"),
+    "search": os.getenv("RESPONSE_POLICY_SEARCH", "template"),
+    "cheapest": os.getenv("RESPONSE_POLICY_CHEAPEST", "template"),
+    "most_expensive": os.getenv("RESPONSE_POLICY_MOST_EXPENSIVE", "template"),
+    "prediction": os.getenv("RESPONSE_POLICY_PREDICTION", "template"),
+    "property_detail": os.getenv("RESPONSE_POLICY_PROPERTY_DETAIL", "llm"),
+    "open_ended": os.getenv("RESPONSE_POLICY_OPEN_ENDED", "llm"),
+}
+
+# LLM resilience configuration (concurrency, deadlines, retries, circuit breaker)
+LLM_RESILIENCE_CONFIG = {
+    "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    "queue_timeout": float(os.getenv("LLM_QUEUE_TIMEOUT", "1.0")),
+    "max_retries": int(os.getenv("LLM_MAX_RETRIES", "2")),
+    "backoff_base": float(os.getenv("LLM_BACKOFF_BASE", "0.2")),
+    "backoff_max": float(os.getenv("LLM_BACKOFF_MAX", "2.0")),
+    "breaker_window": int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+    "breaker_min_calls": int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+    "breaker_failure_ratio": float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5")),
+    "breaker_slow_call_seconds": float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "5.0")),
+    "breaker_cooldown": float(os.getenv("LLM_BREAKER_COOLDOWN", "30.0")),
+}
+
+# Per-stage deadlines in seconds (total budget including retries)
+LLM_STAGE_DEADLINES: Dict[str, float] = {
+    "extract_preferences": float(os.getenv("LLM_DEADLINE_EXTRACT_PREFERENCES", "4.0")),
+    "extract_property_name": float(os.getenv("LLM_DEADLINE_EXTRACT_PROPERTY_NAME", "3.0")),
+    "generate_response": float(os.getenv("LLM_DEADLINE_GENERATE_RESPONSE", "6.0")),
+}
+
+# LLM backend routing per call type: backend is "openai", "local" (OpenAI-compatible server) or "in_process"
+LLM_CALL_ROUTES: Dict[str, Dict[str, str]] = {
+    "extract_preferences": {
+        "backend": os.getenv("LLM_EXTRACT_BACKEND", "openai"),
+        "model": os.getenv("LLM_EXTRACT_MODEL", "gpt-3.5-turbo"),
+    },
+    "extract_property_name": {
+        "backend": os.getenv("LLM_EXTRACT_BACKEND", "openai"),
+        "model": os.getenv("LLM_EXTRACT_MODEL", "gpt-3.5-turbo"),
+    },
+    "generate_response": {
+        "backend": os.getenv("LLM_RESPONSE_BACKEND", "openai"),
+        "model": os.getenv("LLM_RESPONSE_MODEL", "gpt-3.5-turbo"),
+    },
+}
+
+# Local LLM backends (llama.cpp server, vLLM, or an in-process llama.cpp model)
+LOCAL_LLM_CONFIG = {
+    "base_url": os.getenv("LOCAL_LLM_BASE_URL", "http://127.0.0.1:8080/v1"),
+    "api_key": os.getenv("LOCAL_LLM_API_KEY", ""),
+    "model_path": os.getenv("LOCAL_LLM_MODEL_PATH", ""),
+    "context_size": int(os.getenv("LOCAL_LLM_CONTEXT_SIZE", "2048")),
+    "threads": int(os.getenv("LOCAL_LLM_THREADS", "4")),
+}
+
+# Per-call token budgets: prompt tokens are enforced locally before sending, completion maps to max_tokens
+LLM_TOKEN_BUDGETS: Dict[str, Dict[str, int]] = {
+    "extract_preferences": {
+        "prompt": int(os.getenv("LLM_BUDGET_EXTRACT_PROMPT", "400")),
+        "completion": int(os.getenv("LLM_BUDGET_EXTRACT_COMPLETION", "120")),
+    },
+    "extract_property_name": {
+        "prompt": int(os.getenv("LLM_BUDGET_NAME_PROMPT", "300")),
+        "completion": int(os.getenv("LLM_BUDGET_NAME_COMPLETION", "30")),
+    },
+    "generate_response": {
+        "prompt": int(os.getenv("LLM_BUDGET_RESPONSE_PROMPT", "600")),
+        "completion": int(os.getenv("LLM_BUDGET_RESPONSE_COMPLETION", "160")),
+    },
+}
+
+# Chat history configuration
+CHAT_HISTORY_CONFIG = {
+    # Page size when no ?limit= is given; older pages are fetched with the next_before cursor
+    "default_page_size": int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50")),
+    # Upper bound for an explicit ?limit=
+    "max_page_size": int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", "200")),
+    # In-memory fallback bounds: ring buffer per user, LRU eviction across users
+    "memory_max_messages_per_user": int(os.getenv("CHAT_MEMORY_MAX_MESSAGES", "200")),
+    "memory_max_users": int(os.getenv("CHAT_MEMORY_MAX_USERS", "1000")),
+}
+
+# Write-behind batching for chat message persistence
+CHAT_WRITE_BEHIND_CONFIG = {
+    "enabled": os.getenv("CHAT_WRITE_BEHIND", "true").lower() == "true",
+    "batch_size": int(os.getenv("CHAT_WRITE_BATCH_SIZE", "100")),
+    "flush_interval": float(os.getenv("CHAT_WRITE_FLUSH_INTERVAL", "0.25")),
+    "max_queue": int(os.getenv("CHAT_WRITE_MAX_QUEUE", "10000")),
+    # How long a request waits for queue space before writing its batch inline
+    "enqueue_timeout": float(os.getenv("CHAT_WRITE_ENQUEUE_TIMEOUT", "0.05")),
+    # Extra attempts for a document whose batch write failed before it is dropped
+    "max_retries": int(os.getenv("CHAT_WRITE_MAX_RETRIES", "3")),
+    # "flush_on_shutdown" drains the queue at shutdown/exit, "none" drops pending writes
+    "durability": os.getenv("CHAT_WRITE_DURABILITY", "flush_on_shutdown"),
+}
+
+# MongoDB connection pool and timeout settings (shared by the sync and async clients)
+MONGODB_CONFIG = {
+    "database": os.getenv("MONGODB_DATABASE", "real_estate_db"),
+    "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+    "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "3000")),
+    "connectTimeoutMS": int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "3000")),
+    "socketTimeoutMS": int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "5000")),
+}
+
+# Saved-properties read-through cache
+SAVED_CACHE_CONFIG = {
+    "max_users": int(os.getenv("SAVED_CACHE_MAX_USERS", "10000")),
+    # Optional shared L2 for saved id lists, e.g. redis://localhost:6379/0
+    "redis_url": os.getenv("SAVED_CACHE_REDIS_URL", ""),
+    "redis_ttl": int(os.getenv("SAVED_CACHE_REDIS_TTL", "3600")),
+    # With Redis, local entries are only trusted for this many seconds before Redis is read again
+    "local_ttl": float(os.getenv("SAVED_CACHE_LOCAL_TTL", "1.0")),
+    # Server worker processes (uvicorn/gunicorn convention); without Redis the cache is per-process
+    # and is only used when this is 1
+    "workers": int(os.getenv("WEB_CONCURRENCY", "1")),
+}
+
+# Fallback state backend used when MongoDB is not configured:
+# "memory" is per-process, "sqlite" is a WAL-mode file shared by all workers on the host
+STATE_BACKEND_CONFIG = {
+    "backend": os.getenv("STATE_BACKEND", "memory").lower(),
+    "sqlite_path": os.getenv("STATE_SQLITE_PATH", str(BASE_DIR / "state.db")),
+    "sqlite_busy_timeout": float(os.getenv("STATE_SQLITE_BUSY_TIMEOUT", "5.0")),
+}
+
+# Per-user conversational context used to refine follow-up chat queries
+SESSION_CONTEXT_CONFIG = {
+    "enabled": os.getenv("CHAT_SESSION_CONTEXT", "true").lower() == "true",
+    "ttl_seconds": int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800")),
+    "max_users": int(os.getenv("CHAT_SESSION_MAX_USERS", "10000")),
+}
+
+# Search result cache (result id lists keyed by the normalized search parameters)
+QUERY_CACHE_CONFIG = {
+    "enabled": os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true",
+    "max_entries": int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "5000")),
+    "max_bytes": int(os.getenv("QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+}
+
+# Lazy service container; SERVICE_WARMUP lists services to build at startup, e.g. "property_service,ml_service"
+SERVICE_CONTAINER_CONFIG = {
+    "warmup": [name.strip() for name in os.getenv("SERVICE_WARMUP", "").split(",") if name.strip()],
+}
+
+# Startup warm-up run by the server lifespan before /ready reports ready
+STARTUP_WARMUP_CONFIG = {
+    "enabled": os.getenv("STARTUP_WARMUP", "true").lower() == "true",
+    # Number of catalog rows used for the warm-up search, conversion and prediction
+    "sample_size": int(os.getenv("STARTUP_WARMUP_SAMPLE_SIZE", "5")),
+}
+
+# In-process metrics exposed on /metrics
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+}
+
+# Request tracing: exporter is "none", "console", "file" (JSON Lines) or "otel" (opentelemetry-api, SDK configured separately)
+TRACING_CONFIG = {
+    "enabled": os.getenv("TRACING_ENABLED", "true").lower() == "true",
+    "exporter": os.getenv("TRACING_EXPORTER", "none").lower(),
+    "file_path": os.getenv("TRACING_FILE_PATH", str(BASE_DIR / "traces.jsonl")),
+    # Fraction of traces whose spans are recorded and exported
+    "sample_rate": float(os.getenv("TRACING_SAMPLE_RATE", "1.0")),
+}
+
+# Opt-in request profiling (statistical stack sampler, collapsed-stack output)
+PROFILING_CONFIG = {
+    "enabled": os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+    # Fraction of requests profiled when enabled
+    "sample_rate": float(os.getenv("PROFILING_SAMPLE_RATE", "0.0")),
+    # Requests slower than this are profiled when enabled (0 disables; keeps the sampler running)
+    "slow_threshold_ms": float(os.getenv("PROFILING_SLOW_MS", "0")),
+    "interval_ms": float(os.getenv("PROFILING_INTERVAL_MS", "5")),
+    # Samples kept for slow-request lookups; longer requests only get their last window_seconds
+    "window_seconds": float(os.getenv("PROFILING_WINDOW_SECONDS", "60")),
+    # Directory for <id>.folded files; empty keeps profiles in memory only (/admin/profiles)
+    "output_dir": os.getenv("PROFILING_OUTPUT_DIR", ""),
+    "max_profiles": int(os.getenv("PROFILING_MAX_PROFILES", "50")),
+    # HMAC secret for the X-Profile header, which profiles a single request even when disabled
+    "secret": os.getenv("PROFILING_SECRET", ""),
+    # Signed headers are bound to method and path; this bounds replays of the same request
+    "header_max_age": int(os.getenv("PROFILING_HEADER_MAX_AGE", "30")),
+}
+
+# Conditional GET and compression for catalog and saved-properties responses
+HTTP_CACHE_CONFIG = {
+    # "no-cache" lets clients store responses but revalidate them with If-None-Match every time
+    "cache_control": os.getenv("HTTP_CACHE_CONTROL", "no-cache"),
+    # Serialized and compressed bodies kept per (ETag, content coding)
+    "max_bytes": int(os.getenv("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "min_compress_bytes": int(os.getenv("HTTP_MIN_COMPRESS_BYTES", "1024")),
+    "gzip_level": int(os.getenv("HTTP_GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("HTTP_BROTLI_QUALITY", "5")),
+    # On-the-fly gzip for every other response above min_compress_bytes
+    "gzip_all": os.getenv("HTTP_GZIP_ALL", "true").lower() == "true",
+}
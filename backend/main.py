@@ -1,16 +1,61 @@
 """Main FastAPI application entry point"""
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from models.schemas import HealthResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
+from config import PROFILING_CONFIG, HTTP_CACHE_CONFIG
+from models.schemas import HealthResponse, ReadinessResponse
 from routes import properties, chatbot, predictions
+from services.chatbot_service import chatbot_service
+from services.container import container
+from services.warmup import run_warmup
+from services.metrics import metrics, MetricsMiddleware
+from services.tracing import TracingMiddleware, TRACE_HEADER
+from services.fast_json import FastJSONResponse
+from services.profiling import PROFILE_HEADER, ProfilingMiddleware, profile_store, verify_profile_header
+from mongodb_service import async_mongodb_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the worker up before /ready reports ready, and drain writes on shutdown"""
+    app.state.ready = False
+    container.warm_up()
+    warmup_ms = await run_in_threadpool(run_warmup)
+    # Index creation also opens the MongoDB connection pool
+    start = time.perf_counter()
+    await async_mongodb_service.ensure_indexes()
+    warmup_ms["mongodb_indexes"] = round((time.perf_counter() - start) * 1000, 2)
+    app.state.warmup_ms = warmup_ms
+    app.state.ready = True
+    print("✅ Warm-up complete")
+    
+    yield
+    
+    app.state.ready = False
+    # Drain write-behind queues before the worker exits
+    if container.is_initialized("chatbot_service"):
+        chatbot_service.write_queue.close()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Real Estate Chatbot API",
     description="API for real estate property search, comparison, and ML price prediction",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson rendering for every route (stdlib json when orjson is not installed)
+    default_response_class=FastJSONResponse
 )
 
+# gzip for responses that are not already encoded (catalog and saved sets are precompressed)
+if HTTP_CACHE_CONFIG["gzip_all"]:
+    app.add_middleware(GZipMiddleware, minimum_size=HTTP_CACHE_CONFIG["min_compress_bytes"], compresslevel=HTTP_CACHE_CONFIG["gzip_level"])
+
 # CORS middleware for frontend communication
 app.add_middleware(
     CORSMiddleware,
@@ -18,8 +63,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_HEADER, "ETag"],
 )
 
+# Request latency per handler for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Root span per request; the trace id is returned in X-Trace-Id
+app.add_middleware(TracingMiddleware)
+
+# Opt-in stack sampling of sampled, slow or X-Profile-signed requests
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(properties.router)
 app.include_router(chatbot.router)
@@ -35,6 +90,56 @@ async def root():
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def ready():
+    """Readiness check: 503 until startup warm-up has finished"""
+    is_ready = getattr(app.state, "ready", False)
+    body = ReadinessResponse(
+        status="ready" if is_ready else "starting",
+        ready=is_ready,
+        warmup_ms=getattr(app.state, "warmup_ms", {})
+    )
+    return JSONResponse(status_code=200 if is_ready else 503, content=body.model_dump())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Latency histograms, counters and cache hit rates in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/startup")
+async def startup_timings(request: Request):
+    """Per-module import and per-service init timings of this process"""
+    _require_profile_access(request)
+    return container.report()
+
+
+def _require_profile_access(request: Request):
+    """Profiles (stacks, paths, timings) are only readable with an X-Profile header signed for this request"""
+    if not PROFILING_CONFIG["secret"]:
+        raise HTTPException(status_code=404, detail="Profile endpoints need PROFILING_SECRET")
+    if not verify_profile_header(request.headers.get(PROFILE_HEADER), request.method, request.url.path):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile signature")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Recently captured request profiles, newest first"""
+    _require_profile_access(request)
+    return profile_store.list()
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(request: Request, profile_id: str):
+    """One profile as collapsed stacks (flamegraph.pl / speedscope input)"""
+    _require_profile_access(request)
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile["folded"] + "\n")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
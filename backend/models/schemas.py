@@ -1,5 +1,5 @@
 """Pydantic schemas for request and response models"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 
 
@@ -47,6 +47,26 @@ class PropertyFilterRequest(BaseModel):
     bathrooms: Optional[int] = Field(None, ge=0, description="Minimum number of bathrooms")
     min_size: Optional[int] = Field(None, ge=0, description="Minimum property size in sqft")
     amenities: Optional[List[str]] = Field(None, description="Required amenities")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Center latitude for radius search and distance sort")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Center longitude for radius search and distance sort")
+    radius_km: Optional[float] = Field(None, gt=0, description="Only properties within this distance of the center")
+    min_latitude: Optional[float] = Field(None, ge=-90, le=90, description="Bounding box south edge")
+    max_latitude: Optional[float] = Field(None, ge=-90, le=90, description="Bounding box north edge")
+    min_longitude: Optional[float] = Field(None, ge=-180, le=180, description="Bounding box west edge")
+    max_longitude: Optional[float] = Field(None, ge=-180, le=180, description="Bounding box east edge")
+    
+    @model_validator(mode="after")
+    def check_geo_filters(self):
+        """A radius needs a center and a bounding box needs all four edges"""
+        if self.radius_km is not None and (self.latitude is None or self.longitude is None):
+            raise ValueError("radius_km requires latitude and longitude")
+        edges = [self.min_latitude, self.max_latitude, self.min_longitude, self.max_longitude]
+        if any(edge is not None for edge in edges):
+            if any(edge is None for edge in edges):
+                raise ValueError("a bounding box needs min/max latitude and min/max longitude")
+            if self.min_latitude > self.max_latitude or self.min_longitude > self.max_longitude:
+                raise ValueError("bounding box minimums must not exceed maximums")
+        return self
 
 
 class SavePropertyRequest(BaseModel):
@@ -55,11 +75,22 @@ class SavePropertyRequest(BaseModel):
     user_id: Optional[str] = Field("default", description="User ID")
 
 
+class BulkSavedPropertiesRequest(BaseModel):
+    """Request model for saving or removing several properties at once"""
+    property_ids: List[int] = Field(..., min_items=1, max_items=500, description="Property IDs to save or remove")
+    user_id: Optional[str] = Field("default", description="User ID")
+
+
 class ComparePropertiesRequest(BaseModel):
     """Request model for comparing properties"""
     property_ids: List[int] = Field(..., min_items=2, max_items=2, description="Exactly 2 property IDs to compare")
 
 
+class CompareManyRequest(BaseModel):
+    """Request model for comparing a shortlist of properties"""
+    property_ids: List[int] = Field(..., min_items=2, max_items=20, description="2 to 20 property IDs to compare")
+
+
 class PredictionRequest(BaseModel):
     """Request model for ML price prediction"""
     property_type: str = Field(..., pattern="^(SFH|Condo)$", description="Property type: SFH or Condo")
@@ -85,6 +116,9 @@ class PropertyResponse(BaseModel):
     size: int
     amenities: List[str]
     images: List[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    coordinates_approximate: bool = Field(False, description="True when latitude/longitude are the city centroid, not the listing's own location")
     prediction: Optional[Dict[str, Any]] = Field(None, description="ML price prediction data")
 
 
@@ -94,6 +128,30 @@ class PropertiesListResponse(BaseModel):
     count: int
 
 
+class PriceBucket(BaseModel):
+    """One price histogram bucket: min <= price < max"""
+    min: float
+    max: float
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """Counts over every match of a search, not just the returned page"""
+    locations: Dict[str, int] = Field(default_factory=dict, description="Location -> count, most frequent first")
+    bedrooms: Dict[str, int] = Field(default_factory=dict, description="Bedroom bucket (\"0\" .. \"5+\") -> count")
+    price: List[PriceBucket] = Field(default_factory=list, description="Price histogram over the catalog price range")
+    amenities: Dict[str, int] = Field(default_factory=dict, description="Amenity -> count, most frequent first")
+
+
+class FacetedPropertiesResponse(BaseModel):
+    """Response model for a page of search results with facet counts"""
+    properties: List[PropertyResponse]
+    count: int
+    total: int = Field(..., description="Number of matches across all pages")
+    offset: int
+    facets: SearchFacets
+
+
 class ChatResponse(BaseModel):
     """Response model for chatbot endpoint"""
     message: str
@@ -113,7 +171,7 @@ class SavePropertyResponse(BaseModel):
     """Response model for saving property"""
     message: str
     saved_properties: List[int]
-    storage: str = Field(..., description="Storage type: 'mongodb' or 'memory'")
+    storage: str = Field(..., description="Storage type: 'mongodb', 'memory' or 'sqlite'")
 
 
 class SavedPropertiesResponse(BaseModel):
@@ -128,12 +186,34 @@ class ComparisonResponse(BaseModel):
     property2: Dict[str, Any] = Field(..., description="Second property with prediction")
 
 
+class FieldComparison(BaseModel):
+    """Precomputed statistics for one compared field"""
+    min: Optional[float] = None
+    max: Optional[float] = None
+    deltas: List[Optional[float]] = Field(default_factory=list, description="Each value minus the column minimum")
+
+
+class MultiComparisonResponse(BaseModel):
+    """Column-oriented comparison of several properties"""
+    property_ids: List[int] = Field(..., description="Compared property IDs, in request order")
+    properties: List[Dict[str, Any]] = Field(..., description="Properties with predictions, in the same order")
+    columns: Dict[str, List[Any]] = Field(..., description="Field name -> one value per property")
+    stats: Dict[str, FieldComparison] = Field(..., description="Min/max/deltas for numeric columns")
+
+
 class HealthResponse(BaseModel):
     """Response model for health check"""
     message: str
     status: str
 
 
+class ReadinessResponse(BaseModel):
+    """Response model for the readiness check"""
+    status: str = Field(..., description="'ready' once startup warm-up has finished, else 'starting'")
+    ready: bool
+    warmup_ms: Dict[str, float] = Field(default_factory=dict, description="Duration of each warm-up step (-1 if it failed)")
+
+
 class ChatMessage(BaseModel):
     """Chat message model"""
     id: str
@@ -148,4 +228,5 @@ class ChatHistoryResponse(BaseModel):
     """Response model for chat history"""
     messages: List[ChatMessage]
     count: int
+    next_before: Optional[str] = Field(None, description="Cursor for the next (older) page; null when there are no more messages")
 
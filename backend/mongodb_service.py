@@ -2,9 +2,41 @@
 MongoDB service for storing saved properties
 Optional: Can be enabled by setting MONGODB_URI environment variable
 """
-from pymongo import MongoClient
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
 import os
+from config import MONGODB_CONFIG
+from services.history_store import clamp_page_size, decode_cursor, encode_cursor
+from services.container import container, timed_import
+from services.metrics import timed, MONGODB_LATENCY
+
+# pymongo and the optional async driver (motor) are imported when a client is first created,
+# so processes that never touch MongoDB do not pay for them
+
+# Indexes created at startup: (collection, keys, options)
+INDEXES = [
+    ('saved_properties', [('user_id', 1), ('property_id', 1)], {'unique': True}),
+    ('chat_history', [('user_id', 1), ('timestamp', 1), ('_id', 1)], {}),
+]
+
+
+def _client_options() -> dict:
+    """Pool and timeout keyword arguments for MongoClient / AsyncIOMotorClient"""
+    return {k: v for k, v in MONGODB_CONFIG.items() if k != 'database'}
+
+
+def _save_operations(user_id: str, property_ids: List[int]) -> list:
+    """Upsert operations for a bulk save"""
+    from pymongo import UpdateOne
+    return [
+        UpdateOne(
+            {'user_id': user_id, 'property_id': property_id},
+            {'$set': {'user_id': user_id, 'property_id': property_id}},
+            upsert=True
+        )
+        for property_id in dict.fromkeys(property_ids)
+    ]
+
 
 class MongoDBService:
     def __init__(self):
@@ -14,8 +46,9 @@ class MongoDBService:
         
         if self.mongodb_uri:
             try:
-                self.client = MongoClient(self.mongodb_uri)
-                self.db = self.client['real_estate_db']
+                pymongo = timed_import('pymongo')
+                self.client = pymongo.MongoClient(self.mongodb_uri, **_client_options())
+                self.db = self.client[MONGODB_CONFIG['database']]
                 print("✅ Connected to MongoDB")
             except Exception as e:
                 print(f"⚠️ MongoDB connection error: {e}")
@@ -24,6 +57,7 @@ class MongoDBService:
     def is_available(self) -> bool:
         return self.client is not None
     
+    @timed(MONGODB_LATENCY, "sync", "save_property")
     def save_property(self, user_id: str, property_id: int) -> bool:
         """Save a property for a user"""
         if not self.is_available():
@@ -41,6 +75,7 @@ class MongoDBService:
             print(f"Error saving property: {e}")
             return False
     
+    @timed(MONGODB_LATENCY, "sync", "get_saved_properties")
     def get_saved_properties(self, user_id: str) -> List[int]:
         """Get list of saved property IDs for a user"""
         if not self.is_available():
@@ -54,6 +89,7 @@ class MongoDBService:
             print(f"Error getting saved properties: {e}")
             return []
     
+    @timed(MONGODB_LATENCY, "sync", "remove_saved_property")
     def remove_saved_property(self, user_id: str, property_id: int) -> bool:
         """Remove a saved property"""
         if not self.is_available():
@@ -67,6 +103,35 @@ class MongoDBService:
             print(f"Error removing saved property: {e}")
             return False
     
+    @timed(MONGODB_LATENCY, "sync", "save_properties")
+    def save_properties(self, user_id: str, property_ids: List[int]) -> bool:
+        """Save several properties for a user in one bulk_write"""
+        if not self.is_available():
+            return False
+        
+        try:
+            collection = self.db['saved_properties']
+            collection.bulk_write(_save_operations(user_id, property_ids), ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error saving properties: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "sync", "remove_saved_properties")
+    def remove_saved_properties(self, user_id: str, property_ids: List[int]) -> bool:
+        """Remove several saved properties for a user in one delete_many"""
+        if not self.is_available():
+            return False
+        
+        try:
+            collection = self.db['saved_properties']
+            collection.delete_many({'user_id': user_id, 'property_id': {'$in': list(property_ids)}})
+            return True
+        except Exception as e:
+            print(f"Error removing saved properties: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "sync", "save_chat_message")
     def save_chat_message(self, user_id: str, message: dict) -> bool:
         """Save a chat message to history"""
         if not self.is_available():
@@ -81,23 +146,73 @@ class MongoDBService:
             print(f"Error saving chat message: {e}")
             return False
     
-    def get_chat_history(self, user_id: str) -> List[dict]:
-        """Get chat history for a user"""
+    @timed(MONGODB_LATENCY, "sync", "save_chat_messages")
+    def save_chat_messages(self, documents: List[dict]) -> bool:
+        """Save a batch of chat messages (each already carrying user_id) in one insert_many"""
+        if not self.is_available() or not documents:
+            return False
+        
+        from pymongo.errors import BulkWriteError
+        try:
+            collection = self.db['chat_history']
+            # insert_many sets each document's _id, so a retried batch only re-sends the same ids;
+            # unordered inserts let the rest of the batch land past the duplicates
+            collection.insert_many(documents, ordered=False)
+            return True
+        except BulkWriteError as e:
+            if all(error.get('code') == 11000 for error in e.details.get('writeErrors', [])):
+                return True
+            print(f"Error saving chat messages: {e}")
+            return False
+        except Exception as e:
+            print(f"Error saving chat messages: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "sync", "get_chat_history")
+    def get_chat_history(
+        self,
+        user_id: str,
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get a page of chat history for a user (newest `limit` messages older than `before`)"""
         if not self.is_available():
-            return []
+            return [], None
         
+        limit = clamp_page_size(limit)
         try:
             collection = self.db['chat_history']
-            results = collection.find(
-                {'user_id': user_id},
-                sort=[('timestamp', 1)]  # Sort by timestamp ascending
-            )
-            # Remove MongoDB _id field and return as list
-            return [{k: v for k, v in doc.items() if k != '_id'} for doc in results]
+            query = {'user_id': user_id}
+            if before:
+                # _id breaks timestamp ties so messages sharing the boundary timestamp are not skipped
+                timestamp, tiebreak = decode_cursor(before)
+                from bson import ObjectId
+                if tiebreak and ObjectId.is_valid(tiebreak):
+                    query['$or'] = [
+                        {'timestamp': {'$lt': timestamp}},
+                        {'timestamp': timestamp, '_id': {'$lt': ObjectId(tiebreak)}},
+                    ]
+                else:
+                    query['timestamp'] = {'$lt': timestamp}
+            # Walk the (user_id, timestamp, _id) index backwards; fetch one extra to detect more pages
+            results = list(collection.find(
+                query,
+                projection={'user_id': 0},
+                sort=[('timestamp', -1), ('_id', -1)],
+                limit=limit + 1
+            ))
+            has_more = len(results) > limit
+            results = results[:limit][::-1]
+            next_before = None
+            if has_more and results:
+                next_before = encode_cursor(results[0].get('timestamp', ''), results[0]['_id'])
+            page = [{k: v for k, v in doc.items() if k != '_id'} for doc in results]
+            return page, next_before
         except Exception as e:
             print(f"Error getting chat history: {e}")
-            return []
+            return [], None
     
+    @timed(MONGODB_LATENCY, "sync", "clear_chat_history")
     def clear_chat_history(self, user_id: str) -> bool:
         """Clear chat history for a user"""
         if not self.is_available():
@@ -111,16 +226,136 @@ class MongoDBService:
             print(f"Error clearing chat history: {e}")
             return False
 
-# Global instance - wrapped in try-except to prevent import-time crashes
-try:
-    mongodb_service = MongoDBService()
-except Exception as e:
-    print(f"⚠️ Failed to initialize MongoDB service: {e}")
-    # Create a dummy service that uses in-memory storage
-    class DummyMongoDBService:
-        def save_property(self, *args, **kwargs): return True
-        def get_saved_properties(self, *args, **kwargs): return []
-        def delete_saved_property(self, *args, **kwargs): return True
-        def is_available(self): return False
-    mongodb_service = DummyMongoDBService()
+class AsyncMongoDBService:
+    """Non-blocking MongoDB access for async route handlers (Motor, or the sync client in the threadpool)"""
+    
+    def __init__(self, sync_service: MongoDBService):
+        self.sync_service = sync_service
+        self.client = None
+        self.db = None
+        
+        motor = None
+        if sync_service.is_available():
+            try:
+                motor = timed_import('motor.motor_asyncio')
+            except ImportError:
+                # Without the async driver the sync client runs in the threadpool
+                motor = None
+        if motor is not None:
+            try:
+                self.client = motor.AsyncIOMotorClient(sync_service.mongodb_uri, **_client_options())
+                self.db = self.client[MONGODB_CONFIG['database']]
+            except Exception as e:
+                print(f"⚠️ Async MongoDB client error, falling back to threadpool: {e}")
+                self.client = None
+    
+    def is_available(self) -> bool:
+        return self.sync_service.is_available()
+    
+    async def _run_sync(self, method: str, *args):
+        return await run_in_threadpool(getattr(self.sync_service, method), *args)
+    
+    @timed(MONGODB_LATENCY, "async", "ensure_indexes")
+    async def ensure_indexes(self) -> bool:
+        """Create the saved_properties and chat_history indexes (idempotent)"""
+        if not self.is_available():
+            return False
+        try:
+            for collection, keys, options in INDEXES:
+                if self.db is not None:
+                    await self.db[collection].create_index(keys, **options)
+                else:
+                    await run_in_threadpool(self.sync_service.db[collection].create_index, keys, **options)
+            return True
+        except Exception as e:
+            print(f"⚠️ MongoDB index creation error: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "async", "save_property")
+    async def save_property(self, user_id: str, property_id: int) -> bool:
+        """Save a property for a user"""
+        if self.db is None:
+            return await self._run_sync('save_property', user_id, property_id)
+        try:
+            await self.db['saved_properties'].update_one(
+                {'user_id': user_id, 'property_id': property_id},
+                {'$set': {'user_id': user_id, 'property_id': property_id}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving property: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "async", "get_saved_properties")
+    async def get_saved_properties(self, user_id: str) -> List[int]:
+        """Get list of saved property IDs for a user"""
+        if self.db is None:
+            return await self._run_sync('get_saved_properties', user_id)
+        try:
+            cursor = self.db['saved_properties'].find({'user_id': user_id}, projection={'property_id': 1})
+            return [doc['property_id'] async for doc in cursor]
+        except Exception as e:
+            print(f"Error getting saved properties: {e}")
+            return []
+    
+    @timed(MONGODB_LATENCY, "async", "remove_saved_property")
+    async def remove_saved_property(self, user_id: str, property_id: int) -> bool:
+        """Remove a saved property"""
+        if self.db is None:
+            return await self._run_sync('remove_saved_property', user_id, property_id)
+        try:
+            await self.db['saved_properties'].delete_one({'user_id': user_id, 'property_id': property_id})
+            return True
+        except Exception as e:
+            print(f"Error removing saved property: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "async", "save_properties")
+    async def save_properties(self, user_id: str, property_ids: List[int]) -> bool:
+        """Save several properties for a user in one bulk_write"""
+        if self.db is None:
+            return await self._run_sync('save_properties', user_id, property_ids)
+        try:
+            await self.db['saved_properties'].bulk_write(_save_operations(user_id, property_ids), ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error saving properties: {e}")
+            return False
+    
+    @timed(MONGODB_LATENCY, "async", "remove_saved_properties")
+    async def remove_saved_properties(self, user_id: str, property_ids: List[int]) -> bool:
+        """Remove several saved properties for a user in one delete_many"""
+        if self.db is None:
+            return await self._run_sync('remove_saved_properties', user_id, property_ids)
+        try:
+            await self.db['saved_properties'].delete_many(
+                {'user_id': user_id, 'property_id': {'$in': list(property_ids)}}
+            )
+            return True
+        except Exception as e:
+            print(f"Error removing saved properties: {e}")
+            return False
+
+
+def _create_mongodb_service():
+    """Connect if MONGODB_URI is set; never raise at startup"""
+    try:
+        return MongoDBService()
+    except Exception as e:
+        print(f"⚠️ Failed to initialize MongoDB service: {e}")
+        # Create a dummy service that uses in-memory storage
+        class DummyMongoDBService:
+            def save_property(self, *args, **kwargs): return True
+            def get_saved_properties(self, *args, **kwargs): return []
+            def delete_saved_property(self, *args, **kwargs): return True
+            def is_available(self): return False
+        return DummyMongoDBService()
+
+
+container.register("mongodb_service", _create_mongodb_service)
+container.register("async_mongodb_service", lambda: AsyncMongoDBService(container.get("mongodb_service")))
 
+# Global instances - the client is created on first use
+mongodb_service = container.proxy("mongodb_service")
+async_mongodb_service = container.proxy("async_mongodb_service")
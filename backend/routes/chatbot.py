@@ -1,7 +1,11 @@
 """Chatbot API routes"""
-from fastapi import APIRouter
-from models.schemas import ChatMessageRequest, ChatResponse, ChatHistoryResponse, ChatMessage, PropertyResponse
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+from models.schemas import ChatMessageRequest, ChatResponse, ChatHistoryResponse
 from services.chatbot_service import chatbot_service
+from services.property_service import property_service
+from services.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/api/chat", tags=["chatbot"])
 
@@ -10,40 +14,44 @@ router = APIRouter(prefix="/api/chat", tags=["chatbot"])
 async def chat_endpoint(request: ChatMessageRequest):
     """Chatbot endpoint that processes user messages and returns property recommendations"""
     user_id = request.user_id or "default"
-    return chatbot_service.process_message(request.message, user_id)
+    # Run in the threadpool so concurrent chats overlap and identical queries can be coalesced
+    return await run_in_threadpool(chatbot_service.process_message, request.message, user_id)
 
 
 @router.get("/history/{user_id}", response_model=ChatHistoryResponse)
-async def get_chat_history(user_id: str = "default"):
-    """Get chat history for a user"""
-    history = chatbot_service.get_chat_history(user_id)
+async def get_chat_history(
+    user_id: str = "default",
+    before: Optional[str] = Query(None, description="Cursor (next_before) of the page to continue from; a bare timestamp also works"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of messages to return (default CHAT_HISTORY_PAGE_SIZE)")
+):
+    """Get a page of a user's chat history, newest page first (pass next_before as `before` to load older messages)"""
+    # History reads use the sync Mongo client, so keep them off the event loop
+    history, next_before = await run_in_threadpool(chatbot_service.get_chat_history, user_id, before, limit)
     messages = []
     for msg in history:
-        # Convert properties from dict to PropertyResponse if needed
+        # Hydrated catalog rows and older messages' embedded PropertyResponse dicts both come
+        # from internal stores, so they are shaped into payload dicts without model validation
         properties = []
-        if msg.get("properties"):
-            for prop in msg.get("properties", []):
-                if isinstance(prop, dict):
-                    properties.append(PropertyResponse(**prop))
-                else:
-                    properties.append(prop)
+        for prop in msg.get("properties") or []:
+            if isinstance(prop, dict):
+                properties.extend(property_service.property_payloads([prop]))
+            else:
+                properties.append(prop.model_dump(mode="json"))
         
-        messages.append(
-            ChatMessage(
-                id=msg.get("id", ""),
-                type=msg.get("type", "bot"),
-                text=msg.get("text", ""),
-                timestamp=msg.get("timestamp", ""),
-                properties=properties,
-                isError=msg.get("isError", False)
-            )
-        )
-    return ChatHistoryResponse(messages=messages, count=len(messages))
+        messages.append({
+            "id": msg.get("id", ""),
+            "type": msg.get("type", "bot"),
+            "text": msg.get("text", ""),
+            "timestamp": msg.get("timestamp", ""),
+            "properties": properties,
+            "isError": msg.get("isError", False),
+        })
+    return FastJSONResponse({"messages": messages, "count": len(messages), "next_before": next_before})
 
 
 @router.delete("/history/{user_id}")
 async def clear_chat_history(user_id: str = "default"):
     """Clear chat history for a user"""
-    success = chatbot_service.clear_chat_history(user_id)
+    success = await run_in_threadpool(chatbot_service.clear_chat_history, user_id)
     return {"success": success, "message": "Chat history cleared" if success else "Failed to clear history"}
 
@@ -1,51 +1,102 @@
 """Property-related API routes"""
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Dict, Any, Optional
 from models.schemas import (
     PropertyFilterRequest,
     PropertiesListResponse,
+    FacetedPropertiesResponse,
     PropertyResponse,
     SavePropertyRequest,
     SavePropertyResponse,
     SavedPropertiesResponse,
+    BulkSavedPropertiesRequest,
     ComparePropertiesRequest,
-    ComparisonResponse
+    ComparisonResponse,
+    CompareManyRequest,
+    MultiComparisonResponse
 )
 from services.property_service import property_service
 from services.ml_service import ml_service
-from mongodb_service import mongodb_service
+from services.saved_cache import saved_properties_cache
+from services.state_store import fallback_state
+from services.http_cache import conditional_response, make_etag
+from services.fast_json import FastJSONResponse, dumps
+from mongodb_service import async_mongodb_service
 
 router = APIRouter(prefix="/api/properties", tags=["properties"])
 
-# In-memory fallback for saved properties (used if MongoDB not available)
-saved_properties = {}
-
 
 @router.get("", response_model=PropertiesListResponse)
-async def get_all_properties():
-    """Get all merged properties"""
+async def get_all_properties(request: Request):
+    """Get all merged properties (ETag revalidation, compressed body cached per catalog)"""
     properties = property_service.merge_property_data()
-    property_responses = [
-        property_service.convert_to_property_response(prop) for prop in properties
-    ]
-    return PropertiesListResponse(
-        properties=property_responses,
-        count=len(property_responses)
-    )
+    
+    def build_body() -> bytes:
+        # Catalog rows are trusted: serialize PropertiesListResponse-shaped dicts directly
+        return dumps({
+            "properties": property_service.property_payloads(properties),
+            "count": len(properties)
+        })
+    
+    etag = make_etag("properties", property_service.catalog_fingerprint)
+    return conditional_response(request, etag, build_body)
 
 
 @router.post("/search", response_model=PropertiesListResponse)
-async def search_properties(filter_params: PropertyFilterRequest):
+async def search_properties(
+    filter_params: PropertyFilterRequest,
+    sort_by: Optional[str] = Query(None, description="price, bedrooms, bathrooms, size or distance (from the radius or bounding-box center)"),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$")
+):
     """Search and filter properties based on user preferences"""
-    filtered = property_service.search_properties(filters=filter_params)
+    filtered = property_service.search_properties(filters=filter_params, sort_by=sort_by, sort_order=sort_order)
     
-    property_responses = [
-        property_service.convert_to_property_response(prop) for prop in filtered
-    ]
-    
-    return PropertiesListResponse(
-        properties=property_responses,
-        count=len(property_responses)
+    return FastJSONResponse({
+        "properties": property_service.property_payloads(filtered),
+        "count": len(filtered)
+    })
+
+
+@router.post("/search/faceted", response_model=FacetedPropertiesResponse)
+async def search_properties_faceted(
+    filter_params: PropertyFilterRequest,
+    query: Optional[str] = Query(None, description="Text matched against title, location and amenities"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    sort_by: Optional[str] = Query(None, description="price, bedrooms, bathrooms, size or distance"),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$")
+):
+    """A page of search results with location, bedroom, price and amenity counts over all matches"""
+    page, total, facets = property_service.search_with_facets(
+        query=query,
+        filters=filter_params,
+        offset=offset,
+        limit=limit,
+        sort_by=sort_by,
+        sort_order=sort_order
+    )
+    return FastJSONResponse({
+        "properties": property_service.property_payloads(page),
+        "count": len(page),
+        "total": total,
+        "offset": offset,
+        "facets": facets
+    })
+
+
+@router.get("/search/stats")
+async def search_cache_stats() -> Dict[str, Any]:
+    """Hit rate and size of the search result cache"""
+    return property_service.query_cache.stats()
+
+
+def _saved_cache_enabled() -> bool:
+    """Serve saved sets from the cache only when no other worker can change them behind its back"""
+    if saved_properties_cache.shared:
+        return True
+    # Per-process cache: needs a single worker, and a store no other process writes to
+    return saved_properties_cache.coherent and (
+        async_mongodb_service.is_available() or not fallback_state.shared
     )
 
 
@@ -55,56 +106,118 @@ async def save_property(request: SavePropertyRequest):
     user_id = request.user_id
     
     # Try MongoDB first, fallback to in-memory
-    if mongodb_service.is_available():
-        success = mongodb_service.save_property(user_id, request.property_id)
+    if async_mongodb_service.is_available():
+        success = await async_mongodb_service.save_property(user_id, request.property_id)
         if success:
-            saved_ids = mongodb_service.get_saved_properties(user_id)
+            # Update the cached set in place; read back from MongoDB on a cold or shared cache
+            saved_ids = saved_properties_cache.add(user_id, [request.property_id])
+            if saved_ids is None:
+                saved_ids = await async_mongodb_service.get_saved_properties(user_id)
+                saved_properties_cache.set(user_id, saved_ids)
             return SavePropertyResponse(
                 message="Property saved",
                 saved_properties=saved_ids,
                 storage="mongodb"
             )
     
-    # Fallback to in-memory storage
-    if user_id not in saved_properties:
-        saved_properties[user_id] = []
-    
-    if request.property_id not in saved_properties[user_id]:
-        saved_properties[user_id].append(request.property_id)
+    # Fallback to the local state backend (memory or SQLite)
+    saved_ids = fallback_state.add_saved(user_id, [request.property_id])
+    saved_properties_cache.set(user_id, saved_ids)
     
     return SavePropertyResponse(
         message="Property saved",
-        saved_properties=saved_properties[user_id],
-        storage="memory"
+        saved_properties=saved_ids,
+        storage=fallback_state.name
     )
 
 
 @router.get("/saved/{user_id}", response_model=SavedPropertiesResponse)
-async def get_saved_properties(user_id: str = "default"):
-    """Get user's saved properties"""
-    # Try MongoDB first, fallback to in-memory
-    property_ids = []
-    if mongodb_service.is_available():
-        property_ids = mongodb_service.get_saved_properties(user_id)
-    else:
-        if user_id in saved_properties:
-            property_ids = saved_properties[user_id]
+async def get_saved_properties(request: Request, user_id: str = "default"):
+    """Get user's saved properties (ETag from the saved set, 304 on revalidation)"""
+    # Warm cache: the saved ids are known without touching the database
+    property_ids = saved_properties_cache.get_ids(user_id) if _saved_cache_enabled() else None
     
-    if not property_ids:
-        return SavedPropertiesResponse(properties=[], count=0)
+    if property_ids is None:
+        # Try MongoDB first, fallback to the local state backend
+        if async_mongodb_service.is_available():
+            property_ids = await async_mongodb_service.get_saved_properties(user_id)
+        else:
+            property_ids = fallback_state.get_saved(user_id)
+        saved_properties_cache.set(user_id, property_ids)
     
-    saved_props = property_service.get_properties_by_ids(property_ids)
+    def build_body() -> bytes:
+        saved_props = property_service.get_properties_by_ids(property_ids)
+        return dumps({
+            "properties": property_service.property_payloads(saved_props),
+            "count": len(saved_props)
+        })
     
-    property_responses = [
-        property_service.convert_to_property_response(prop) for prop in saved_props
-    ]
+    # The payload embeds catalog data, so the tag covers both the saved set and the catalog
+    property_service.merge_property_data()
+    etag = make_etag("saved", user_id, property_service.catalog_fingerprint, property_ids)
+    return conditional_response(request, etag, build_body)
+
+
+async def _apply_saved_changes(user_id: str, property_ids: List[int], remove: bool) -> SavePropertyResponse:
+    """Apply a bulk save or removal with a single database write and return the resulting set"""
+    noun = "Property" if len(set(property_ids)) == 1 else "Properties"
+    message = f"{noun} {'removed' if remove else 'saved'}"
     
-    return SavedPropertiesResponse(
-        properties=property_responses,
-        count=len(property_responses)
+    if async_mongodb_service.is_available():
+        if remove:
+            success = await async_mongodb_service.remove_saved_properties(user_id, property_ids)
+        else:
+            success = await async_mongodb_service.save_properties(user_id, property_ids)
+        if success:
+            update = saved_properties_cache.remove if remove else saved_properties_cache.add
+            saved_ids = update(user_id, property_ids)
+            if saved_ids is None:
+                saved_ids = await async_mongodb_service.get_saved_properties(user_id)
+                saved_properties_cache.set(user_id, saved_ids)
+            return SavePropertyResponse(
+                message=message,
+                saved_properties=saved_ids,
+                storage="mongodb"
+            )
+    
+    # Fallback to the local state backend (ordered set update)
+    if remove:
+        saved_ids = fallback_state.remove_saved(user_id, property_ids)
+    else:
+        saved_ids = fallback_state.add_saved(user_id, property_ids)
+    saved_properties_cache.set(user_id, saved_ids)
+    
+    return SavePropertyResponse(
+        message=message,
+        saved_properties=saved_ids,
+        storage=fallback_state.name
     )
 
 
+@router.post("/save/bulk", response_model=SavePropertyResponse)
+async def save_properties_bulk(request: BulkSavedPropertiesRequest):
+    """Save several properties to user's favorites in one request"""
+    missing = property_service.find_missing_ids(request.property_ids)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Properties not found: {missing}"
+        )
+    return await _apply_saved_changes(request.user_id, request.property_ids, remove=False)
+
+
+@router.post("/saved/remove", response_model=SavePropertyResponse)
+async def remove_saved_properties_bulk(request: BulkSavedPropertiesRequest):
+    """Remove several properties from user's favorites in one request"""
+    return await _apply_saved_changes(request.user_id, request.property_ids, remove=True)
+
+
+@router.delete("/saved/{user_id}/{property_id}", response_model=SavePropertyResponse)
+async def remove_saved_property(user_id: str, property_id: int):
+    """Remove a single property from user's favorites"""
+    return await _apply_saved_changes(user_id, [property_id], remove=True)
+
+
 @router.post("/compare", response_model=ComparisonResponse)
 async def compare_properties(request: ComparePropertiesRequest):
     """Compare two properties side-by-side"""
@@ -153,3 +266,46 @@ async def compare_properties(request: ComparePropertiesRequest):
         property2=prop2_dict
     )
 
+
+
+@router.post("/compare/batch", response_model=MultiComparisonResponse)
+async def compare_many_properties(request: CompareManyRequest):
+    """Compare up to 20 properties in one request with batched price predictions"""
+    property_ids = list(dict.fromkeys(request.property_ids))
+    
+    if len(property_ids) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="Please provide at least 2 distinct property IDs"
+        )
+    
+    missing = property_service.find_missing_ids(property_ids)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Properties not found: {missing}"
+        )
+    
+    properties = property_service.get_properties_by_ids(property_ids)
+    
+    # One batched scoring pass; failed predictions stay None instead of 0.0
+    predictions: List[Any] = [None] * len(properties)
+    if ml_service.is_available():
+        try:
+            predictions = [
+                pred.model_dump() if pred else None
+                for pred in ml_service.predict_many(properties)
+            ]
+        except Exception as e:
+            print(f"⚠️ Batch prediction error: {e}")
+    
+    comparison = property_service.build_comparison(properties, predictions)
+    
+    return MultiComparisonResponse(
+        property_ids=property_ids,
+        properties=[
+            {**prop, "prediction": pred} for prop, pred in zip(properties, predictions)
+        ],
+        columns=comparison["columns"],
+        stats=comparison["stats"]
+    )
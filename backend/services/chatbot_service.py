@@ -1,11 +1,30 @@
 """Chatbot service using LLM for natural language processing"""
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from models.schemas import PropertyFilterRequest, ChatResponse, PropertyResponse
 from services.property_service import property_service
 from services.llm_service import llm_service
+from services.response_templates import classify_intent
+from services.singleflight import SingleFlight, normalize_message
+from services.state_store import fallback_state
+from services.write_behind import WriteBehindQueue
+from services.session_context import (
+    session_context_cache,
+    build_vocabulary,
+    parse_followup,
+    merge_filters,
+    is_refinement,
+)
+from config import CHAT_WRITE_BEHIND_CONFIG, SESSION_CONTEXT_CONFIG
 from services.ml_service import ml_service
 from mongodb_service import mongodb_service
+from services.container import container
+from services.metrics import metrics
+from services.tracing import tracer, set_span_attributes
+
+CHAT_TURNS = metrics.counter(
+    "app_chat_turns_total", "Chat turns by path (full search or refined follow-up)", ("path",)
+)
 
 
 class ChatbotService:
@@ -13,8 +32,15 @@ class ChatbotService:
     
     def __init__(self):
         self.property_service = property_service
-        # In-memory fallback for chat history (used if MongoDB not available)
-        self.memory_history: Dict[str, List[dict]] = {}
+        # Fallback chat history store (memory or SQLite, used if MongoDB not available)
+        self.fallback_state = fallback_state
+        # Coalesces identical in-flight chat queries across users
+        self._flight = SingleFlight("chat")
+        # Batches chat message inserts off the request path
+        self.write_queue = WriteBehindQueue(self._write_batch)
+        # Last resolved search per user, used to refine follow-up messages
+        self.session_context = session_context_cache
+        self._vocabulary = None
     
     def _wants_prediction(self, message: str) -> bool:
         """Check if user wants price predictions"""
@@ -48,8 +74,13 @@ class ChatbotService:
     
     def process_message(self, message: str, user_id: str = "default") -> ChatResponse:
         """Process user message using LLM and return property recommendations"""
+        with tracer.start_as_current_span("chat.process_message"):
+            return self._process_message(message, user_id)
+    
+    def _process_message(self, message: str, user_id: str) -> ChatResponse:
         # Check if it's just a greeting
         if self._is_greeting(message):
+            set_span_attributes({"chat.path": "greeting"})
             greeting_response = (
                 "Hello! 👋 I'm your Real Estate AI assistant. "
                 "I can help you find properties based on your preferences like location, price, bedrooms, and amenities. "
@@ -81,11 +112,59 @@ class ChatbotService:
                 suggestions=self._generate_suggestions()
             )
         
+        # Follow-ups ("only ones with a pool", "cheaper") refine this user's previous search locally
+        answer = self._answer_followup(message, user_id)
+        if answer is None:
+            CHAT_TURNS.inc("search")
+            set_span_attributes({"chat.path": "search"})
+            # Identical concurrent messages share one computation; history is still written per user
+            answer = self._flight.do(
+                normalize_message(message), lambda: self._answer_message(message)
+            )
+        else:
+            CHAT_TURNS.inc("followup")
+            set_span_attributes({"chat.path": "followup"})
+        response_message, property_responses, context = answer
+        if SESSION_CONTEXT_CONFIG["enabled"]:
+            self.session_context.set(user_id, context)
+        
+        with tracer.start_as_current_span("chat.persist"):
+            # Store user message
+            user_msg = {
+                "id": str(int(datetime.now().timestamp() * 1000)),
+                "type": "user",
+                "text": message,
+                "timestamp": datetime.now().isoformat(),
+            }
+            self._save_message(user_id, user_msg)
+            
+            # Store bot response
+            bot_msg = {
+                "id": str(int(datetime.now().timestamp() * 1000) + 1),
+                "type": "bot",
+                "text": response_message,
+                "timestamp": datetime.now().isoformat(),
+                **self._property_refs(property_responses),
+            }
+            self._save_message(user_id, bot_msg)
+        
+        return ChatResponse(
+            message=response_message,
+            properties=property_responses,
+            suggestions=self._generate_suggestions()
+        )
+    
+    def _answer_message(self, message: str) -> Tuple[str, List[PropertyResponse], dict]:
+        """Run the search pipeline for a message (shared by coalesced requests)"""
         # Step 1: Use LLM to extract preferences and property name from user message
-        preferences = llm_service.extract_preferences(message)
+        with tracer.start_as_current_span("chat.extract_preferences") as span:
+            preferences = llm_service.extract_preferences(message)
+            span.set_attribute("preferences.keys", ",".join(sorted(k for k, v in preferences.items() if v)))
         
         # Step 2: Extract specific property name using LLM (if user is asking about a specific property)
-        property_name_query = llm_service.extract_property_name(message)
+        with tracer.start_as_current_span("chat.extract_property_name") as span:
+            property_name_query = llm_service.extract_property_name(message)
+            span.set_attribute("property_name.found", bool(property_name_query))
         
         # Also check if property_name was extracted in preferences (fallback)
         if not property_name_query and preferences.get("property_name"):
@@ -105,94 +184,215 @@ class ChatbotService:
             sort_by = "price"
             sort_order = "desc"
         
-        properties = self.property_service.search_properties(
-            query=property_name_query,  # Pass property name query for text search
-            filters=filter_request,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            limit=100  # Use max limit to return all matching properties
+        return self._search_and_respond(
+            message, preferences, property_name_query, filter_request, sort_by, sort_order
         )
+    
+    def _answer_followup(self, message: str, user_id: str) -> Optional[Tuple[str, List[PropertyResponse], dict]]:
+        """Merge a follow-up delta into the user's last search, refining its results instead of rescanning
+        
+        Returns None (full LLM extraction) unless the message is a pure narrowing of that search.
+        """
+        if not SESSION_CONTEXT_CONFIG["enabled"]:
+            return None
+        context = self.session_context.get(user_id)
+        if context is None:
+            return None
+        
+        with tracer.start_as_current_span("chat.parse_followup") as span:
+            vocabulary = self._catalog_vocabulary()
+            delta = parse_followup(message, context, vocabulary["amenities"], vocabulary["cities"])
+            span.set_attribute("followup.matched", delta is not None)
+        if delta is None:
+            return None
+        
+        previous_filters = context["filters"]
+        filters = merge_filters(previous_filters, delta)
+        # Anything that could widen the search (e.g. a higher price cap) is a new search for the LLM
+        if not is_refinement(previous_filters, filters):
+            return None
+        sort_by, sort_order = delta.get("sort", (context["sort_by"], context["sort_order"]))
+        
+        # Narrowing deltas only need to look at the previous (complete) result set
+        candidates = None
+        if context["complete"]:
+            candidates = self.property_service.get_properties_by_ids(context["result_ids"])
+        
+        preferences = dict(filters)
+        if sort_by == "price":
+            preferences["sort_by"] = "price_desc" if sort_order == "desc" else "price_asc"
+        
+        return self._search_and_respond(
+            message,
+            preferences,
+            context["query"],
+            PropertyFilterRequest(**filters) if filters else None,
+            sort_by,
+            sort_order,
+            candidates=candidates
+        )
+    
+    def _catalog_vocabulary(self) -> Dict[str, Any]:
+        """Amenity/city vocabulary, rebuilt only when the catalog object changes"""
+        catalog = self.property_service.merge_property_data()
+        if self._vocabulary is None or self._vocabulary[0] is not catalog:
+            self._vocabulary = (catalog, build_vocabulary(catalog))
+        return self._vocabulary[1]
+    
+    def _search_and_respond(
+        self,
+        message: str,
+        preferences: Dict,
+        property_name_query: Optional[str],
+        filter_request: Optional[PropertyFilterRequest],
+        sort_by: Optional[str],
+        sort_order: str,
+        candidates: Optional[List[Dict]] = None
+    ) -> Tuple[str, List[PropertyResponse], dict]:
+        """Search, predict and respond; also returns the context used to refine follow-ups"""
+        limit = 100  # Use max limit to return all matching properties
+        with tracer.start_as_current_span("chat.search") as span:
+            properties = self.property_service.search_properties(
+                query=property_name_query,  # Pass property name query for text search
+                filters=filter_request,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                limit=limit,
+                candidates=candidates
+            )
+            span.set_attributes({"search.result_count": len(properties), "search.refinement": candidates is not None})
         
         # Step 5: Check if user wants price predictions
         wants_prediction = self._wants_prediction(message)
         
         # Step 6: Add predictions to properties if requested or if properties are shown
         if wants_prediction or (properties and len(properties) <= 3):
-            # Add predictions to properties
-            for prop in properties:
-                try:
-                    if ml_service.is_available():
-                        prediction = ml_service.predict_from_property_data(prop, property_id=prop.get('id'))
-                        prop['prediction'] = {
-                            'predicted_price': prediction.predicted_price,
-                            'listed_price': prediction.listed_price,
-                            'model_input': prediction.model_input
-                        }
-                except Exception as e:
-                    print(f"⚠️ Prediction error for property {prop.get('id')}: {e}")
-                    # Continue without prediction
-        
-        # Step 7: Use LLM to generate natural conversational response
-        response_message = llm_service.generate_response(message, properties, preferences)
+            with tracer.start_as_current_span("chat.predict") as span:
+                properties = [self._with_prediction(prop) for prop in properties]
+                span.set_attribute("prediction.count", sum(1 for prop in properties if 'prediction' in prop))
+        
+        # Step 7: Generate conversational response (LLM only if the intent policy needs it)
+        with tracer.start_as_current_span("chat.generate_response") as span:
+            intent = classify_intent(properties, preferences, property_name_query, wants_prediction)
+            span.set_attribute("response.intent", intent)
+            response_message = llm_service.generate_response(message, properties, preferences, intent)
         
         # Convert to PropertyResponse models
-        property_responses = [
-            self.property_service.convert_to_property_response(prop) for prop in properties
-        ]
+        with tracer.start_as_current_span("chat.convert_responses") as span:
+            property_responses = [
+                self.property_service.convert_to_property_response(prop) for prop in properties
+            ]
+            span.set_attribute("response.property_count", len(property_responses))
         
-        # Store user message
-        user_msg = {
-            "id": str(int(datetime.now().timestamp() * 1000)),
-            "type": "user",
-            "text": message,
-            "timestamp": datetime.now().isoformat(),
+        context = {
+            "filters": filter_request.model_dump(exclude_none=True) if filter_request else {},
+            "query": property_name_query,
+            "sort_by": sort_by,
+            "sort_order": sort_order,
+            "result_ids": [prop['id'] for prop in properties],
+            # A truncated result set cannot be refined locally
+            "complete": len(properties) < limit,
+            "max_result_price": max((prop.get('price', 0) for prop in properties), default=None),
         }
-        self._save_message(user_id, user_msg)
-        
-        # Store bot response
-        bot_msg = {
-            "id": str(int(datetime.now().timestamp() * 1000) + 1),
-            "type": "bot",
-            "text": response_message,
-            "timestamp": datetime.now().isoformat(),
-            "properties": [prop.dict() for prop in property_responses],
+        return response_message, property_responses, context
+    
+    def _with_prediction(self, prop: Dict) -> Dict:
+        """Copy of a property with its ML prediction attached (catalog rows are never mutated)"""
+        try:
+            if ml_service.is_available():
+                prediction = ml_service.predict_from_property_data(prop, property_id=prop.get('id'))
+                return {
+                    **prop,
+                    'prediction': {
+                        'predicted_price': prediction.predicted_price,
+                        'listed_price': prediction.listed_price,
+                        'model_input': prediction.model_input
+                    }
+                }
+        except Exception as e:
+            print(f"⚠️ Prediction error for property {prop.get('id')}: {e}")
+            # Continue without prediction
+        return prop
+    
+    def _property_refs(self, property_responses: List[PropertyResponse]) -> dict:
+        """Store properties as id references plus a small prediction snapshot instead of full payloads"""
+        predictions = {}
+        for prop in property_responses:
+            if prop.prediction:
+                predictions[str(prop.id)] = {
+                    'predicted_price': prop.prediction.get('predicted_price'),
+                    'listed_price': prop.prediction.get('listed_price'),
+                }
+        return {
+            "property_ids": [prop.id for prop in property_responses],
+            "predictions": predictions,
         }
-        self._save_message(user_id, bot_msg)
+    
+    def _hydrate_messages(self, messages: List[dict]) -> List[dict]:
+        """Re-attach full property data to referenced messages with one bulk id-index lookup"""
+        all_ids = [pid for msg in messages for pid in msg.get("property_ids") or []]
+        if not all_ids:
+            return messages
         
-        return ChatResponse(
-            message=response_message,
-            properties=property_responses,
-            suggestions=self._generate_suggestions()
-        )
+        by_id = {prop['id']: prop for prop in self.property_service.get_properties_by_ids(all_ids)}
+        hydrated = []
+        for msg in messages:
+            if msg.get("property_ids"):
+                predictions = msg.get("predictions") or {}
+                msg = {
+                    **msg,
+                    "properties": [
+                        {**by_id[pid], 'prediction': predictions.get(str(pid))}
+                        for pid in msg["property_ids"] if pid in by_id
+                    ],
+                }
+            hydrated.append(msg)
+        return hydrated
     
-    def _save_message(self, user_id: str, message: dict):
-        """Save message to history (MongoDB or memory)"""
+    def _write_batch(self, documents: List[dict]) -> bool:
+        """Persist a batch of queued messages to MongoDB or the shared local store"""
         if mongodb_service.is_available():
-            mongodb_service.save_chat_message(user_id, message)
+            return mongodb_service.save_chat_messages(documents)
+        return self.fallback_state.append_messages(documents)
+    
+    def _save_message(self, user_id: str, message: dict):
+        """Save message to history (MongoDB, shared local store, or memory)"""
+        document = {**message, 'user_id': user_id}
+        if mongodb_service.is_available() or self.fallback_state.shared:
+            if CHAT_WRITE_BEHIND_CONFIG["enabled"]:
+                set_span_attributes({"persist.mode": "write_behind"})
+                self.write_queue.enqueue(document)
+            else:
+                set_span_attributes({"persist.mode": "direct"})
+                self._write_batch([document])
         else:
             # In-memory fallback
-            if user_id not in self.memory_history:
-                self.memory_history[user_id] = []
-            self.memory_history[user_id].append(message)
+            set_span_attributes({"persist.mode": "memory"})
+            self.fallback_state.append_messages([document])
     
-    def get_chat_history(self, user_id: str = "default") -> List[dict]:
-        """Get chat history for a user"""
+    def get_chat_history(
+        self,
+        user_id: str = "default",
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get a page of chat history for a user and the cursor for the next (older) page"""
+        # Make queued writes visible before reading
+        self.write_queue.flush()
         if mongodb_service.is_available():
-            return mongodb_service.get_chat_history(user_id)
+            messages, next_before = mongodb_service.get_chat_history(user_id, before, limit)
         else:
-            # In-memory fallback
-            return self.memory_history.get(user_id, [])
+            messages, next_before = self.fallback_state.get_history_page(user_id, before, limit)
+        return self._hydrate_messages(messages), next_before
     
     def clear_chat_history(self, user_id: str = "default") -> bool:
         """Clear chat history for a user"""
+        self.write_queue.flush()
+        self.session_context.clear(user_id)
         if mongodb_service.is_available():
             return mongodb_service.clear_chat_history(user_id)
         else:
-            # In-memory fallback
-            if user_id in self.memory_history:
-                self.memory_history[user_id] = []
-                return True
-            return False
+            return self.fallback_state.clear_history(user_id)
     
     def _preferences_to_filter(self, preferences: Dict) -> PropertyFilterRequest:
         """Convert LLM-extracted preferences to PropertyFilterRequest"""
@@ -232,5 +432,7 @@ class ChatbotService:
         ]
 
 
-# Global instance
-chatbot_service = ChatbotService()
+container.register("chatbot_service", ChatbotService)
+
+# Global instance - created on first use
+chatbot_service = container.proxy("chatbot_service")
@@ -0,0 +1,129 @@
+"""Lazy service container: subsystems are imported and built on first use"""
+import importlib
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config import SERVICE_CONTAINER_CONFIG
+
+# Module that registers each service, so a service can be resolved (or warmed) by name alone
+SERVICE_MODULES = {
+    "property_service": "services.property_service",
+    "ml_service": "services.ml_service",
+    "llm_service": "services.llm_service",
+    "chatbot_service": "services.chatbot_service",
+    "mongodb_service": "mongodb_service",
+    "async_mongodb_service": "mongodb_service",
+}
+
+
+class ServiceContainer:
+    """Registry of service factories; each instance is created once, on first access"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        # Re-entrant: factories resolve the services they depend on
+        self._lock = threading.RLock()
+        self._env_loaded = False
+        self.import_timings: Dict[str, float] = {}
+        self.init_timings: Dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register how to build a service; nothing is created until it is used"""
+        self._factories[name] = factory
+
+    def proxy(self, name: str) -> "LazyService":
+        """Stand-in object for module-level globals that resolves the service on first attribute access"""
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        """Return the service, importing its module and running its factory if needed"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            self._load_env()
+            if name not in self._factories and name in SERVICE_MODULES:
+                timed_import(SERVICE_MODULES[name])
+            factory = self._factories.get(name)
+            if factory is None:
+                raise KeyError(f"Unknown service: {name}")
+            start = time.perf_counter()
+            instance = factory()
+            self.init_timings[name] = (time.perf_counter() - start) * 1000
+            self._instances[name] = instance
+            return instance
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, float]:
+        """Build the given services (default: SERVICE_WARMUP) ahead of traffic; returns init ms per service"""
+        names = SERVICE_CONTAINER_CONFIG["warmup"] if names is None else names
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️ Warm-up failed for {name}: {e}")
+        return {name: self.init_timings.get(name, 0.0) for name in names}
+
+    def report(self) -> Dict[str, Any]:
+        """Per-module import and per-service init timings in milliseconds"""
+        return {
+            "imports_ms": {k: round(v, 2) for k, v in self.import_timings.items()},
+            "services": {
+                name: {
+                    "initialized": name in self._instances,
+                    "init_ms": round(self.init_timings[name], 2) if name in self.init_timings else None,
+                }
+                for name in sorted(set(SERVICE_MODULES) | set(self._factories))
+            },
+        }
+
+    def _load_env(self) -> None:
+        """Load .env once, before the first service reads its environment variables"""
+        if self._env_loaded:
+            return
+        self._env_loaded = True
+        try:
+            timed_import("dotenv").load_dotenv()
+        except ImportError:
+            pass
+
+
+class LazyService:
+    """Forwards attribute access to a container service, creating it on first use"""
+
+    __slots__ = ("_container", "_name")
+
+    def __init__(self, container: ServiceContainer, name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._container.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._container.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._container.is_initialized(self._name) else "lazy"
+        return f"<LazyService {self._name} ({state})>"
+
+
+def timed_import(module_name: str):
+    """Import a module, recording how long the first import took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    container.import_timings[module_name] = (time.perf_counter() - start) * 1000
+    return module
+
+
+# Global instance
+container = ServiceContainer()
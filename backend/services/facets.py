@@ -0,0 +1,67 @@
+"""Facet counts (location, bedrooms, price histogram, amenities) computed in one pass over a result set"""
+from bisect import bisect_right
+from collections import Counter
+from itertools import chain, repeat
+from typing import Any, Dict, List
+from config import FACET_CONFIG
+
+
+def price_edges(prices: List[float], buckets: int) -> List[float]:
+    """Bucket boundaries over the catalog price range, rounded to a readable step
+
+    The step is sized for the 99th percentile so a few luxury listings do not squash everything
+    into the first bucket; the last bucket stretches to the maximum price.
+    """
+    if not prices:
+        return []
+    ordered = sorted(prices)
+    low, high = ordered[0], ordered[-1]
+    typical_high = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    if typical_high <= low:
+        return [low, high + 1]
+    raw_step = (typical_high - low) / buckets
+    magnitude = 10 ** (len(str(int(raw_step))) - 1)
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    edges = [(low // step) * step]
+    while edges[-1] <= typical_high:
+        edges.append(edges[-1] + step)
+    if edges[-1] <= high:
+        edges[-1] = high + 1
+    return edges
+
+
+def _bedroom_label(bedrooms: Any) -> str:
+    cap = FACET_CONFIG["max_bedroom_bucket"]
+    if not isinstance(bedrooms, int):
+        return "unknown"
+    return f"{cap}+" if bedrooms >= cap else str(bedrooms)
+
+
+def compute_facets(properties: List[Dict], edges: List[float]) -> Dict[str, Any]:
+    """Count every facet over the result set; price buckets use the given edges
+
+    Each facet is one column extraction followed by a C-level Counter/bisect pass, which is
+    several times faster than updating four counters per row in Python.
+    """
+    locations = Counter([p.get('location') or "unknown" for p in properties])
+    raw_bedrooms = Counter([p.get('bedrooms') for p in properties])
+    amenities = Counter(chain.from_iterable([p.get('amenities') or () for p in properties]))
+    prices = [price for price in [p.get('price') for p in properties] if isinstance(price, (int, float))]
+    buckets = Counter(map(bisect_right, repeat(edges), prices))
+
+    bedrooms: Counter = Counter()
+    for value, count in raw_bedrooms.items():
+        bedrooms[_bedroom_label(value)] += count
+
+    top = FACET_CONFIG["max_values"]
+    bedroom_order = sorted(bedrooms, key=lambda label: (label == "unknown", int(label.rstrip("+")) if label != "unknown" else 0))
+    return {
+        "locations": dict(locations.most_common(top)),
+        "bedrooms": {label: bedrooms[label] for label in bedroom_order},
+        # bisect_right returns i + 1 for edges[i] <= price < edges[i + 1]
+        "price": [
+            {"min": float(edges[i]), "max": float(edges[i + 1]), "count": buckets.get(i + 1, 0)}
+            for i in range(len(edges) - 1)
+        ],
+        "amenities": dict(amenities.most_common(top)),
+    }
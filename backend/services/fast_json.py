@@ -0,0 +1,30 @@
+"""orjson-backed JSON rendering with a stdlib fallback"""
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+# Optional orjson (several times faster than json.dumps, emits bytes directly)
+_orjson_available = False
+try:
+    import orjson
+    _orjson_available = True
+except ImportError:
+    pass
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain Python data (dicts, lists, str, numbers, None) to compact UTF-8 JSON"""
+    if _orjson_available:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when installed
+
+    Returning one from a route also skips response_model validation, so it is reserved for
+    payloads built from trusted internal data in the response_model's exact shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,153 @@
+"""Offline geocoding and a grid-based spatial index for radius and bounding-box search"""
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import GEO_CONFIG
+
+EARTH_RADIUS_KM = 6371.0088
+
+# City centroids (lat, lon) keyed by the "City, ST" form used in the catalog
+CITY_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "new york, ny": (40.7128, -74.0060),
+    "los angeles, ca": (34.0522, -118.2437),
+    "chicago, il": (41.8781, -87.6298),
+    "houston, tx": (29.7604, -95.3698),
+    "phoenix, az": (33.4484, -112.0740),
+    "philadelphia, pa": (39.9526, -75.1652),
+    "san antonio, tx": (29.4241, -98.4936),
+    "san diego, ca": (32.7157, -117.1611),
+    "dallas, tx": (32.7767, -96.7970),
+    "austin, tx": (30.2672, -97.7431),
+    "san jose, ca": (37.3382, -121.8863),
+    "san francisco, ca": (37.7749, -122.4194),
+    "oakland, ca": (37.8044, -122.2712),
+    "sacramento, ca": (38.5816, -121.4944),
+    "seattle, wa": (47.6062, -122.3321),
+    "portland, or": (45.5152, -122.6784),
+    "denver, co": (39.7392, -104.9903),
+    "boston, ma": (42.3601, -71.0589),
+    "miami, fl": (25.7617, -80.1918),
+    "orlando, fl": (28.5383, -81.3792),
+    "tampa, fl": (27.9506, -82.4572),
+    "atlanta, ga": (33.7490, -84.3880),
+    "nashville, tn": (36.1627, -86.7816),
+    "charlotte, nc": (35.2271, -80.8431),
+    "raleigh, nc": (35.7796, -78.6382),
+    "washington, dc": (38.9072, -77.0369),
+    "baltimore, md": (39.2904, -76.6122),
+    "las vegas, nv": (36.1699, -115.1398),
+    "salt lake city, ut": (40.7608, -111.8910),
+    "minneapolis, mn": (44.9778, -93.2650),
+    "detroit, mi": (42.3314, -83.0458),
+    "columbus, oh": (39.9612, -82.9988),
+    "indianapolis, in": (39.7684, -86.1581),
+    "kansas city, mo": (39.0997, -94.5786),
+    "st. louis, mo": (38.6270, -90.1994),
+    "pittsburgh, pa": (40.4406, -79.9959),
+    "new orleans, la": (29.9511, -90.0715),
+}
+
+# Same table keyed by city name alone, for locations without a state
+_CITY_ONLY = {key.split(",")[0]: coords for key, coords in CITY_COORDINATES.items()}
+
+
+def geocode(location: str) -> Optional[Tuple[float, float]]:
+    """City centroid for a free-text location such as "San Francisco, CA" or "Seattle" """
+    key = " ".join(str(location).lower().split())
+    return CITY_COORDINATES.get(key) or _CITY_ONLY.get(key.split(",")[0].strip())
+
+
+def property_coordinates(prop: Dict) -> Optional[Tuple[float, float, bool]]:
+    """(lat, lon, approximate) for a listing: its own coordinates, else its city centroid
+
+    approximate is True for centroids; every listing of that city then shares one point, so
+    radius and distance queries only have city-level resolution for them.
+    """
+    if prop.get("latitude") is not None and prop.get("longitude") is not None:
+        return float(prop["latitude"]), float(prop["longitude"]), False
+    centroid = geocode(prop.get("location", ""))
+    if centroid is None:
+        return None
+    return centroid[0], centroid[1], True
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bounds(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) enclosing a circle"""
+    dlat = radius_km / 111.32
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlon = min(180.0, radius_km / (111.32 * cos_lat))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def in_bounds(lat: float, lon: float, bounds: Tuple[float, float, float, float]) -> bool:
+    min_lat, min_lon, max_lat, max_lon = bounds
+    return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+
+class GeoIndex:
+    """Uniform lat/lon grid mapping cells to catalog positions
+
+    A query only visits the cells overlapping its bounding box, so its cost follows the number of
+    nearby listings rather than the catalog size.
+    """
+
+    def __init__(self, cell_degrees: Optional[float] = None):
+        self.cell = cell_degrees or GEO_CONFIG["cell_degrees"]
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._points: List[Optional[Tuple[float, float]]] = []
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+
+    def build(self, points: Iterable[Optional[Tuple[float, float]]]) -> "GeoIndex":
+        """Index points by position; None entries (not geocoded) are skipped"""
+        self._cells = {}
+        self._points = list(points)
+        for position, point in enumerate(self._points):
+            if point is not None:
+                self._cells.setdefault(self._cell_of(*point), []).append(position)
+        return self
+
+    def point(self, position: int) -> Optional[Tuple[float, float]]:
+        return self._points[position]
+
+    def query_bounds(self, bounds: Tuple[float, float, float, float]) -> List[int]:
+        """Sorted positions of the points inside the box"""
+        min_lat, min_lon, max_lat, max_lon = bounds
+        low_row, low_col = self._cell_of(min_lat, min_lon)
+        high_row, high_col = self._cell_of(max_lat, max_lon)
+        found = []
+        if (high_row - low_row + 1) * (high_col - low_col + 1) > len(self._cells):
+            # Huge box: walking the occupied cells is cheaper than the empty ones
+            cells = [
+                positions for (row, col), positions in self._cells.items()
+                if low_row <= row <= high_row and low_col <= col <= high_col
+            ]
+        else:
+            cells = [
+                self._cells.get((row, col), ())
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+            ]
+        for positions in cells:
+            for position in positions:
+                if in_bounds(*self._points[position], bounds):
+                    found.append(position)
+        found.sort()
+        return found
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[int]:
+        """Sorted positions of the points within radius_km of (lat, lon)"""
+        return [
+            position for position in self.query_bounds(radius_bounds(lat, lon, radius_km))
+            if haversine_km(lat, lon, *self._points[position]) <= radius_km
+        ]
@@ -0,0 +1,108 @@
+"""Bounded in-memory chat history store (fallback when MongoDB is not available)"""
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+from config import CHAT_HISTORY_CONFIG
+
+
+def encode_cursor(timestamp: str, tiebreak: object) -> str:
+    """Page cursor: the oldest returned message's timestamp plus a store-specific tiebreaker"""
+    return f"{timestamp}|{tiebreak}"
+
+
+def decode_cursor(before: str) -> Tuple[str, Optional[str]]:
+    """(timestamp, tiebreak) from a cursor; a bare timestamp (older clients) has no tiebreak"""
+    timestamp, separator, tiebreak = before.rpartition("|")
+    if not separator:
+        return before, None
+    return timestamp, tiebreak
+
+
+def paginate_messages(
+    entries: List[Tuple[int, dict]],
+    before: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Newest `limit` messages older than `before` (ascending) and the cursor for the next page
+
+    entries are (sequence, message) pairs in insertion order; the sequence breaks timestamp ties,
+    so messages sharing the boundary timestamp are neither skipped nor repeated.
+    """
+    limit = clamp_page_size(limit)
+    if before:
+        timestamp, tiebreak = decode_cursor(before)
+        sequence = int(tiebreak) if tiebreak and tiebreak.isdigit() else None
+        entries = [
+            (seq, m) for seq, m in entries
+            if m.get("timestamp", "") < timestamp
+            or (sequence is not None and m.get("timestamp", "") == timestamp and seq < sequence)
+        ]
+    page = entries[-limit:]
+    has_more = len(entries) > len(page)
+    next_before = encode_cursor(page[0][1].get("timestamp", ""), page[0][0]) if has_more and page else None
+    return [m for _, m in page], next_before
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Apply the default (no limit requested) and maximum page sizes"""
+    if limit is None:
+        return CHAT_HISTORY_CONFIG["default_page_size"]
+    return max(1, min(limit, CHAT_HISTORY_CONFIG["max_page_size"]))
+
+
+class BoundedHistoryStore:
+    """Per-user ring buffers with global LRU eviction of the least recently active users"""
+
+    def __init__(self, max_messages_per_user: Optional[int] = None, max_users: Optional[int] = None):
+        self.max_messages_per_user = max_messages_per_user or CHAT_HISTORY_CONFIG["memory_max_messages_per_user"]
+        self.max_users = max_users or CHAT_HISTORY_CONFIG["memory_max_users"]
+        # Each message is stored with a store-wide sequence number used as the page-cursor tiebreaker
+        self._users: "OrderedDict[str, Deque[Tuple[int, dict]]]" = OrderedDict()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def append(self, user_id: str, message: dict) -> None:
+        """Append a message, evicting the oldest message or least recently used user as needed"""
+        with self._lock:
+            history = self._users.get(user_id)
+            if history is None:
+                history = deque(maxlen=self.max_messages_per_user)
+                self._users[user_id] = history
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+            self._sequence += 1
+            history.append((self._sequence, message))
+
+    def get(self, user_id: str) -> List[dict]:
+        """All retained messages for a user, oldest first"""
+        return [message for _, message in self._entries(user_id)]
+
+    def _entries(self, user_id: str) -> List[Tuple[int, dict]]:
+        with self._lock:
+            history = self._users.get(user_id)
+            if history is None:
+                return []
+            self._users.move_to_end(user_id)
+            return list(history)
+
+    def get_page(
+        self,
+        user_id: str,
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """A page of messages older than `before`, plus the cursor for the next page"""
+        return paginate_messages(self._entries(user_id), before, limit)
+
+    def clear(self, user_id: str) -> bool:
+        """Drop a user's history"""
+        with self._lock:
+            return self._users.pop(user_id, None) is not None
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
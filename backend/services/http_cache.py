@@ -0,0 +1,155 @@
+"""Conditional GET (ETag / If-None-Match) and negotiated, precompressed bodies for hot responses"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from fastapi import Request, Response
+from config import HTTP_CACHE_CONFIG
+from services.metrics import metrics
+
+# Optional brotli support; gzip is always available
+_brotli_available = False
+try:
+    import brotli
+    _brotli_available = True
+except ImportError:
+    pass
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag from version parts (catalog fingerprint, user id, saved ids...)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored, "*" matches anything"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred content coding from Accept-Encoding: "br", "gzip" or None (identity)"""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[coding.strip()] = q
+    supported = ["br", "gzip"] if _brotli_available else ["gzip"]
+    candidates = [(offered.get(coding, offered.get("*", 0.0)), coding) for coding in supported]
+    q, coding = max(candidates, key=lambda item: (item[0], item[1] == "br"))
+    return coding if q > 0 else None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=HTTP_CACHE_CONFIG["brotli_quality"])
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=HTTP_CACHE_CONFIG["gzip_level"], mtime=0)
+    return body
+
+
+class EncodedBodyCache:
+    """LRU of encoded response bodies keyed by (ETag, content coding), bounded by total bytes"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or HTTP_CACHE_CONFIG["max_bytes"]
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str, encoding: Optional[str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get((etag, encoding))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((etag, encoding))
+            self.hits += 1
+            return body
+
+    def set(self, etag: str, encoding: Optional[str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((etag, encoding), None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[(etag, encoding)] = body
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    build_body: Callable[[], bytes],
+    media_type: str = "application/json"
+) -> Response:
+    """304 when If-None-Match matches, otherwise the (cached, compressed) body with its ETag
+
+    build_body is only called on a body cache miss, so a revalidation never serializes anything.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": HTTP_CACHE_CONFIG["cache_control"],
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    body = encoded_bodies.get(etag, encoding)
+    if body is None:
+        # Reuse the serialized body when only another coding is cached
+        raw = encoded_bodies.get(etag, None) if encoding else None
+        if raw is None:
+            raw = build_body()
+            encoded_bodies.set(etag, None, raw)
+        if encoding and len(raw) >= HTTP_CACHE_CONFIG["min_compress_bytes"]:
+            body = compress(raw, encoding)
+            encoded_bodies.set(etag, encoding, body)
+        else:
+            body, encoding = raw, None
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+# Global instance
+encoded_bodies = EncodedBodyCache()
+metrics.register_cache("encoded_bodies", encoded_bodies.stats)
@@ -0,0 +1,170 @@
+"""Pluggable LLM backends: OpenAI, local OpenAI-compatible server, in-process model"""
+import os
+from typing import Any, Dict, List, Optional
+from config import LOCAL_LLM_CONFIG
+
+
+class LLMBackend:
+    """Base interface for chat completion backends"""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """Check whether the backend can serve requests"""
+        return False
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run a chat completion and return {"content": str, "usage": {...}}"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _usage(usage: Any) -> Dict[str, Optional[int]]:
+        """Normalize a provider usage object or dict"""
+        if usage is None:
+            return {"prompt_tokens": None, "completion_tokens": None}
+        get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+        return {"prompt_tokens": get("prompt_tokens"), "completion_tokens": get("completion_tokens")}
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI API via the official SDK"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.client = None
+        try:
+            from openai import OpenAI
+        except ImportError as e:
+            print(f"⚠️ OpenAI library not available: {e}")
+            return
+
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("⚠️ OpenAI API key not found. OpenAI backend disabled.")
+            return
+
+        try:
+            # Retries are handled by llm_resilience
+            self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        except Exception as e:
+            print(f"⚠️ Failed to initialize OpenAI client: {e}")
+            self.client = None
+
+    def is_available(self) -> bool:
+        return self.client is not None
+
+    def complete(self, messages, model, temperature, max_tokens, timeout=None):
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        return {
+            "content": response.choices[0].message.content.strip(),
+            "usage": self._usage(getattr(response, "usage", None)),
+        }
+
+
+class LocalHTTPBackend(LLMBackend):
+    """OpenAI-compatible HTTP server on localhost (llama.cpp server, vLLM)"""
+
+    name = "local"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+        self.base_url = (base_url or LOCAL_LLM_CONFIG["base_url"]).rstrip("/")
+        self.api_key = api_key if api_key is not None else LOCAL_LLM_CONFIG["api_key"]
+        self.client = None
+        try:
+            import httpx
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self.client = httpx.Client(base_url=self.base_url, headers=headers)
+        except ImportError as e:
+            print(f"⚠️ httpx not available, local LLM backend disabled: {e}")
+
+    def is_available(self) -> bool:
+        return self.client is not None
+
+    def complete(self, messages, model, temperature, max_tokens, timeout=None):
+        response = self.client.post(
+            "/chat/completions",
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            timeout=timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "content": data["choices"][0]["message"]["content"].strip(),
+            "usage": self._usage(data.get("usage")),
+        }
+
+
+class InProcessBackend(LLMBackend):
+    """Small GGUF model loaded in-process with llama-cpp-python (optional dependency)"""
+
+    name = "in_process"
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or LOCAL_LLM_CONFIG["model_path"]
+        self.model = None
+        if not self.model_path:
+            print("⚠️ LOCAL_LLM_MODEL_PATH not set. In-process LLM backend disabled.")
+            return
+        try:
+            from llama_cpp import Llama
+            self.model = Llama(
+                model_path=self.model_path,
+                n_ctx=LOCAL_LLM_CONFIG["context_size"],
+                n_threads=LOCAL_LLM_CONFIG["threads"],
+                verbose=False
+            )
+        except ImportError as e:
+            print(f"⚠️ llama-cpp-python not available, in-process LLM backend disabled: {e}")
+        except Exception as e:
+            print(f"⚠️ Failed to load in-process LLM model: {e}")
+            self.model = None
+
+    def is_available(self) -> bool:
+        return self.model is not None
+
+    def complete(self, messages, model, temperature, max_tokens, timeout=None):
+        # llama.cpp generation cannot be interrupted, so the timeout is not applied here
+        data = self.model.create_chat_completion(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return {
+            "content": data["choices"][0]["message"]["content"].strip(),
+            "usage": self._usage(data.get("usage")),
+        }
+
+
+BACKEND_FACTORIES = {
+    "openai": OpenAIBackend,
+    "local": LocalHTTPBackend,
+    "in_process": InProcessBackend,
+}
+
+
+def create_backend(name: str) -> Optional[LLMBackend]:
+    """Instantiate a backend by name, or None if the name is unknown"""
+    factory = BACKEND_FACTORIES.get(name)
+    if factory is None:
+        print(f"⚠️ Unknown LLM backend: {name}")
+        return None
+    return factory()
@@ -0,0 +1,152 @@
+"""Resilience layer for LLM calls: concurrency limit, deadlines, retries and circuit breaker"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, TypeVar
+from config import LLM_RESILIENCE_CONFIG, LLM_STAGE_DEADLINES
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(Exception):
+    """Raised when an LLM call is rejected without reaching the provider"""
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker that counts errors and slow calls as failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int,
+        min_calls: int,
+        failure_ratio: float,
+        slow_call_seconds: float,
+        cooldown: float
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may proceed; admits a single probe once the cool-down has passed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot that was admitted but never reached the provider"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, success: bool, duration: float) -> None:
+        """Record a call outcome and trip or reset the breaker accordingly"""
+        failed = not success or duration >= self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls:
+                ratio = sum(self._outcomes) / len(self._outcomes)
+                if ratio >= self.failure_ratio:
+                    self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        print(f"⚠️ LLM circuit breaker opened for {self.cooldown:.0f}s, using local fallbacks")
+
+
+class LLMResilience:
+    """Wraps provider calls with a global semaphore, per-stage deadlines, jittered retries and a breaker"""
+
+    def __init__(self, config: Optional[Dict] = None, deadlines: Optional[Dict[str, float]] = None):
+        self.config = {**LLM_RESILIENCE_CONFIG, **(config or {})}
+        self.deadlines = {**LLM_STAGE_DEADLINES, **(deadlines or {})}
+        self._semaphore = threading.BoundedSemaphore(self.config["max_concurrency"])
+        self.breaker = CircuitBreaker(
+            window=self.config["breaker_window"],
+            min_calls=self.config["breaker_min_calls"],
+            failure_ratio=self.config["breaker_failure_ratio"],
+            slow_call_seconds=self.config["breaker_slow_call_seconds"],
+            cooldown=self.config["breaker_cooldown"],
+        )
+
+    def is_open(self) -> bool:
+        """True while the breaker is rejecting calls"""
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    def call(self, stage: str, func: Callable[[float], T]) -> T:
+        """Run func(timeout) for a stage, retrying transient failures within the stage deadline"""
+        if not self.breaker.allow():
+            raise LLMUnavailableError(f"circuit open, skipping {stage}")
+
+        deadline = time.monotonic() + self.deadlines.get(stage, 5.0)
+        queue_timeout = min(self.config["queue_timeout"], max(deadline - time.monotonic(), 0))
+        if not self._semaphore.acquire(timeout=queue_timeout):
+            # The call never ran, so it says nothing about the provider; free a half-open probe
+            self.breaker.release_probe()
+            raise LLMUnavailableError(f"LLM concurrency limit reached, skipping {stage}")
+
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.breaker.record(False, self.deadlines.get(stage, 5.0))
+                    raise TimeoutError(f"{stage} exceeded its deadline")
+
+                started = time.monotonic()
+                try:
+                    result = func(remaining)
+                except Exception:
+                    self.breaker.record(False, time.monotonic() - started)
+                    attempt += 1
+                    if attempt > self.config["max_retries"] or self.is_open():
+                        raise
+                    delay = self._backoff(attempt)
+                    if time.monotonic() + delay >= deadline:
+                        raise
+                    time.sleep(delay)
+                    continue
+
+                self.breaker.record(True, time.monotonic() - started)
+                return result
+        finally:
+            self._semaphore.release()
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(self.config["backoff_max"], self.config["backoff_base"] * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+# Global instance shared by all LLM calls in the process
+llm_resilience = LLMResilience()
@@ -1,85 +1,144 @@
 """LLM service for natural language processing"""
-import os
 import json
-from typing import Dict, Optional, Any
-from dotenv import load_dotenv
+import threading
+import time
+from typing import Dict, List, Optional, Any
+from config import LLM_CALL_ROUTES
+from services.llm_backends import LLMBackend, create_backend
+from services.response_templates import response_template_engine, classify_intent, should_use_llm
+from services.llm_resilience import llm_resilience, LLMUnavailableError
+from services.singleflight import SingleFlight, canonical_preferences, normalize_message
+from services.prompt_builder import prompt_builder, count_tokens, count_message_tokens
+from services.container import container
+from services.metrics import metrics, LLM_LATENCY
+from services.tracing import tracer
 
-load_dotenv()
-
-# Lazy import OpenAI to avoid import errors
-_openai_available = False
-try:
-    from openai import OpenAI
-    _openai_available = True
-except ImportError as e:
-    print(f"⚠️ OpenAI library not available: {e}")
 
 class LLMService:
     """Service for LLM-based intent detection and response generation"""
     
-    def __init__(self):
-        self.client = None
+    def __init__(self, routes: Optional[Dict[str, Dict[str, str]]] = None):
+        self.routes = routes or LLM_CALL_ROUTES
+        self.backends: Dict[str, LLMBackend] = {}
         self.enabled = False
         self._initialized = False
+        # Coalesces identical concurrent LLM calls into one provider request
+        self._flight = SingleFlight("llm")
+        # Prompt/completion token counts per call type
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+        self._usage_lock = threading.Lock()
+        metrics.register_collector(self._token_metric_lines)
     
     def _ensure_initialized(self):
-        """Lazy initialization - only initialize when first needed"""
+        """Lazy initialization - only create the backends referenced by the call routes"""
         if self._initialized:
             return
         
         self._initialized = True
         
-        if not _openai_available:
-            print("⚠️ OpenAI library not available. LLM features disabled.")
-            return
+        for name in {route["backend"] for route in self.routes.values()}:
+            backend = create_backend(name)
+            if backend is not None and backend.is_available():
+                self.backends[name] = backend
         
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
+        self.enabled = bool(self.backends)
+        if not self.enabled:
+            print("⚠️ No LLM backend available. LLM features disabled.")
+    
+    def warm_up(self) -> bool:
+        """Construct the configured backends ahead of the first call; returns whether LLM is enabled"""
+        self._ensure_initialized()
+        return self.enabled
+    
+    def _backend_for(self, stage: str) -> Optional[LLMBackend]:
+        """Backend configured for a call type, if it initialized successfully"""
+        self._ensure_initialized()
+        return self.backends.get(self.routes[stage]["backend"])
+    
+    def _model_for(self, stage: str) -> str:
+        return self.routes[stage]["model"]
+    
+    def _complete(
+        self,
+        stage: str,
+        messages: List[Dict[str, str]],
+        temperature: float
+    ) -> str:
+        """Run a chat completion for a call type on its configured backend and model"""
+        backend = self._backend_for(stage)
+        if backend is None:
+            raise LLMUnavailableError(f"no backend available for {stage}")
+        model = self._model_for(stage)
+        with tracer.start_as_current_span(f"llm.{stage}") as span:
+            span.set_attributes({"llm.backend": backend.name, "llm.model": model})
+            start = time.perf_counter()
+            outcome = "error"
             try:
-                # Initialize OpenAI client with error handling
-                self.client = OpenAI(api_key=api_key)
-                self.enabled = True
-            except Exception as e:
-                print(f"⚠️ Failed to initialize OpenAI client: {e}")
-                self.client = None
-                self.enabled = False
-        else:
-            self.client = None
-            self.enabled = False
-            print("⚠️ OpenAI API key not found. LLM features disabled.")
+                result = llm_resilience.call(
+                    stage,
+                    lambda timeout: backend.complete(
+                        messages,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=prompt_builder.max_completion_tokens(stage),
+                        timeout=timeout
+                    )
+                )
+                outcome = "ok"
+            finally:
+                LLM_LATENCY.observe(time.perf_counter() - start, stage, outcome)
+            # Prefer provider-reported usage, fall back to the local tokenizer
+            usage = result.get("usage") or {}
+            prompt_tokens = usage.get("prompt_tokens") or count_message_tokens(messages, model)
+            completion_tokens = usage.get("completion_tokens") or count_tokens(result["content"], model)
+            span.set_attributes({"llm.prompt_tokens": prompt_tokens, "llm.completion_tokens": completion_tokens})
+            self._record_usage(stage, prompt_tokens, completion_tokens)
+            return result["content"]
+    
+    def _record_usage(self, stage: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._usage_lock:
+            stats = self.token_usage.setdefault(
+                stage, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["last_prompt_tokens"] = prompt_tokens
+            stats["last_completion_tokens"] = completion_tokens
+    
+    def _token_metric_lines(self) -> List[str]:
+        """Token counters per call type for /metrics"""
+        lines = ["# HELP app_llm_tokens_total LLM tokens by call type", "# TYPE app_llm_tokens_total counter"]
+        for stage, stats in sorted(self.get_token_usage().items()):
+            lines.append(f'app_llm_tokens_total{{stage="{stage}",kind="prompt"}} {stats["prompt_tokens"]}')
+            lines.append(f'app_llm_tokens_total{{stage="{stage}",kind="completion"}} {stats["completion_tokens"]}')
+        return lines
+    
+    def get_token_usage(self) -> Dict[str, Dict[str, int]]:
+        """Cumulative prompt and completion token counts per call type"""
+        with self._usage_lock:
+            return {stage: dict(stats) for stage, stats in self.token_usage.items()}
     
     def extract_preferences(self, user_message: str) -> Dict[str, Any]:
         """Use LLM to extract property search preferences from user message"""
-        self._ensure_initialized()
-        if not self.enabled:
+        if self._backend_for("extract_preferences") is None:
             return {}
         
+        key = ("extract_preferences", normalize_message(user_message))
+        return dict(self._flight.do(key, lambda: self._extract_preferences(user_message)))
+    
+    def _extract_preferences(self, user_message: str) -> Dict[str, Any]:
+        """Run the preference extraction LLM call"""
         try:
-            prompt = f"""Extract property search preferences from this user message. Return ONLY a valid JSON object with these fields:
-- location: string or null (city name if mentioned)
-- max_price: number or null (maximum budget if mentioned)
-- min_price: number or null (minimum budget if mentioned)
-- bedrooms: number or null (number of bedrooms if mentioned)
-- bathrooms: number or null (number of bathrooms if mentioned)
-- amenities: array of strings or null (amenities like pool, garage, gym, etc.)
-- sort_by: string or null ("price_asc" for cheapest/lowest, "price_desc" for most expensive/highest, or null)
-- property_name: string or null (specific property title/name if user is asking about a particular property, e.g., "Penthouse with Panoramic Views", "Luxury Condo", etc.)
-
-User message: "{user_message}"
-
-Return ONLY the JSON object, no other text:"""
-
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts property search preferences. Always return valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=200
+            content = self._complete(
+                "extract_preferences",
+                prompt_builder.extraction_messages(
+                    "extract_preferences", user_message, self._model_for("extract_preferences")
+                ),
+                temperature=0.3
             )
             
-            content = response.choices[0].message.content.strip()
+            content = content.strip()
             # Remove markdown code blocks if present
             if content.startswith("```"):
                 content = content.split("```")[1]
@@ -96,38 +155,24 @@ Return ONLY the JSON object, no other text:"""
     
     def extract_property_name(self, user_message: str) -> Optional[str]:
         """Use LLM to extract specific property name/title from user message"""
-        self._ensure_initialized()
-        if not self.enabled:
+        if self._backend_for("extract_property_name") is None:
             return None
         
+        key = ("extract_property_name", normalize_message(user_message))
+        return self._flight.do(key, lambda: self._extract_property_name(user_message))
+    
+    def _extract_property_name(self, user_message: str) -> Optional[str]:
+        """Run the property name extraction LLM call"""
         try:
-            prompt = f"""Extract the specific property name or title that the user is asking about from this message. 
-If the user is asking about a specific property (e.g., "show me Luxury Condo", "details of Penthouse with Panoramic Views", "I want more info about Modern Family Home"), 
-return ONLY the property name/title as a string. 
-If no specific property is mentioned, return null.
-
-Examples:
-- "show me Luxury Condo" -> "Luxury Condo"
-- "yes i want more details of Penthouse with Panoramic Views" -> "Penthouse with Panoramic Views"
-- "tell me about Modern Family Home" -> "Modern Family Home"
-- "show me properties under 500k" -> null
-- "find 3 bedroom houses" -> null
-
-User message: "{user_message}"
-
-Return ONLY the property name as a string, or null if no specific property is mentioned. No other text:"""
-
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts property names from user messages. Return only the property name or null."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=50
+            content = self._complete(
+                "extract_property_name",
+                prompt_builder.extraction_messages(
+                    "extract_property_name", user_message, self._model_for("extract_property_name")
+                ),
+                temperature=0.3
             )
             
-            content = response.choices[0].message.content.strip().strip('"').strip("'")
+            content = content.strip().strip('"').strip("'")
             
             # Check if it's null or empty
             if content.lower() in ["null", "none", ""]:
@@ -143,67 +188,64 @@ Return ONLY the property name as a string, or null if no specific property is me
         self,
         user_message: str,
         properties: list,
-        preferences: Dict[str, Any]
+        preferences: Dict[str, Any],
+        intent: Optional[str] = None
     ) -> str:
-        """Use LLM to generate a natural, conversational response"""
-        self._ensure_initialized()
-        if not self.enabled:
-            return self._fallback_response(properties, preferences)
+        """Generate a conversational response, calling the LLM only when the intent policy requires it"""
+        intent = intent or classify_intent(properties, preferences)
+        if not should_use_llm(intent):
+            return self._fallback_response(properties, preferences, intent)
+        
+        if self._backend_for("generate_response") is None:
+            return self._fallback_response(properties, preferences, intent)
         
+        key = (
+            "generate_response",
+            normalize_message(user_message),
+            intent,
+            tuple(prop.get('id') for prop in properties),
+            # The answer quotes the user's constraints, so they are part of the identity
+            canonical_preferences(preferences),
+        )
+        return self._flight.do(
+            key, lambda: self._generate_response(user_message, properties, preferences, intent)
+        )
+    
+    def _generate_response(
+        self,
+        user_message: str,
+        properties: list,
+        preferences: Dict[str, Any],
+        intent: str
+    ) -> str:
+        """Run the response generation LLM call"""
         try:
-            # Prepare property summary for LLM
-            property_summary = []
-            for prop in properties[:5]:
-                prop_info = f"- {prop.get('title', 'Property')} in {prop.get('location', 'Unknown')}: ${prop.get('price', 0):,.0f}, {prop.get('bedrooms', 0)} bed, {prop.get('bathrooms', 0)} bath"
-                property_summary.append(prop_info)
-            
-            properties_text = "\n".join(property_summary) if property_summary else "No properties found."
-            
-            prompt = f"""You are a friendly real estate assistant chatbot. Generate a natural, conversational response to the user.
-
-User's query: "{user_message}"
-
-User's preferences detected: {json.dumps(preferences, indent=2)}
-
-Properties found ({len(properties)}):
-{properties_text}
-
-Generate a friendly, helpful response that:
-1. Acknowledges what the user is looking for
-2. Mentions the properties found (if any)
-3. Provides helpful information about prices, locations, or features
-4. Is conversational and natural, like talking to a helpful agent
-5. Keep it concise (2-3 sentences max)
-
-Response:"""
-
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a friendly, helpful real estate assistant. Be conversational and natural."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300
+            content = self._complete(
+                "generate_response",
+                prompt_builder.response_messages(
+                    user_message, properties, preferences, self._model_for("generate_response")
+                ),
+                temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
         except Exception as e:
             print(f"⚠️ LLM response generation error: {e}")
-            return self._fallback_response(properties, preferences)
+            return self._fallback_response(properties, preferences, intent)
     
-    def _fallback_response(self, properties: list, preferences: Dict[str, Any]) -> str:
-        """Fallback response when LLM is not available"""
-        if not properties:
-            return "I couldn't find properties matching your criteria. Try adjusting your search parameters."
-        
-        count = len(properties)
-        cheapest = min(properties, key=lambda x: x.get('price', float('inf')))
-        
-        return f"I found {count} properties for you. The most affordable option is {cheapest.get('title', 'a property')} at ${cheapest.get('price', 0):,.0f}."
+    def _fallback_response(
+        self,
+        properties: list,
+        preferences: Dict[str, Any],
+        intent: Optional[str] = None
+    ) -> str:
+        """Template response used when the LLM is skipped or not available"""
+        return response_template_engine.render(properties, preferences, intent)
+
 
+container.register("llm_service", LLMService)
 
-# Global instance - lazy initialization prevents import-time errors
-llm_service = LLMService()
+# Global instance - created on first use; backends are initialized on the first LLM call
+llm_service = container.proxy("llm_service")
 
@@ -0,0 +1,241 @@
+"""In-process metrics (latency histograms, counters, cache stats) in the Prometheus text format"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+from config import METRICS_CONFIG
+
+# Latency buckets in seconds, from sub-millisecond phases up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Timer:
+    """Context manager that observes its elapsed time into a histogram"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not METRICS_CONFIG["enabled"]:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> _Timer:
+        """`with histogram.time("label"):` observes the block's duration"""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not METRICS_CONFIG["enabled"]:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """Holds metrics plus collectors that read existing stats (caches, token usage) at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._caches: Dict[str, Callable[[], dict]] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name: str, stats: Callable[[], dict]) -> None:
+        """Expose a cache's stats() hits/misses as counters and its hit ratio as a gauge"""
+        self._caches[name] = stats
+
+    def register_collector(self, collect: Callable[[], List[str]]) -> None:
+        """Add a callback returning ready-made exposition lines"""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        lines.extend(self._render_caches())
+        for collect in self._collectors:
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                print(f"⚠️ Metrics collector error: {e}")
+        return "\n".join(lines) + "\n"
+
+    def _render_caches(self) -> List[str]:
+        if not self._caches:
+            return []
+        hits, misses, ratios = [], [], []
+        for name, stats in sorted(self._caches.items()):
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"⚠️ Metrics cache stats error for {name}: {e}")
+                continue
+            hits.append(f'app_cache_hits_total{{cache="{name}"}} {values.get("hits", 0)}')
+            misses.append(f'app_cache_misses_total{{cache="{name}"}} {values.get("misses", 0)}')
+            ratios.append(f'app_cache_hit_ratio{{cache="{name}"}} {values.get("hit_rate", 0.0)}')
+        return [
+            "# HELP app_cache_hits_total Cache hits", "# TYPE app_cache_hits_total counter", *hits,
+            "# HELP app_cache_misses_total Cache misses", "# TYPE app_cache_misses_total counter", *misses,
+            "# HELP app_cache_hit_ratio Cache hit ratio since start", "# TYPE app_cache_hit_ratio gauge", *ratios,
+        ]
+
+
+def timed(histogram: Histogram, *labels: str):
+    """Decorator observing a sync or async function's duration"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, *labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *labels)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per handler, method and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the scope; label by its name to bound cardinality
+            endpoint = scope.get("endpoint")
+            handler = getattr(endpoint, "__name__", None) or "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - start, scope["method"], handler, status[0])
+
+
+# Global registry and the metrics shared by the services
+metrics = MetricsRegistry()
+
+HTTP_LATENCY = metrics.histogram(
+    "app_http_request_duration_seconds", "HTTP request latency by handler", ("method", "handler", "status")
+)
+STAGE_LATENCY = metrics.histogram(
+    "app_stage_duration_seconds", "Latency of internal pipeline stages", ("stage",)
+)
+ML_LATENCY = metrics.histogram(
+    "app_ml_predict_duration_seconds", "ML price prediction latency", ("mode",)
+)
+LLM_LATENCY = metrics.histogram(
+    "app_llm_call_duration_seconds", "LLM call latency by call type and outcome", ("stage", "outcome")
+)
+MONGODB_LATENCY = metrics.histogram(
+    "app_mongodb_operation_duration_seconds", "MongoDB operation latency", ("client", "operation")
+)
@@ -1,8 +1,11 @@
 """ML model service for price predictions"""
 import pickle
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from pydantic import ValidationError
 from models.schemas import PredictionRequest, PredictionResponse
+from services.container import container
+from services.metrics import timed, ML_LATENCY
 
 
 # Define the class that pickle expects (must be defined before loading)
@@ -104,12 +107,18 @@ class MLModelService:
         """Check if model is loaded and available"""
         return self.model is not None
     
+    @timed(ML_LATENCY, "single")
     def predict(self, request: PredictionRequest) -> float:
         """Predict price from request model"""
         if not self.is_available():
             raise ValueError("Model not loaded")
         
-        # Prepare model input dictionary
+        model_input = self._model_input(request)
+        
+        return self._predict_input(model_input)
+    
+    def _model_input(self, request: PredictionRequest) -> Dict[str, Any]:
+        """Model input dictionary for a validated prediction request"""
         model_input = {
             "property_type": request.property_type,
             "bedrooms": request.bedrooms,
@@ -127,8 +136,10 @@ class MLModelService:
         else:  # Condo
             model_input["building_area"] = request.building_area or 1000
             model_input["lot_area"] = 0
-        
-        # Make prediction
+        return model_input
+    
+    def _predict_input(self, model_input: Dict[str, Any]) -> float:
+        """Run the model on a prepared input dict, falling back to the heuristic price"""
         try:
             result = self.model.predict(model_input)
             
@@ -180,6 +191,72 @@ class MLModelService:
         
         return float(base_price)
     
+    def _property_prediction_request(self, property_data: Dict[str, Any]) -> PredictionRequest:
+        """Validated prediction request for a catalog property (shared by single and batch paths)"""
+        amenities = property_data.get("amenities") or []
+        # Determine property type based on amenities or default to SFH
+        property_type = "SFH" if "garage" in amenities else "Condo"
+        return PredictionRequest(
+            property_type=property_type,
+            lot_area=(property_data.get("size") or 5000) if property_type == "SFH" else 0,
+            building_area=(property_data.get("size") or 1000) if property_type == "Condo" else 0,
+            bedrooms=property_data.get("bedrooms", 2),
+            bathrooms=property_data.get("bathrooms", 1),
+            year_built=2015,  # Default, can be enhanced
+            has_pool="pool" in amenities,
+            has_garage="garage" in amenities,
+            school_rating=7  # Default, can be enhanced
+        )
+    
+    @timed(ML_LATENCY, "batch")
+    def predict_many(self, properties: List[Dict[str, Any]]) -> List[Optional[PredictionResponse]]:
+        """Predict prices for several catalog properties at once (None where a row fails)"""
+        if not self.is_available():
+            raise ValueError("Model not loaded")
+        
+        # Rows that fail validation are skipped in the batch and reported as None
+        inputs: List[Optional[Dict[str, Any]]] = []
+        for prop in properties:
+            try:
+                inputs.append(self._model_input(self._property_prediction_request(prop)))
+            except ValidationError as e:
+                print(f"⚠️ Invalid prediction input for property {prop.get('id')}: {e}")
+                inputs.append(None)
+        valid_inputs = [model_input for model_input in inputs if model_input is not None]
+        
+        # One model call for the whole batch when the model accepts a list of inputs
+        batch_prices: List[Optional[float]] = []
+        try:
+            if valid_inputs:
+                batch = self.model.predict(valid_inputs)
+                if isinstance(batch, (list, tuple)) and len(batch) == len(valid_inputs):
+                    batch_prices = [float(price) if price is not None else None for price in batch]
+        except Exception:
+            batch_prices = []
+        if not batch_prices:
+            batch_prices = [None] * len(valid_inputs)
+        batch_iter = iter(batch_prices)
+        prices = [next(batch_iter) if model_input is not None else None for model_input in inputs]
+        
+        results: List[Optional[PredictionResponse]] = []
+        for prop, model_input, price in zip(properties, inputs, prices):
+            if model_input is None:
+                results.append(None)
+                continue
+            try:
+                if price is None:
+                    price = self._predict_input(model_input)
+                results.append(PredictionResponse(
+                    property_id=prop.get("id"),
+                    listed_price=prop.get("price"),
+                    predicted_price=price,
+                    model_input=model_input
+                ))
+            except Exception as e:
+                print(f"⚠️ Prediction error for property {prop.get('id')}: {e}")
+                results.append(None)
+        return results
+    
     def predict_from_property_data(
         self,
         property_data: Dict[str, Any],
@@ -189,37 +266,9 @@ class MLModelService:
         if not self.is_available():
             raise ValueError("Model not loaded")
         
-        # Determine property type based on amenities or default to SFH
-        property_type = "SFH" if "garage" in property_data.get("amenities", []) else "Condo"
-        
-        # Create prediction request
-        prediction_request = PredictionRequest(
-            property_type=property_type,
-            lot_area=property_data.get("size", 5000) if property_type == "SFH" else 0,
-            building_area=property_data.get("size", 1000) if property_type == "Condo" else 0,
-            bedrooms=property_data.get("bedrooms", 2),
-            bathrooms=property_data.get("bathrooms", 1),
-            year_built=2015,  # Default, can be enhanced
-            has_pool="pool" in property_data.get("amenities", []),
-            has_garage="garage" in property_data.get("amenities", []),
-            school_rating=7  # Default, can be enhanced
-        )
-        
-        # Get prediction
+        prediction_request = self._property_prediction_request(property_data)
         predicted_price = self.predict(prediction_request)
-        
-        # Build model input dict for response
-        model_input = {
-            "property_type": property_type,
-            "lot_area": prediction_request.lot_area,
-            "building_area": prediction_request.building_area,
-            "bedrooms": prediction_request.bedrooms,
-            "bathrooms": prediction_request.bathrooms,
-            "year_built": prediction_request.year_built,
-            "has_pool": prediction_request.has_pool,
-            "has_garage": prediction_request.has_garage,
-            "school_rating": prediction_request.school_rating,
-        }
+        model_input = self._model_input(prediction_request)
         
         return PredictionResponse(
             property_id=property_id,
@@ -229,15 +278,22 @@ class MLModelService:
         )
 
 
-# Global instance - wrapped in try-except to prevent import-time crashes
-try:
-    ml_service = MLModelService()
-except Exception as e:
-    print(f"⚠️ Failed to initialize ML service: {e}")
-    # Create a dummy service that reports as unavailable
-    class DummyMLService:
-        def is_available(self): return False
-        def predict(self, *args, **kwargs): raise Exception("ML service not available")
-        def predict_from_property_data(self, *args, **kwargs): raise Exception("ML service not available")
-    ml_service = DummyMLService()
+def _create_ml_service():
+    """Load the model, or return a dummy service that reports as unavailable"""
+    try:
+        return MLModelService()
+    except Exception as e:
+        print(f"⚠️ Failed to initialize ML service: {e}")
+        # Create a dummy service that reports as unavailable
+        class DummyMLService:
+            def is_available(self): return False
+            def predict(self, *args, **kwargs): raise Exception("ML service not available")
+            def predict_from_property_data(self, *args, **kwargs): raise Exception("ML service not available")
+            def predict_many(self, *args, **kwargs): raise Exception("ML service not available")
+        return DummyMLService()
+
+
+container.register("ml_service", _create_ml_service)
 
+# Global instance - the model is unpickled on first use
+ml_service = container.proxy("ml_service")
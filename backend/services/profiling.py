@@ -0,0 +1,211 @@
+"""Opt-in request profiling with a low-overhead statistical stack sampler
+
+A background thread samples every thread's Python stack at a fixed interval. Requests that are
+sampled (PROFILING_SAMPLE_RATE or a signed X-Profile header) or slower than PROFILING_SLOW_MS get
+the samples taken during their lifetime written as collapsed stacks ("a;b;c count"), the input
+format of flamegraph.pl and speedscope. Samples cover the whole process, so concurrent requests
+show up too; threadpool work (the chat pipeline) is captured, unlike a per-thread cProfile.
+"""
+import hashlib
+import hmac
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from config import PROFILING_CONFIG
+
+PROFILE_HEADER = "X-Profile"
+
+# Leaf functions of threads that are parked (event loop selector, idle pool workers, queues)
+IDLE_FUNCTIONS = {"wait", "select", "poll", "_wait_for_tstate_lock", "accept"}
+
+
+def sign_profile_header(secret: str, method: str, path: str, timestamp: Optional[int] = None) -> str:
+    """Value for the X-Profile header: "<unix time>:<HMAC-SHA256(secret, time, method, path)>"
+
+    The signature covers the method and path, so a captured header cannot be replayed against
+    another endpoint (e.g. /admin/profiles) within its validity window.
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    message = f"{timestamp}\n{method.upper()}\n{path}"
+    signature = hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{signature}"
+
+
+def verify_profile_header(value: Optional[str], method: str, path: str) -> bool:
+    """True for a fresh header signed with PROFILING_SECRET for this method and path"""
+    secret = PROFILING_CONFIG["secret"]
+    if not secret or not value or ":" not in value:
+        return False
+    timestamp = value.partition(":")[0]
+    try:
+        age = abs(time.time() - int(timestamp))
+    except ValueError:
+        return False
+    if age > PROFILING_CONFIG["header_max_age"]:
+        return False
+    return hmac.compare_digest(sign_profile_header(secret, method, path, int(timestamp)), value)
+
+
+class StackSampler:
+    """Samples all thread stacks into a time-bounded ring buffer while anyone needs them"""
+
+    def __init__(self, interval_ms: float, window_seconds: float):
+        self.interval = interval_ms / 1000
+        self._samples: Deque[Tuple[float, List[tuple]]] = deque(maxlen=max(1, int(window_seconds / self.interval)))
+        self._lock = threading.Lock()
+        self._active = 0
+        self._continuous = False
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, continuous: bool = False) -> None:
+        """Start the sampler thread; continuous mode samples even with no active request"""
+        self._continuous = self._continuous or continuous
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                    self._thread.start()
+        if self._continuous:
+            self._wake.set()
+
+    def acquire(self) -> None:
+        """Mark a profiled request as in flight"""
+        self.start()
+        with self._lock:
+            self._active += 1
+        self._wake.set()
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def collect(self, start: float, end: float) -> Dict[str, int]:
+        """Collapsed stacks with sample counts for samples taken in [start, end]"""
+        with self._lock:
+            window = [stacks for taken, stacks in self._samples if start <= taken <= end]
+        counts: Counter = Counter()
+        for stacks in window:
+            for stack in stacks:
+                counts[";".join(f"{name} ({filename}:{line})" for filename, name, line in stack)] += 1
+        return dict(counts)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            if not self._continuous and self._active <= 0:
+                self._wake.clear()
+                self._wake.wait()
+            started = time.perf_counter()
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename.rsplit("/", 2)[-1], code.co_name, code.co_firstlineno))
+                    frame = frame.f_back
+                stacks.append(tuple(reversed(stack)))
+            with self._lock:
+                self._samples.append((time.perf_counter(), stacks))
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+
+class ProfileStore:
+    """Keeps the latest profiles in memory and optionally writes them as .folded files"""
+
+    def __init__(self, max_profiles: int, output_dir: str):
+        self.max_profiles = max_profiles
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, duration_ms: float, reason: str, stacks: Dict[str, int]) -> str:
+        profile_id = f"{int(time.time() * 1000)}-{random.getrandbits(24):06x}"
+        folded = "\n".join(f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+        profile = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "duration_ms": round(duration_ms, 2),
+            "reason": reason,
+            "samples": sum(stacks.values()),
+            "folded": folded,
+        }
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        if self.output_dir is not None:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                (self.output_dir / f"{profile_id}.folded").write_text(folded + "\n")
+            except OSError as e:
+                print(f"⚠️ Failed to write profile {profile_id}: {e}")
+        return profile_id
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(self._profiles.values())]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware deciding which requests to profile and storing their collapsed stacks"""
+
+    def __init__(self, app):
+        self.app = app
+        if PROFILING_CONFIG["enabled"] and PROFILING_CONFIG["slow_threshold_ms"] > 0:
+            # Slow requests are only known at the end, so sample continuously
+            sampler.start(continuous=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profiles"):
+            return await self.app(scope, receive, send)
+
+        enabled = PROFILING_CONFIG["enabled"]
+        header = None
+        if PROFILING_CONFIG["secret"]:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER.lower().encode():
+                    header = value.decode("latin-1")
+                    break
+        if header is not None and verify_profile_header(header, scope["method"], scope["path"]):
+            reason = "header"
+        elif enabled and random.random() < PROFILING_CONFIG["sample_rate"]:
+            reason = "sampled"
+        elif enabled and PROFILING_CONFIG["slow_threshold_ms"] > 0:
+            reason = None  # decided once the duration is known
+        else:
+            return await self.app(scope, receive, send)
+
+        if reason is not None:
+            sampler.acquire()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end = time.perf_counter()
+            if reason is not None:
+                sampler.release()
+            duration_ms = (end - start) * 1000
+            if reason is None and duration_ms >= PROFILING_CONFIG["slow_threshold_ms"]:
+                reason = "slow"
+            if reason is not None:
+                stacks = sampler.collect(start, end)
+                if stacks:
+                    profile_id = profile_store.add(scope["method"], scope["path"], duration_ms, reason, stacks)
+                    print(f"⚠️ Profiled {scope['method']} {scope['path']} ({duration_ms:.0f}ms, {reason}): {profile_id}")
+
+
+# Global instances
+sampler = StackSampler(PROFILING_CONFIG["interval_ms"], PROFILING_CONFIG["window_seconds"])
+profile_store = ProfileStore(PROFILING_CONFIG["max_profiles"], PROFILING_CONFIG["output_dir"])
@@ -0,0 +1,169 @@
+"""Compact prompt construction and local token budgeting for LLM calls"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from config import LLM_TOKEN_BUDGETS
+from services.container import timed_import
+
+# Per-message framing overhead used by chat completion APIs
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Without tiktoken, ASCII text is counted at 3 characters per token (real BPE averages ~4 for
+# English) and every other character as a token of its own, so estimates err on the high side
+# and truncated prompts stay inside their budget
+FALLBACK_CHARS_PER_TOKEN = 3
+
+# Static system prompts. They form the identical prefix of every request of a call type,
+# which lets providers with automatic prefix caching reuse them; per-call data goes last.
+SYSTEM_PROMPTS = {
+    "extract_preferences": (
+        "Extract real estate search preferences from the user message. Reply with one JSON object only, "
+        "keys: location (city), min_price, max_price, bedrooms, bathrooms (numbers), "
+        "amenities (list, e.g. pool, garage, gym), sort_by (\"price_asc\" for cheapest, "
+        "\"price_desc\" for most expensive), property_name (a specific listing title the user asks about). "
+        "Use null when not mentioned."
+    ),
+    "extract_property_name": (
+        "Return the specific property title the user asks about, or null. Reply with the title only.\n"
+        "\"show me Luxury Condo\" -> Luxury Condo\n"
+        "\"more details of Penthouse with Panoramic Views\" -> Penthouse with Panoramic Views\n"
+        "\"find 3 bedroom houses under 500k\" -> null"
+    ),
+    "generate_response": (
+        "You are a friendly real estate assistant. Reply in 2-3 conversational sentences: acknowledge what "
+        "the user wants, mention the properties found, and highlight useful price, location or feature details."
+    ),
+}
+
+
+@lru_cache(maxsize=1)
+def _tiktoken():
+    """Optional exact tokenizer, imported on first use; None falls back to a character-based estimate"""
+    try:
+        return timed_import("tiktoken")
+    except ImportError:
+        return None
+
+
+_encoding_error_logged = False
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None when tiktoken is missing or its BPE file cannot be loaded"""
+    global _encoding_error_logged
+    tiktoken = _tiktoken()
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE file is downloaded on first use unless TIKTOKEN_CACHE_DIR already holds it,
+        # so offline hosts end up here and use the estimate instead
+        if not _encoding_error_logged:
+            _encoding_error_logged = True
+            print(f"⚠️ tiktoken encoding unavailable, estimating tokens instead: {e}")
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // FALLBACK_CHARS_PER_TOKEN) + len(text) - ascii_chars
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count tokens with tiktoken when it is installed and loads, otherwise a conservative character-based estimate"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return _estimate_tokens(text)
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """Count prompt tokens for a list of chat messages"""
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """Truncate text to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    text = text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+    # Non-ASCII characters count as whole tokens; each pass drops at least the excess
+    while _estimate_tokens(text) > max_tokens:
+        text = text[:len(text) - (_estimate_tokens(text) - max_tokens)]
+    return text
+
+
+def minify_json(data: Dict[str, Any]) -> str:
+    """Serialize without whitespace and without empty values"""
+    return json.dumps(
+        {k: v for k, v in data.items() if v not in (None, "", [], {})},
+        separators=(",", ":")
+    )
+
+
+def _property_line(prop: Dict) -> str:
+    """One compact line per property: title|location|price|beds/baths"""
+    return (
+        f"{prop.get('title', 'Property')}|{prop.get('location', '')}|"
+        f"${prop.get('price', 0):,.0f}|{prop.get('bedrooms', 0)}bd/{prop.get('bathrooms', 0)}ba"
+    )
+
+
+class PromptBuilder:
+    """Builds compact chat messages that fit each call type's prompt token budget"""
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, int]]] = None):
+        self.budgets = budgets or LLM_TOKEN_BUDGETS
+
+    def max_completion_tokens(self, stage: str) -> int:
+        """Completion budget for a call type, passed to the provider as max_tokens"""
+        return self.budgets[stage]["completion"]
+
+    def extraction_messages(self, stage: str, user_message: str, model: str) -> List[Dict[str, str]]:
+        """Messages for extract_preferences / extract_property_name"""
+        return self._fit(stage, SYSTEM_PROMPTS[stage], user_message, model)
+
+    def response_messages(
+        self,
+        user_message: str,
+        properties: List[Dict],
+        preferences: Dict[str, Any],
+        model: str,
+        max_properties: int = 5
+    ) -> List[Dict[str, str]]:
+        """Messages for generate_response; the query gets at most half the budget, then property lines are dropped"""
+        budget = self._user_budget("generate_response", model)
+        user_message = truncate_to_tokens(user_message, budget // 2, model)
+        header = f"Query: {user_message}\nPreferences: {minify_json(preferences or {})}\nFound {len(properties)}"
+        lines = [_property_line(p) for p in properties[:max_properties]]
+        while lines and count_tokens("\n".join([header] + lines), model) > budget:
+            lines.pop()
+        content = "\n".join([header] + lines) if lines else f"{header} (none shown)"
+        return self._fit("generate_response", SYSTEM_PROMPTS["generate_response"], content, model)
+
+    def _user_budget(self, stage: str, model: str) -> int:
+        system_tokens = count_tokens(SYSTEM_PROMPTS[stage], model) + MESSAGE_OVERHEAD_TOKENS
+        return self.budgets[stage]["prompt"] - system_tokens - MESSAGE_OVERHEAD_TOKENS
+
+    def _fit(self, stage: str, system: str, content: str, model: str) -> List[Dict[str, str]]:
+        """Enforce the prompt budget by truncating the variable user content"""
+        content = truncate_to_tokens(content, self._user_budget(stage, model), model)
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": content},
+        ]
+
+
+# Global instance
+prompt_builder = PromptBuilder()
@@ -1,10 +1,19 @@
 """Property data service for loading and merging property data"""
+import hashlib
 import json
 import os
-from typing import List, Dict, Optional, Callable, Any
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Callable, Any, Tuple
 from pathlib import Path
 from models.schemas import PropertyFilterRequest, PropertyResponse
-from config import DATA_DIR, DATA_FILES, FILTER_CONFIG, PROPERTY_FIELDS, FILTER_OPERATORS
+from config import DATA_DIR, DATA_FILES, FILTER_CONFIG, PROPERTY_FIELDS, FILTER_OPERATORS, QUERY_CACHE_CONFIG, FACET_CONFIG
+from services.query_cache import QueryResultCache, canonical_key
+from services.geo import GeoIndex, haversine_km, in_bounds, property_coordinates
+from services.facets import compute_facets, price_edges
+from services.container import container
+from services.metrics import metrics, timed, STAGE_LATENCY
+from services.tracing import set_span_attributes
 
 
 class PropertyService:
@@ -14,6 +23,22 @@ class PropertyService:
         """Initialize with configurable data directory"""
         self.data_dir = Path(data_dir) if data_dir else Path(DATA_DIR)
         self._properties_cache: Optional[List[Dict]] = None
+        # id -> property lookup built alongside the merged cache
+        self._id_index: Optional[Dict[int, Dict]] = None
+        # Spatial grid over catalog positions, built on the first geo query
+        self._geo_index: Optional[GeoIndex] = None
+        # Price histogram boundaries for facets, derived from the catalog price range
+        self._price_edges: Optional[List[float]] = None
+        # Facet counts per canonical search key, valid for one catalog version
+        self._facet_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._facet_cache_version: Optional[int] = None
+        self._facet_lock = threading.Lock()
+        # Bumped whenever the catalog is reloaded or cleared; invalidates cached search results
+        self.catalog_version = 0
+        # Content fingerprint of the loaded catalog (data file sizes and mtimes), identical across workers
+        self.catalog_fingerprint = ""
+        self.query_cache = QueryResultCache()
+        metrics.register_cache("search_results", self.query_cache.stats)
     
     def load_json_data(self, filename: str) -> List[Dict]:
         """Load JSON data from file"""
@@ -50,13 +75,77 @@ class PropertyService:
                 **char_dict.get(prop_id, {}),
                 'images': img_dict.get(prop_id, {}).get('images', [])
             }
+            coordinates = property_coordinates(merged_prop)
+            if coordinates:
+                merged_prop['latitude'], merged_prop['longitude'], merged_prop['coordinates_approximate'] = coordinates
             merged.append(merged_prop)
         
         if use_cache:
             self._properties_cache = merged
+            self._id_index = {prop['id']: prop for prop in merged}
+            self._geo_index = None
+            self._price_edges = None
+            self.catalog_fingerprint = self._data_fingerprint(len(merged))
+            self.catalog_version += 1
         
         return merged
     
+    def _data_fingerprint(self, rows: int) -> str:
+        """Fingerprint of the data files backing the catalog"""
+        parts = [str(rows)]
+        for filename in (DATA_FILES["basics"], DATA_FILES["characteristics"], DATA_FILES["images"]):
+            try:
+                stat = (self.data_dir / filename).stat()
+                parts.append(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}")
+            except OSError:
+                parts.append(f"{filename}:missing")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    
+    def _get_id_index(self) -> Dict[int, Dict]:
+        """Return the id -> property index, loading the catalog if needed"""
+        if self._id_index is None:
+            self.merge_property_data()
+        return self._id_index or {}
+    
+    def _get_geo_index(self) -> GeoIndex:
+        """Return the spatial index over the cached catalog, building it if needed"""
+        if self._geo_index is None:
+            self._geo_index = GeoIndex().build(
+                (prop['latitude'], prop['longitude']) if 'latitude' in prop else None
+                for prop in self.merge_property_data()
+            )
+        return self._geo_index
+    
+    def _apply_geo_filter(self, properties: List[Dict], filter_params: PropertyFilterRequest) -> List[Dict]:
+        """Radius and bounding-box filters; the full catalog is answered from the spatial index"""
+        bounds = None
+        if filter_params.min_latitude is not None:
+            bounds = (
+                filter_params.min_latitude, filter_params.min_longitude,
+                filter_params.max_latitude, filter_params.max_longitude
+            )
+        radius = filter_params.radius_km
+        center = (filter_params.latitude, filter_params.longitude)
+        
+        if properties is self._properties_cache:
+            index = self._get_geo_index()
+            positions = index.query_radius(*center, radius) if radius is not None else index.query_bounds(bounds)
+            if radius is not None and bounds is not None:
+                positions = [pos for pos in positions if in_bounds(*index.point(pos), bounds)]
+            return [properties[pos] for pos in positions]
+        
+        filtered = []
+        for prop in properties:
+            if 'latitude' not in prop:
+                continue
+            point = (prop['latitude'], prop['longitude'])
+            if radius is not None and haversine_km(*center, *point) > radius:
+                continue
+            if bounds is not None and not in_bounds(*point, bounds):
+                continue
+            filtered.append(prop)
+        return filtered
+    
     def _apply_filter(
         self,
         properties: List[Dict],
@@ -92,7 +181,10 @@ class PropertyService:
         filter_params: PropertyFilterRequest
     ) -> List[Dict]:
         """Filter properties based on filter parameters using configurable logic"""
-        filtered = properties.copy()
+        if filter_params.radius_km is not None or filter_params.min_latitude is not None:
+            filtered = self._apply_geo_filter(properties, filter_params)
+        else:
+            filtered = properties.copy()
         
         # Build filter operations dynamically
         filters = []
@@ -126,13 +218,17 @@ class PropertyService:
     
     def get_property_by_id(self, property_id: int) -> Optional[Dict]:
         """Get a single property by ID"""
-        properties = self.merge_property_data()
-        return next((p for p in properties if p['id'] == property_id), None)
+        return self._get_id_index().get(property_id)
     
     def get_properties_by_ids(self, property_ids: List[int]) -> List[Dict]:
-        """Get multiple properties by their IDs"""
-        properties = self.merge_property_data()
-        return [p for p in properties if p['id'] in property_ids]
+        """Get multiple properties by their IDs (in the order given, unknown IDs skipped)"""
+        index = self._get_id_index()
+        return [index[pid] for pid in dict.fromkeys(property_ids) if pid in index]
+    
+    def find_missing_ids(self, property_ids: List[int]) -> List[int]:
+        """Return the IDs that are not in the catalog"""
+        index = self._get_id_index()
+        return [pid for pid in dict.fromkeys(property_ids) if pid not in index]
     
     def search_properties(
         self,
@@ -140,41 +236,217 @@ class PropertyService:
         filters: Optional[PropertyFilterRequest] = None,
         limit: Optional[int] = None,
         sort_by: Optional[str] = None,
-        sort_order: str = "asc"
+        sort_order: str = "asc",
+        candidates: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """Advanced search with query, filters, sorting, and pagination
+        
+        `candidates` restricts the search to a previous result set (used to refine follow-ups).
+        Full-catalog searches are served from the query cache as id lists when possible.
+        """
+        with STAGE_LATENCY.time("search_properties"):
+            return self._search(query, filters, limit, sort_by, sort_order, candidates)
+    
+    def _search(
+        self,
+        query: Optional[str],
+        filters: Optional[PropertyFilterRequest],
+        limit: Optional[int],
+        sort_by: Optional[str],
+        sort_order: str,
+        candidates: Optional[List[Dict]]
+    ) -> List[Dict]:
+        """Query cache lookup around the uncached search"""
+        limit = limit or FILTER_CONFIG["default_limit"]
+        limit = min(limit, FILTER_CONFIG["max_limit"])
+        if sort_by not in PROPERTY_FIELDS and sort_by != "distance":
+            sort_by = None
+        
+        key = None
+        if candidates is None and QUERY_CACHE_CONFIG["enabled"]:
+            self.merge_property_data()
+            version = self.catalog_version
+            key = canonical_key(
+                filters.model_dump() if filters else None, query, sort_by, sort_order, limit
+            )
+            ids = self.query_cache.get(key, version)
+            set_span_attributes({"search.cache_hit": ids is not None})
+            if ids is not None:
+                index = self._get_id_index()
+                return [index[pid] for pid in ids]
+        
+        results = self._search_uncached(query, filters, limit, sort_by, sort_order, candidates)
+        if key is not None:
+            self.query_cache.set(key, version, [prop['id'] for prop in results])
+        return results
+    
+    def _search_uncached(
+        self,
+        query: Optional[str],
+        filters: Optional[PropertyFilterRequest],
+        limit: int,
+        sort_by: Optional[str],
+        sort_order: str,
+        candidates: Optional[List[Dict]]
+    ) -> List[Dict]:
+        """Filter, text-search, sort and limit without consulting the query cache"""
+        properties = self._match(query, filters, candidates)
+        properties = self._sort(properties, filters, sort_by, sort_order)
+        
+        # Apply limit
+        return properties[:limit]
+    
+    def _match(
+        self,
+        query: Optional[str],
+        filters: Optional[PropertyFilterRequest],
+        candidates: Optional[List[Dict]] = None
     ) -> List[Dict]:
-        """Advanced search with query, filters, sorting, and pagination"""
-        properties = self.merge_property_data()
+        """Every property matching the filters and text query, in catalog order"""
+        properties = candidates if candidates is not None else self.merge_property_data()
         
         # Apply filters if provided
         if filters:
-            properties = self.filter_properties(properties, filters)
+            with STAGE_LATENCY.time("search_filter"):
+                properties = self.filter_properties(properties, filters)
         
         # Apply text search if query provided
         if query:
-            query_lower = query.lower()
-            properties = [
-                p for p in properties
-                if query_lower in str(p.get('title', '')).lower()
-                or query_lower in str(p.get('location', '')).lower()
-                or query_lower in str(p.get('amenities', [])).lower()
-            ]
+            with STAGE_LATENCY.time("search_text"):
+                query_lower = query.lower()
+                properties = [
+                    p for p in properties
+                    if query_lower in str(p.get('title', '')).lower()
+                    or query_lower in str(p.get('location', '')).lower()
+                    or query_lower in str(p.get('amenities', [])).lower()
+                ]
         
-        # Apply sorting
-        if sort_by and sort_by in PROPERTY_FIELDS:
-            field = PROPERTY_FIELDS[sort_by]
-            reverse = sort_order.lower() == "desc"
-            properties = sorted(
-                properties,
-                key=lambda x: x.get(field, 0) if isinstance(x.get(field), (int, float)) else str(x.get(field, '')),
-                reverse=reverse
-            )
+        return properties
+    
+    def _sort(
+        self,
+        properties: List[Dict],
+        filters: Optional[PropertyFilterRequest],
+        sort_by: Optional[str],
+        sort_order: str
+    ) -> List[Dict]:
+        """Sort by a property field or by distance from the geo filter center"""
+        if sort_by == "distance":
+            center = self._distance_center(filters)
+            if center:
+                with STAGE_LATENCY.time("search_sort"):
+                    properties = sorted(
+                        properties,
+                        key=lambda x: haversine_km(*center, x['latitude'], x['longitude']) if 'latitude' in x else float('inf'),
+                        reverse=sort_order.lower() == "desc"
+                    )
+        elif sort_by:
+            with STAGE_LATENCY.time("search_sort"):
+                field = PROPERTY_FIELDS[sort_by]
+                reverse = sort_order.lower() == "desc"
+                properties = sorted(
+                    properties,
+                    key=lambda x: x.get(field, 0) if isinstance(x.get(field), (int, float)) else str(x.get(field, '')),
+                    reverse=reverse
+                )
+        return properties
+    
+    def search_with_facets(
+        self,
+        query: Optional[str] = None,
+        filters: Optional[PropertyFilterRequest] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc"
+    ) -> Tuple[List[Dict], int, Dict[str, Any]]:
+        """One page of results plus the total match count and facet counts over all matches"""
+        limit = min(limit or FILTER_CONFIG["default_limit"], FILTER_CONFIG["max_limit"])
+        if sort_by not in PROPERTY_FIELDS and sort_by != "distance":
+            sort_by = None
         
-        # Apply limit
-        limit = limit or FILTER_CONFIG["default_limit"]
-        limit = min(limit, FILTER_CONFIG["max_limit"])
+        with STAGE_LATENCY.time("search_properties"):
+            matches = self._match(query, filters)
         
-        return properties[:limit]
+        # Facets depend only on the matches, so one entry serves every page and sort order
+        version = self.catalog_version
+        key = canonical_key(filters.model_dump() if filters else None, query, None, "asc", 0)
+        with self._facet_lock:
+            if self._facet_cache_version != version:
+                self._facet_cache.clear()
+                self._facet_cache_version = version
+            facets = self._facet_cache.get(key)
+            if facets is not None:
+                self._facet_cache.move_to_end(key)
+        if facets is None:
+            with STAGE_LATENCY.time("search_facets"):
+                facets = compute_facets(matches, self._get_price_edges())
+            with self._facet_lock:
+                if self._facet_cache_version == version:
+                    self._facet_cache[key] = facets
+                    while len(self._facet_cache) > FACET_CONFIG["cache_entries"]:
+                        self._facet_cache.popitem(last=False)
+        with STAGE_LATENCY.time("search_page"):
+            if sort_by:
+                page = self._sort(matches, filters, sort_by, sort_order)[offset:offset + limit]
+            else:
+                page = matches[offset:offset + limit]
+        return page, len(matches), facets
+    
+    def _get_price_edges(self) -> List[float]:
+        """Price histogram boundaries for the cached catalog (stable across filters)"""
+        if self._price_edges is None:
+            prices = [
+                p['price'] for p in self.merge_property_data()
+                if isinstance(p.get('price'), (int, float))
+            ]
+            self._price_edges = price_edges(prices, FACET_CONFIG["price_buckets"])
+        return self._price_edges
+    
+    def _distance_center(self, filters: Optional[PropertyFilterRequest]) -> Optional[tuple]:
+        """Reference point for distance sorting: the radius center, else the bounding-box center"""
+        if not filters:
+            return None
+        if filters.latitude is not None and filters.longitude is not None:
+            return filters.latitude, filters.longitude
+        if filters.min_latitude is not None:
+            return (
+                (filters.min_latitude + filters.max_latitude) / 2,
+                (filters.min_longitude + filters.max_longitude) / 2
+            )
+        return None
+    
+    def build_comparison(self, properties: List[Dict], predictions: List[Optional[Dict]]) -> Dict[str, Any]:
+        """Column-oriented comparison data with per-field min/max and deltas from the minimum"""
+        columns: Dict[str, List[Any]] = {
+            "title": [p.get('title', '') for p in properties],
+            "location": [p.get('location', '') for p in properties],
+            "price": [p.get('price') for p in properties],
+            "predicted_price": [pred['predicted_price'] if pred else None for pred in predictions],
+            "bedrooms": [p.get('bedrooms') for p in properties],
+            "bathrooms": [p.get('bathrooms') for p in properties],
+            "size_sqft": [p.get('size_sqft') for p in properties],
+            "amenity_count": [len(p.get('amenities') or []) for p in properties],
+        }
+        columns["price_vs_predicted"] = [
+            price - predicted if price is not None and predicted is not None else None
+            for price, predicted in zip(columns["price"], columns["predicted_price"])
+        ]
+        
+        stats = {}
+        for field, values in columns.items():
+            numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if not numbers:
+                continue
+            low, high = min(numbers), max(numbers)
+            stats[field] = {
+                "min": low,
+                "max": high,
+                "deltas": [v - low if v in numbers else None for v in values],
+            }
+        return {"columns": columns, "stats": stats}
     
+    @timed(STAGE_LATENCY, "convert_to_property_response")
     def convert_to_property_response(self, property_dict: Dict) -> PropertyResponse:
         """Convert dictionary to PropertyResponse model"""
         return PropertyResponse(
@@ -187,25 +459,67 @@ class PropertyService:
             size=property_dict.get('size', 0),
             amenities=property_dict.get('amenities', []),
             images=property_dict.get('images', []),
+            latitude=property_dict.get('latitude'),
+            longitude=property_dict.get('longitude'),
+            coordinates_approximate=property_dict.get('coordinates_approximate', False),
             prediction=property_dict.get('prediction')
         )
     
+    @timed(STAGE_LATENCY, "property_payloads")
+    def property_payloads(self, properties: List[Dict]) -> List[Dict]:
+        """PropertyResponse-shaped dicts built without model construction or validation
+        
+        Same fields, defaults and types as convert_to_property_response; for serializing
+        catalog rows directly with FastJSONResponse.
+        """
+        return [
+            {
+                "id": prop.get('id'),
+                "title": prop.get('title', ''),
+                "price": float(prop.get('price', 0)),
+                "location": prop.get('location', ''),
+                "bedrooms": prop.get('bedrooms', 0),
+                "bathrooms": prop.get('bathrooms', 0),
+                "size": prop.get('size', 0),
+                "amenities": prop.get('amenities', []),
+                "images": prop.get('images', []),
+                "latitude": prop.get('latitude'),
+                "longitude": prop.get('longitude'),
+                "coordinates_approximate": prop.get('coordinates_approximate', False),
+                "prediction": prop.get('prediction'),
+            }
+            for prop in properties
+        ]
+    
     def clear_cache(self):
         """Clear the properties cache"""
         self._properties_cache = None
+        self._id_index = None
+        self._geo_index = None
+        self._price_edges = None
+        self.catalog_version += 1
+        self.query_cache.clear()
+
+
+def _create_property_service():
+    """Build the property service, degrading to empty results on errors"""
+    try:
+        return PropertyService()
+    except Exception as e:
+        print(f"⚠️ Failed to initialize Property service: {e}")
+        # Create a minimal service that returns empty results
+        class DummyPropertyService:
+            catalog_fingerprint = ""
+            def merge_property_data(self, *args, **kwargs): return []
+            def search_properties(self, *args, **kwargs): return []
+            def get_property_by_id(self, *args, **kwargs): return None
+        return DummyPropertyService()
+
 
+container.register("property_service", _create_property_service)
 
-# Global instance - wrapped in try-except to prevent import-time crashes
-try:
-    property_service = PropertyService()
-except Exception as e:
-    print(f"⚠️ Failed to initialize Property service: {e}")
-    # Create a minimal service that returns empty results
-    class DummyPropertyService:
-        def merge_property_data(self, *args, **kwargs): return []
-        def search_properties(self, *args, **kwargs): return []
-        def get_property_by_id(self, *args, **kwargs): return None
-    property_service = DummyPropertyService()
+# Global instance - created on first use
+property_service = container.proxy("property_service")
 
 
 # Convenience functions for backward compatibility
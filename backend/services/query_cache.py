@@ -0,0 +1,120 @@
+"""Search result cache keyed by a canonical hash of the search parameters"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config import QUERY_CACHE_CONFIG
+
+# Approximate per-entry overhead: key string, OrderedDict slot, entry tuple
+_ENTRY_OVERHEAD_BYTES = 200
+# Each cached id is a pointer in the list plus (for ids above the small-int cache) an int object
+_ID_BYTES = 8 + sys.getsizeof(10 ** 6)
+
+
+def canonical_key(
+    filters: Optional[Dict[str, Any]],
+    query: Optional[str],
+    sort_by: Optional[str],
+    sort_order: str,
+    limit: int
+) -> str:
+    """Stable hash of the search parameters; equivalent searches map to the same key"""
+    normalized = {}
+    for field, value in (filters or {}).items():
+        if value is None or value == []:
+            continue
+        if field == "location":
+            value = value.lower()
+        elif field == "amenities":
+            value = sorted({item.lower() for item in value})
+        normalized[field] = value
+    payload = {
+        "filters": normalized,
+        "query": query.lower() if query else None,
+        "sort_by": sort_by,
+        "sort_order": sort_order.lower() if sort_by else None,
+        "limit": limit,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class QueryResultCache:
+    """LRU of search result id lists, bounded by entry count and approximate memory"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or QUERY_CACHE_CONFIG["max_entries"]
+        self.max_bytes = max_bytes or QUERY_CACHE_CONFIG["max_bytes"]
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str, version: int) -> Optional[List[int]]:
+        """Cached result ids for a key at this catalog version, or None on a miss"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, version: int, ids: List[int]) -> None:
+        """Store result ids computed against the given catalog version"""
+        size = _ENTRY_OVERHEAD_BYTES + sys.getsizeof(ids) + _ID_BYTES * len(ids)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Results computed against a catalog that has since been replaced are not stored
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (ids, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters, hit rate and size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "catalog_version": self._version,
+            }
+
+    def _check_version(self, version: int) -> None:
+        """Drop every entry once a newer catalog version is seen (caller holds the lock)"""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.bytes = 0
+            self._version = version
@@ -0,0 +1,189 @@
+"""Local template engine for chatbot responses (no LLM call required)"""
+from typing import Dict, List, Optional, Any
+from config import RESPONSE_CONFIG, RESPONSE_INTENT_POLICY
+
+
+def classify_intent(
+    properties: List[Dict],
+    preferences: Dict[str, Any],
+    property_name: Optional[str] = None,
+    wants_prediction: bool = False
+) -> str:
+    """Classify a chat turn into one of the RESPONSE_INTENT_POLICY intents"""
+    if not properties:
+        return "no_results"
+    if property_name:
+        return "property_detail"
+    if wants_prediction and any(p.get('prediction') for p in properties):
+        return "prediction"
+    if preferences.get("sort_by") == "price_asc":
+        return "cheapest"
+    if preferences.get("sort_by") == "price_desc":
+        return "most_expensive"
+    if any(preferences.get(key) for key in ("location", "min_price", "max_price", "bedrooms", "bathrooms", "amenities")):
+        return "search"
+    return "open_ended"
+
+
+def should_use_llm(intent: str, mode: Optional[str] = None) -> bool:
+    """Decide whether the LLM is needed for this intent under the configured mode"""
+    mode = mode or RESPONSE_CONFIG["mode"]
+    if mode == "llm":
+        return True
+    if mode == "template":
+        return False
+    return RESPONSE_INTENT_POLICY.get(intent, "template") == "llm"
+
+
+class ResponseTemplateEngine:
+    """Renders natural chat responses from search results using local templates"""
+
+    def __init__(self, max_listed: Optional[int] = None):
+        self.max_listed = max_listed or RESPONSE_CONFIG["max_listed_properties"]
+
+    def render(
+        self,
+        properties: List[Dict],
+        preferences: Dict[str, Any],
+        intent: Optional[str] = None
+    ) -> str:
+        """Render a response for the given results and extracted preferences"""
+        preferences = preferences or {}
+        intent = intent or classify_intent(properties, preferences)
+        criteria = self.describe_filters(preferences)
+
+        if intent == "no_results" or not properties:
+            if criteria:
+                return f"I couldn't find any {criteria}. Try widening your budget or removing a filter."
+            return "I couldn't find properties matching your criteria. Try adjusting your search parameters."
+
+        if intent == "property_detail":
+            return self._render_detail(properties[0])
+
+        sentences = [self._summary_sentence(properties, criteria)]
+
+        # Rows without a price (missing or None) never win the cheapest/most expensive slot
+        priced = [p for p in properties if p.get('price') is not None] or properties
+        if intent == "most_expensive":
+            top = max(priced, key=lambda x: x.get('price') or 0)
+            sentences.append(f"The most expensive is {self._name(top)} at {self._money(top.get('price'))}.")
+        elif intent == "prediction":
+            sentences.extend(self._prediction_sentences(properties))
+        else:
+            cheapest = min(priced, key=lambda x: x.get('price') or 0)
+            sentences.append(f"The most affordable option is {self._name(cheapest)} at {self._money(cheapest.get('price'))}.")
+            if intent == "search" and len(properties) > 1:
+                sentences.append(self._listing_sentence(properties))
+
+        return " ".join(s for s in sentences if s)
+
+    def describe_filters(self, preferences: Dict[str, Any]) -> str:
+        """Describe the active filters as a noun phrase, e.g. '3-bedroom properties in Miami under $500,000'"""
+        parts = []
+        if preferences.get("bedrooms"):
+            parts.append(f"{preferences['bedrooms']}-bedroom")
+        noun = "properties"
+        if parts:
+            noun = f"{parts[0]} {noun}"
+
+        qualifiers = []
+        if preferences.get("location"):
+            qualifiers.append(f"in {preferences['location']}")
+        if preferences.get("bathrooms"):
+            qualifiers.append(f"with {preferences['bathrooms']} bathrooms")
+        amenities = preferences.get("amenities") or []
+        if amenities:
+            qualifiers.append(f"with {self._join(amenities)}")
+        min_price = preferences.get("min_price")
+        max_price = preferences.get("max_price")
+        if min_price and max_price:
+            qualifiers.append(f"between {self._money(min_price)} and {self._money(max_price)}")
+        elif max_price:
+            qualifiers.append(f"under {self._money(max_price)}")
+        elif min_price:
+            qualifiers.append(f"over {self._money(min_price)}")
+
+        if not qualifiers and not parts:
+            return ""
+        return " ".join([noun] + qualifiers)
+
+    def _summary_sentence(self, properties: List[Dict], criteria: str) -> str:
+        """Count plus price range sentence"""
+        count = len(properties)
+        label = criteria or ("property" if count == 1 else "properties")
+        if count == 1:
+            label = label.replace("properties", "property", 1)
+            return f"I found 1 {label}, listed at {self._money(properties[0].get('price'))}."
+        prices = [p.get('price') for p in properties if p.get('price') is not None]
+        if prices and min(prices) != max(prices):
+            return f"I found {count} {label}, priced from {self._money(min(prices))} to {self._money(max(prices))}."
+        return f"I found {count} {label}."
+
+    def _listing_sentence(self, properties: List[Dict]) -> str:
+        """Short list of the first few results"""
+        listed = [
+            f"{self._name(p)} in {p.get('location', 'an undisclosed location')}"
+            for p in properties[:self.max_listed]
+        ]
+        return f"Top matches include {self._join(listed)}."
+
+    def _prediction_sentences(self, properties: List[Dict]) -> List[str]:
+        """Describe the gap between predicted and listed price for predicted properties"""
+        sentences = []
+        for prop in [p for p in properties if p.get('prediction')][:self.max_listed]:
+            predicted = prop['prediction'].get('predicted_price')
+            listed = prop['prediction'].get('listed_price') or prop.get('price')
+            if not predicted:
+                continue
+            if not listed:
+                sentences.append(f"Our model estimates {self._name(prop)} at {self._money(predicted)}.")
+                continue
+            delta = (predicted - listed) / listed * 100
+            if abs(delta) < 1:
+                comparison = "right in line with"
+            elif delta > 0:
+                comparison = f"about {abs(delta):.0f}% above"
+            else:
+                comparison = f"about {abs(delta):.0f}% below"
+            sentences.append(
+                f"Our model estimates {self._name(prop)} at {self._money(predicted)}, "
+                f"{comparison} its listed price of {self._money(listed)}."
+            )
+        return sentences
+
+    def _render_detail(self, prop: Dict) -> str:
+        """Describe a single property in detail"""
+        sentence = (
+            f"{self._name(prop)} in {prop.get('location', 'an undisclosed location')} is listed at "
+            f"{self._money(prop.get('price'))} with {prop.get('bedrooms', 0)} bed and {prop.get('bathrooms', 0)} bath"
+        )
+        if prop.get('size'):
+            sentence += f" across {prop['size']:,} sqft"
+        sentence += "."
+        sentences = [sentence]
+        if prop.get('amenities'):
+            sentences.append(f"Amenities include {self._join([a.lower() for a in prop['amenities']])}.")
+        sentences.extend(self._prediction_sentences([prop]))
+        return " ".join(sentences)
+
+    @staticmethod
+    def _name(prop: Dict) -> str:
+        return prop.get('title') or 'a property'
+
+    @staticmethod
+    def _money(value: Any) -> str:
+        try:
+            return f"${float(value):,.0f}"
+        except (TypeError, ValueError):
+            return "an undisclosed price"
+
+    @staticmethod
+    def _join(items: List[str]) -> str:
+        items = [str(i) for i in items]
+        if len(items) <= 1:
+            return "".join(items)
+        return ", ".join(items[:-1]) + f" and {items[-1]}"
+
+
+# Global instance
+response_template_engine = ResponseTemplateEngine()
@@ -0,0 +1,171 @@
+"""Read-through cache of users' saved property sets"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from config import SAVED_CACHE_CONFIG
+from services.metrics import metrics
+
+# Optional Redis client for a cache shared between workers
+_redis_available = False
+try:
+    import redis
+    _redis_available = True
+except ImportError:
+    pass
+
+
+class SavedPropertiesCache:
+    """Per-user saved ids: Redis (shared by workers) when configured, in front of a per-process LRU
+
+    With Redis, Redis is the cache of record and local entries expire after local_ttl seconds;
+    writes drop the Redis entry so the next read repopulates it from the database. Without
+    Redis the LRU is only coherent in a single worker process (see `coherent`).
+    """
+
+    def __init__(
+        self,
+        max_users: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        local_ttl: Optional[float] = None,
+        workers: Optional[int] = None
+    ):
+        self.max_users = max_users or SAVED_CACHE_CONFIG["max_users"]
+        self.local_ttl = SAVED_CACHE_CONFIG["local_ttl"] if local_ttl is None else local_ttl
+        self.workers = workers or SAVED_CACHE_CONFIG["workers"]
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.redis = None
+        redis_url = redis_url if redis_url is not None else SAVED_CACHE_CONFIG["redis_url"]
+        if redis_url and _redis_available:
+            try:
+                self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+            except Exception as e:
+                print(f"⚠️ Saved cache Redis unavailable: {e}")
+
+    @property
+    def shared(self) -> bool:
+        """True when entries live in Redis, so every worker reads the same sets"""
+        return self.redis is not None
+
+    @property
+    def coherent(self) -> bool:
+        """True when a cached set cannot be changed behind this process's back by another worker"""
+        return self.shared or self.workers <= 1
+
+    def get_ids(self, user_id: str) -> Optional[List[int]]:
+        """Cached saved ids for a user (recent local copy, then Redis), or None on a miss"""
+        ids = self._get_ids(user_id)
+        with self._lock:
+            if ids is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return ids
+
+    def _get_ids(self, user_id: str) -> Optional[List[int]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                fresh = not self.shared or time.monotonic() - entry["stored_at"] < self.local_ttl
+                if fresh:
+                    self._entries.move_to_end(user_id)
+                    return list(entry["ids"])
+                del self._entries[user_id]
+        if not self.shared:
+            return None
+        ids = self._redis_get(user_id)
+        if ids is not None:
+            self._store(user_id, ids)
+        return ids
+
+    def set(self, user_id: str, ids: List[int]) -> None:
+        """Populate the cache after a database read"""
+        self._store(user_id, ids)
+        self._redis_set(user_id, ids)
+
+    def add(self, user_id: str, property_ids: List[int]) -> Optional[List[int]]:
+        """Apply saves to a cached set; returns the new ids, or None if the caller must re-read the database"""
+        return self._update(user_id, lambda ids: ids + [pid for pid in dict.fromkeys(property_ids) if pid not in ids])
+
+    def remove(self, user_id: str, property_ids: List[int]) -> Optional[List[int]]:
+        """Apply removals to a cached set; returns the new ids, or None if the caller must re-read the database"""
+        removed = set(property_ids)
+        return self._update(user_id, lambda ids: [pid for pid in ids if pid not in removed])
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's entry, or every entry when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        if self.redis is not None and user_id is not None:
+            try:
+                self.redis.delete(self._key(user_id))
+            except Exception as e:
+                print(f"⚠️ Saved cache Redis error: {e}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "users": len(self._entries),
+            }
+
+    def _update(self, user_id: str, change: Callable[[List[int]], List[int]]) -> Optional[List[int]]:
+        if self.shared or not self.coherent:
+            # A read-modify-write could race with another worker's write (or start from a set
+            # another worker already changed), so drop the entry; the caller re-reads the database
+            self.invalidate(user_id)
+            return None
+        ids = self._get_ids(user_id)
+        if ids is None:
+            return None
+        ids = change(ids)
+        self._store(user_id, ids)
+        self._redis_set(user_id, ids)
+        return ids
+
+    def _store(self, user_id: str, ids: List[int]) -> None:
+        with self._lock:
+            self._entries[user_id] = {"ids": list(ids), "stored_at": time.monotonic()}
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"saved:{user_id}"
+
+    def _redis_get(self, user_id: str) -> Optional[List[int]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._key(user_id))
+            if raw is None:
+                return None
+            raw = raw.decode() if isinstance(raw, bytes) else raw
+            return [int(pid) for pid in raw.split(",") if pid]
+        except Exception as e:
+            print(f"⚠️ Saved cache Redis error: {e}")
+            return None
+
+    def _redis_set(self, user_id: str, ids: List[int]) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(self._key(user_id), ",".join(str(pid) for pid in ids), ex=SAVED_CACHE_CONFIG["redis_ttl"])
+        except Exception as e:
+            print(f"⚠️ Saved cache Redis error: {e}")
+
+
+# Global instance
+saved_properties_cache = SavedPropertiesCache()
+metrics.register_cache("saved_properties", saved_properties_cache.stats)
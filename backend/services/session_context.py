@@ -0,0 +1,182 @@
+"""Per-user conversational context for refining follow-up chat queries"""
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+from config import SESSION_CONTEXT_CONFIG
+
+# Words that mark a message as a refinement of the previous search rather than a new one
+FOLLOWUP_PATTERN = re.compile(
+    r"^(and|but|also|now|then)\b|\b(only|just|those|these|them|ones|cheaper|pricier|instead|"
+    r"what about|how about|any with|of them|from those)\b"
+)
+PRICE_PATTERN = re.compile(r"\b(under|below|less than|max|at most|over|above|more than|min|at least)\s*\$?\s*([\d,.]+)\s*(k|m|mil|million)?\b")
+BEDROOM_PATTERN = re.compile(r"\b(\d+)\s*(?:-\s*)?(?:bed|beds|bedroom|bedrooms|bhk|br)\b")
+BATHROOM_PATTERN = re.compile(r"\b(\d+)\s*(?:-\s*)?(?:bath|baths|bathroom|bathrooms)\b")
+# A property type changes what is being searched for, which only LLM extraction understands
+PROPERTY_TYPE_PATTERN = re.compile(
+    r"\b(houses?|condos?|apartments?|flats?|villas?|townhouses?|townhomes?|studios?|lofts?|"
+    r"duplex(?:es)?|penthouses?|cottages?|mansions?|bungalows?|cabins?)\b"
+)
+
+
+def build_vocabulary(properties: List[Dict]) -> Dict[str, Any]:
+    """Lowercased amenity phrases mapped to catalog amenity names, and city names known to the catalog
+
+    Each full amenity name maps to itself; each of its words maps to the most common catalog
+    amenity containing it, so "pool" resolves to "Swimming Pool" for the exact-match filter.
+    """
+    counts: Counter = Counter()
+    cities = set()
+    for prop in properties:
+        counts.update(set(prop.get("amenities") or []))
+        location = (prop.get("location") or "").lower()
+        if location:
+            cities.add(location.split(",")[0].strip())
+    amenities: Dict[str, str] = {}
+    # Most common names first (ties by name) so a shared word resolves deterministically
+    for name, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        amenities.setdefault(name.lower(), name)
+        for word in name.lower().split():
+            if len(word) > 2:
+                amenities.setdefault(word, name)
+    # Longest first so "swimming pool" wins over "pool"
+    return {
+        "amenities": dict(sorted(amenities.items(), key=lambda item: len(item[0]), reverse=True)),
+        "cities": sorted(cities, key=len, reverse=True),
+    }
+
+
+def _parse_amount(number: str, suffix: Optional[str]) -> Optional[int]:
+    try:
+        value = float(number.replace(",", ""))
+    except ValueError:
+        return None
+    if suffix == "k":
+        value *= 1_000
+    elif suffix in ("m", "mil", "million"):
+        value *= 1_000_000
+    return int(value)
+
+
+def parse_followup(
+    message: str,
+    context: Dict[str, Any],
+    amenities: Dict[str, str],
+    cities: List[str]
+) -> Optional[Dict[str, Any]]:
+    """Parse a follow-up like 'only ones with a pool' or 'cheaper' into a filter/sort delta, or None
+
+    Only filter and sort refinements are handled here; a message naming a new location or a
+    property type returns None so it goes through LLM extraction as a new search.
+    """
+    text = " ".join(message.lower().split())
+    if not FOLLOWUP_PATTERN.search(text) or PROPERTY_TYPE_PATTERN.search(text):
+        return None
+    previous_location = (context.get("filters", {}).get("location") or "").lower()
+    if any(city in text and city not in previous_location for city in cities):
+        return None
+
+    delta: Dict[str, Any] = {}
+
+    for direction, number, suffix in PRICE_PATTERN.findall(text):
+        amount = _parse_amount(number, suffix or None)
+        if amount is None:
+            continue
+        if direction in ("under", "below", "less than", "max", "at most"):
+            delta["max_price"] = amount
+        else:
+            delta["min_price"] = amount
+
+    match = BEDROOM_PATTERN.search(text)
+    if match:
+        delta["bedrooms"] = int(match.group(1))
+    match = BATHROOM_PATTERN.search(text)
+    if match:
+        delta["bathrooms"] = int(match.group(1))
+
+    # Amenity words the catalog knows about, normalized to catalog names, e.g. "pool" -> "Swimming Pool"
+    words = set(re.findall(r"[a-z0-9/-]+", text))
+    matched_phrases: List[str] = []
+    for phrase in amenities:
+        matched = phrase in words if " " not in phrase else phrase in text
+        # Skip single words already covered by a longer matched phrase
+        if matched and not any(phrase in f for f in matched_phrases):
+            matched_phrases.append(phrase)
+    found = list(dict.fromkeys(amenities[phrase] for phrase in matched_phrases))
+    if found:
+        delta["amenities"] = found
+
+    if "cheapest" in text or "lowest price" in text:
+        delta["sort"] = ("price", "asc")
+    elif "most expensive" in text or "highest price" in text or "priciest" in text:
+        delta["sort"] = ("price", "desc")
+    if re.search(r"\b(cheaper|less expensive|more affordable)\b", text) and context.get("max_result_price"):
+        delta["max_price"] = min(delta.get("max_price", float("inf")), context["max_result_price"] - 1)
+        delta.setdefault("sort", ("price", "asc"))
+
+    return delta or None
+
+
+def merge_filters(previous: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a follow-up delta on top of the previous filters"""
+    merged = dict(previous)
+    for key in ("location", "min_price", "max_price", "bedrooms", "bathrooms"):
+        if key in delta:
+            merged[key] = delta[key]
+    if delta.get("amenities"):
+        merged["amenities"] = list(dict.fromkeys((previous.get("amenities") or []) + delta["amenities"]))
+    return merged
+
+
+def is_refinement(previous: Dict[str, Any], merged: Dict[str, Any]) -> bool:
+    """True when the merged filters can only shrink the previous result set"""
+    if merged.get("location") != previous.get("location") and previous.get("location") is not None:
+        return False
+    if previous.get("min_price") is not None and (merged.get("min_price") or 0) < previous["min_price"]:
+        return False
+    if previous.get("max_price") is not None and (merged.get("max_price") is None or merged["max_price"] > previous["max_price"]):
+        return False
+    for key in ("bedrooms", "bathrooms"):
+        if previous.get(key) is not None and merged.get(key) != previous[key]:
+            return False
+    return set(previous.get("amenities") or []) <= set(merged.get("amenities") or [])
+
+
+class SessionContextCache:
+    """LRU of each user's last resolved search (filters, query, sort, result ids) with a TTL"""
+
+    def __init__(self, max_users: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_users = max_users or SESSION_CONTEXT_CONFIG["max_users"]
+        self.ttl_seconds = ttl_seconds or SESSION_CONTEXT_CONFIG["ttl_seconds"]
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Last search context for a user, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["updated_at"] > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry
+
+    def set(self, user_id: str, context: Dict[str, Any]) -> None:
+        """Store the context of the user's latest search"""
+        with self._lock:
+            self._entries[user_id] = {**context, "updated_at": time.monotonic()}
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+# Global instance
+session_context_cache = SessionContextCache()
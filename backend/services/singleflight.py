@@ -0,0 +1,72 @@
+"""Single-flight request coalescing for identical in-flight work"""
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a chat message for use as a coalescing key"""
+    return " ".join(message.lower().split()).rstrip("?!. ")
+
+
+def canonical_preferences(preferences: Optional[Dict[str, Any]]) -> str:
+    """Order-independent form of extracted preferences for use in a coalescing key"""
+    return json.dumps(preferences or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class _Call:
+    """A single in-flight computation that waiters block on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time; concurrent callers share its result"""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn() for this key, waiting on an identical in-flight call if one exists"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Forget the key before waking waiters so later requests start a fresh computation
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of executed and coalesced calls"""
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,213 @@
+"""Pluggable fallback state (saved properties and chat history) used when MongoDB is not available"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import STATE_BACKEND_CONFIG
+from services.history_store import BoundedHistoryStore, clamp_page_size, decode_cursor, encode_cursor
+
+
+class StateBackend:
+    """Interface for saved-property sets and chat history storage"""
+
+    name = "base"
+    # True when every worker on the host sees the same data
+    shared = False
+
+    def get_saved(self, user_id: str) -> List[int]:
+        raise NotImplementedError
+
+    def add_saved(self, user_id: str, property_ids: List[int]) -> List[int]:
+        """Add ids (keeping first-saved order) and return the resulting set"""
+        raise NotImplementedError
+
+    def remove_saved(self, user_id: str, property_ids: List[int]) -> List[int]:
+        """Remove ids and return the resulting set"""
+        raise NotImplementedError
+
+    def append_messages(self, documents: List[dict]) -> bool:
+        """Append chat messages, each carrying its user_id"""
+        raise NotImplementedError
+
+    def get_history_page(
+        self,
+        user_id: str,
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        raise NotImplementedError
+
+    def clear_history(self, user_id: str) -> bool:
+        raise NotImplementedError
+
+
+class MemoryStateBackend(StateBackend):
+    """Per-process dictionaries (the original in-memory fallback)"""
+
+    name = "memory"
+
+    def __init__(self):
+        # user_id -> ordered set of property ids (dict keys keep insertion order, O(1) membership)
+        self._saved: Dict[str, "OrderedDict[int, None]"] = {}
+        self._history = BoundedHistoryStore()
+        self._lock = threading.Lock()
+
+    def get_saved(self, user_id):
+        with self._lock:
+            return list(self._saved.get(user_id, ()))
+
+    def add_saved(self, user_id, property_ids):
+        with self._lock:
+            saved = self._saved.setdefault(user_id, OrderedDict())
+            for pid in property_ids:
+                saved[pid] = None
+            return list(saved)
+
+    def remove_saved(self, user_id, property_ids):
+        with self._lock:
+            saved = self._saved.get(user_id, OrderedDict())
+            for pid in property_ids:
+                saved.pop(pid, None)
+            return list(saved)
+
+    def append_messages(self, documents):
+        for doc in documents:
+            doc = dict(doc)
+            self._history.append(doc.pop('user_id'), doc)
+        return True
+
+    def get_history_page(self, user_id, before=None, limit=None):
+        return self._history.get_page(user_id, before, limit)
+
+    def clear_history(self, user_id):
+        return self._history.clear(user_id)
+
+
+class SQLiteStateBackend(StateBackend):
+    """SQLite file in WAL mode, shared by all worker processes on the host"""
+
+    name = "sqlite"
+    shared = True
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS saved_properties (
+            user_id TEXT NOT NULL,
+            property_id INTEGER NOT NULL,
+            saved_at INTEGER NOT NULL,
+            PRIMARY KEY (user_id, property_id)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS chat_history (
+            user_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            document TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS chat_history_user_ts ON chat_history (user_id, timestamp)",
+    ]
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or STATE_BACKEND_CONFIG["sqlite_path"]
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=STATE_BACKEND_CONFIG["sqlite_busy_timeout"])
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_saved(self, user_id):
+        rows = self._conn().execute(
+            "SELECT property_id FROM saved_properties WHERE user_id = ? ORDER BY saved_at",
+            (user_id,)
+        )
+        return [row[0] for row in rows]
+
+    def add_saved(self, user_id, property_ids):
+        conn = self._conn()
+        with conn:
+            start = conn.execute(
+                "SELECT COALESCE(MAX(saved_at), 0) FROM saved_properties WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO saved_properties (user_id, property_id, saved_at) VALUES (?, ?, ?)",
+                [(user_id, pid, start + i + 1) for i, pid in enumerate(dict.fromkeys(property_ids))]
+            )
+        return self.get_saved(user_id)
+
+    def remove_saved(self, user_id, property_ids):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "DELETE FROM saved_properties WHERE user_id = ? AND property_id = ?",
+                [(user_id, pid) for pid in property_ids]
+            )
+        return self.get_saved(user_id)
+
+    def append_messages(self, documents):
+        rows = []
+        for doc in documents:
+            doc = {k: v for k, v in doc.items() if k != '_id'}
+            rows.append((doc.pop('user_id'), doc.get('timestamp', ''), json.dumps(doc, separators=(",", ":"))))
+        try:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO chat_history (user_id, timestamp, document) VALUES (?, ?, ?)", rows
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ SQLite chat history write error: {e}")
+            return False
+
+    def get_history_page(self, user_id, before=None, limit=None):
+        limit = clamp_page_size(limit)
+        query = "SELECT rowid, document FROM chat_history WHERE user_id = ?"
+        params: list = [user_id]
+        if before:
+            # rowid breaks timestamp ties; the (user_id, timestamp) index already orders by it
+            timestamp, tiebreak = decode_cursor(before)
+            if tiebreak and tiebreak.isdigit():
+                query += " AND (timestamp < ? OR (timestamp = ? AND rowid < ?))"
+                params.extend([timestamp, timestamp, int(tiebreak)])
+            else:
+                query += " AND timestamp < ?"
+                params.append(timestamp)
+        query += " ORDER BY timestamp DESC, rowid DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = self._conn().execute(query, params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        page = [json.loads(row[1]) for row in rows]
+        next_before = encode_cursor(page[0].get('timestamp', ''), rows[0][0]) if has_more and page else None
+        return page, next_before
+
+    def clear_history(self, user_id):
+        conn = self._conn()
+        with conn:
+            deleted = conn.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,)).rowcount
+        return deleted > 0
+
+
+def create_state_backend(name: Optional[str] = None) -> StateBackend:
+    """Build the configured fallback state backend, defaulting to memory on errors"""
+    name = name or STATE_BACKEND_CONFIG["backend"]
+    if name == "sqlite":
+        try:
+            return SQLiteStateBackend()
+        except Exception as e:
+            print(f"⚠️ Failed to open SQLite state store, using memory: {e}")
+    elif name != "memory":
+        print(f"⚠️ Unknown state backend '{name}', using memory")
+    return MemoryStateBackend()
+
+
+# Global instance
+fallback_state = create_state_backend()
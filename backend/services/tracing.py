@@ -0,0 +1,281 @@
+"""Span-based request tracing with an OpenTelemetry-compatible API and local exporters"""
+import contextvars
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from config import TRACING_CONFIG
+
+# Optional OpenTelemetry API; used instead of the built-in tracer when TRACING_EXPORTER=otel
+_otel_available = False
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry import propagate as otel_propagate
+    _otel_available = True
+except ImportError:
+    pass
+
+TRACE_HEADER = "X-Trace-Id"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class SpanContext:
+    """Identifiers of a span (same attribute names as opentelemetry.trace.SpanContext)"""
+
+    __slots__ = ("trace_id", "span_id", "is_remote")
+
+    def __init__(self, trace_id: int, span_id: int, is_remote: bool = False):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.is_remote = is_remote
+
+
+class Span:
+    """A timed operation with attributes; records only when its trace is sampled"""
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[int], trace: Optional["_Trace"]):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        # None when the trace is not sampled: the span only carries ids
+        self._trace = trace
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def is_recording(self) -> bool:
+        return self._trace is not None and self.end_time is None
+
+    def get_span_context(self) -> SpanContext:
+        return self.context
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self._trace is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        if self._trace is not None:
+            self.attributes.update(attributes)
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def set_status(self, status: str, description: Optional[str] = None) -> None:
+        self.status = status if description is None else f"{status}: {description}"
+
+    def record_exception(self, exception: BaseException) -> None:
+        if self._trace is not None:
+            self.events.append({
+                "name": "exception",
+                "exception.type": type(exception).__name__,
+                "exception.message": str(exception),
+            })
+
+    def end(self) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = time.time_ns()
+        if self._trace is not None:
+            self._trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": format(self.context.trace_id, "032x"),
+            "span_id": format(self.context.span_id, "016x"),
+            "parent_id": format(self.parent_id, "016x") if self.parent_id else None,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(((self.end_time or time.time_ns()) - self.start_time) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class _Trace:
+    """Spans of one sampled trace in this process; exported when the local root span ends"""
+
+    def __init__(self, exporter: "SpanExporter"):
+        self.exporter = exporter
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+
+    def finish(self, span: Span) -> None:
+        self.spans.append(span)
+        if span is self.root:
+            self.exporter.export(self.spans)
+
+
+class SpanExporter:
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Prints an indented span tree per trace to stderr"""
+
+    def export(self, spans):
+        children: Dict[Optional[int], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+        root = spans[-1]
+        lines = [f"trace {format(root.context.trace_id, '032x')}"]
+
+        def walk(span: Span, depth: int) -> None:
+            data = span.to_dict()
+            attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            lines.append(f"{'  ' * (depth + 1)}{span.name} {data['duration_ms']}ms {attrs}".rstrip())
+            for child in sorted(children.get(span.context.span_id, []), key=lambda s: s.start_time):
+                walk(child, depth + 1)
+
+        walk(root, 0)
+        print("\n".join(lines), file=sys.stderr)
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON object per span (JSON Lines)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        payload = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(payload)
+        except OSError as e:
+            print(f"⚠️ Trace export error: {e}")
+
+
+class Tracer:
+    """Minimal tracer exposing the start_as_current_span API of OpenTelemetry"""
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        context: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        record_exception: bool = True
+    ) -> Iterator[Span]:
+        """Start a child of the current span (or of a remote parent context) and make it current"""
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id, trace = parent.context.trace_id, parent.context.span_id, parent._trace
+        else:
+            trace_id = context.trace_id if context is not None else random.getrandbits(128)
+            parent_id = context.span_id if context is not None else None
+            sampled = self.exporter is not None and random.random() < self.sample_rate
+            trace = _Trace(self.exporter) if sampled else None
+
+        span = Span(name, SpanContext(trace_id, random.getrandbits(64)), parent_id, trace)
+        if trace is not None and trace.root is None:
+            trace.root = span
+        if attributes:
+            span.set_attributes(attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if record_exception:
+                span.record_exception(e)
+            span.set_status("ERROR", str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+
+def _create_tracer():
+    exporter_name = TRACING_CONFIG["exporter"]
+    if exporter_name == "otel":
+        if _otel_available:
+            return otel_trace.get_tracer("real-estate-chatbot")
+        print("⚠️ opentelemetry-api not installed, using the built-in tracer without export")
+        return Tracer(None)
+    exporter: Optional[SpanExporter] = None
+    if exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == "file":
+        exporter = FileSpanExporter(TRACING_CONFIG["file_path"])
+    elif exporter_name != "none":
+        print(f"⚠️ Unknown trace exporter '{exporter_name}', spans are not exported")
+    return Tracer(exporter, TRACING_CONFIG["sample_rate"])
+
+
+def get_current_span():
+    """The active span (OpenTelemetry's when that backend is in use); None outside a trace"""
+    if TRACING_CONFIG["exporter"] == "otel" and _otel_available:
+        return otel_trace.get_current_span()
+    return _current_span.get()
+
+
+def set_span_attributes(attributes: Dict[str, Any]) -> None:
+    """Attach attributes to the active span, if any"""
+    span = get_current_span()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def format_trace_id(span) -> str:
+    return format(span.get_span_context().trace_id, "032x")
+
+
+def extract_parent(headers: Dict[str, str]):
+    """Remote parent from a W3C traceparent header (version-traceid-spanid-flags), if present"""
+    if TRACING_CONFIG["exporter"] == "otel" and _otel_available:
+        return otel_propagate.extract(headers)
+    parts = headers.get("traceparent", "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        return SpanContext(int(parts[1], 16), int(parts[2], 16), is_remote=True)
+    except ValueError:
+        return None
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per request and returning its trace id in X-Trace-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_CONFIG["enabled"]:
+            return await self.app(scope, receive, send)
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        with tracer.start_as_current_span(
+            f"HTTP {scope['method']}",
+            context=extract_parent(headers),
+            attributes={"http.method": scope["method"], "http.target": scope["path"]}
+        ) as span:
+            trace_id = format_trace_id(span).encode("latin-1")
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(TRACE_HEADER.lower().encode("latin-1"), trace_id)]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                span.update_name(f"HTTP {scope['method']} {endpoint.__name__}")
+
+
+# Global instance
+tracer = _create_tracer()
@@ -0,0 +1,146 @@
+"""Write-behind queue that batches document writes off the request path"""
+import atexit
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from config import CHAT_WRITE_BEHIND_CONFIG
+
+
+class WriteBehindQueue:
+    """Collects documents from all requests and flushes them in batches from a background thread
+
+    A batch whose write fails is queued again, up to `max_retries` more attempts, before it is
+    dropped and logged. Documents enqueued after close() are written inline.
+    """
+
+    def __init__(self, writer: Callable[[List[dict]], bool], config: Optional[Dict] = None):
+        self.writer = writer
+        self.config = {**CHAT_WRITE_BEHIND_CONFIG, **(config or {})}
+        # (attempts so far, document)
+        self._queue: "queue.Queue[Tuple[int, dict]]" = queue.Queue(maxsize=self.config["max_queue"])
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.flushed = 0
+        self.inline_writes = 0
+        self.retried = 0
+        self.failed = 0
+        if self.config["durability"] == "flush_on_shutdown":
+            atexit.register(self.close)
+
+    def enqueue(self, document: dict) -> None:
+        """Queue a document; when the queue stays full (or is closed), write it on the caller's thread"""
+        if self._closed:
+            self._write_inline(document)
+            return
+        self._ensure_started()
+        try:
+            self._queue.put((0, document), timeout=self.config["enqueue_timeout"])
+        except queue.Full:
+            # Backpressure: the flusher is behind, so this request pays for its own write
+            self._wake.set()
+            self._write_inline(document)
+            return
+        if self._queue.qsize() >= self.config["batch_size"]:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write everything currently queued; returns the number of documents written
+
+        Failed batches are queued again for a later flush rather than retried in this loop.
+        """
+        written = 0
+        retry: List[Tuple[int, dict]] = []
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.config["batch_size"])
+                if not batch:
+                    break
+                if self._write([document for _, document in batch]):
+                    written += len(batch)
+                    self.flushed += len(batch)
+                else:
+                    retry.extend(batch)
+            self._requeue(retry)
+        return written
+
+    def pending(self) -> int:
+        """Number of documents waiting to be written"""
+        return self._queue.qsize()
+
+    def close(self) -> None:
+        """Stop the background thread and flush pending writes; later enqueues are written inline"""
+        self._closed = True
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.config["durability"] == "flush_on_shutdown":
+            # Failed batches are re-queued by flush, so give them their remaining attempts now
+            for _ in range(self.config["max_retries"] + 1):
+                self.flush()
+                if not self.pending():
+                    break
+
+    def _ensure_started(self) -> None:
+        """Start the flusher lazily so importing the module spawns no threads"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Wake on the interval, or early once a full batch is waiting
+            self._wake.wait(self.config["flush_interval"])
+            self._wake.clear()
+            if self._queue.qsize() > 0:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"⚠️ Write-behind flush error: {e}")
+
+    def _write(self, documents: List[dict]) -> bool:
+        try:
+            return bool(self.writer(documents))
+        except Exception as e:
+            print(f"⚠️ Write-behind write error: {e}")
+            return False
+
+    def _write_inline(self, document: dict) -> None:
+        self.inline_writes += 1
+        if self._write([document]):
+            self.flushed += 1
+        else:
+            self.failed += 1
+            print("⚠️ Write-behind inline write failed; message dropped")
+
+    def _requeue(self, entries: List[Tuple[int, dict]]) -> None:
+        """Queue failed documents for another attempt, dropping those out of retries or space"""
+        dropped = 0
+        for attempts, document in entries:
+            if attempts >= self.config["max_retries"]:
+                dropped += 1
+                continue
+            try:
+                self._queue.put_nowait((attempts + 1, document))
+                self.retried += 1
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            self.failed += dropped
+            print(f"⚠️ Write-behind dropped {dropped} message(s) after failed writes")
+
+    def _drain(self, limit: int) -> List[Tuple[int, dict]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
@@ -0,0 +1,62 @@
+"""Shared pytest setup: run from backend/ so `services`, `models` and `config` import as in the app"""
+import json
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Tests never talk to a real database or LLM provider
+os.environ.setdefault("MONGODB_URI", "")
+
+
+SAMPLE_BASICS = [
+    {"id": 1, "title": "Loft in SoHo", "price": 450000, "location": "New York, NY"},
+    {"id": 2, "title": "Beach Condo", "price": 380000, "location": "Miami, FL"},
+    {"id": 3, "title": "Family Villa", "price": 1200000, "location": "San Francisco, CA"},
+    {"id": 4, "title": "Starter Home", "price": 250000, "location": "Austin, TX"},
+    {"id": 5, "title": "Pier Apartment", "price": 900000, "location": "San Francisco, CA",
+     "latitude": 37.8080, "longitude": -122.4177},
+    {"id": 6, "title": "Ranch", "price": 300000, "location": "Nowhere, ZZ"},
+]
+SAMPLE_CHARACTERISTICS = [
+    {"id": 1, "bedrooms": 2, "bathrooms": 1, "size": 900, "amenities": ["Gym", "Parking"]},
+    {"id": 2, "bedrooms": 1, "bathrooms": 1, "size": 700, "amenities": ["Swimming Pool"]},
+    {"id": 3, "bedrooms": 5, "bathrooms": 4, "size": 3200, "amenities": ["Garage", "Swimming Pool", "Gym"]},
+    {"id": 4, "bedrooms": 3, "bathrooms": 2, "size": 1400, "amenities": ["Parking"]},
+    {"id": 5, "bedrooms": 2, "bathrooms": 2, "size": 1100, "amenities": []},
+    {"id": 6, "bedrooms": 4, "bathrooms": 2, "size": 2000, "amenities": ["Garage"]},
+]
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    """Small catalog in the three-file layout read by PropertyService"""
+    (tmp_path / "property_basics.json").write_text(json.dumps(SAMPLE_BASICS))
+    (tmp_path / "property_characteristics.json").write_text(json.dumps(SAMPLE_CHARACTERISTICS))
+    (tmp_path / "property_images.json").write_text(json.dumps([{"id": 1, "images": ["a.jpg"]}]))
+    return tmp_path
+
+
+@pytest.fixture
+def property_service(catalog_dir):
+    from services.property_service import PropertyService
+    return PropertyService(data_dir=str(catalog_dir))
+
+
+@pytest.fixture
+def api_client(property_service, monkeypatch):
+    """TestClient whose property routes use the sample catalog, a fresh memory store and saved cache"""
+    from fastapi.testclient import TestClient
+    from main import app
+    from routes import properties as property_routes
+    from services.saved_cache import SavedPropertiesCache
+    from services.state_store import MemoryStateBackend
+
+    monkeypatch.setattr(property_routes, "property_service", property_service)
+    monkeypatch.setattr(property_routes, "fallback_state", MemoryStateBackend())
+    monkeypatch.setattr(property_routes, "saved_properties_cache", SavedPropertiesCache(redis_url="", workers=1))
+    return TestClient(app)
@@ -0,0 +1,93 @@
+"""Async MongoDB access: Motor-style client when present, sync service in the threadpool otherwise"""
+import asyncio
+
+from config import MONGODB_CONFIG
+from mongodb_service import AsyncMongoDBService, _client_options, _save_operations
+
+
+class FakeSyncService:
+    """Records the sync methods the async service delegates to"""
+
+    def __init__(self):
+        self.calls = []
+        self.db = None
+
+    def is_available(self):
+        return True
+
+    def get_saved_properties(self, user_id):
+        self.calls.append(("get_saved_properties", user_id))
+        return [1, 2]
+
+    def save_properties(self, user_id, property_ids):
+        self.calls.append(("save_properties", user_id, property_ids))
+        return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncCollection:
+    def __init__(self):
+        self.docs = []
+        self.operations = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if d["user_id"] == query["user_id"]])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+
+
+def async_service(sync_service, db=None):
+    service = AsyncMongoDBService.__new__(AsyncMongoDBService)
+    service.sync_service = sync_service
+    service.client = db
+    service.db = db
+    return service
+
+
+def test_without_async_driver_calls_sync_service_in_threadpool():
+    sync = FakeSyncService()
+    service = async_service(sync)
+    assert asyncio.run(service.get_saved_properties("u1")) == [1, 2]
+    assert asyncio.run(service.save_properties("u1", [3]))
+    assert sync.calls == [("get_saved_properties", "u1"), ("save_properties", "u1", [3])]
+
+
+def test_async_driver_is_used_when_available():
+    collection = FakeAsyncCollection()
+    collection.docs = [{"user_id": "u1", "property_id": 7}, {"user_id": "u2", "property_id": 8}]
+    sync = FakeSyncService()
+    service = async_service(sync, {"saved_properties": collection})
+    assert asyncio.run(service.get_saved_properties("u1")) == [7]
+    assert asyncio.run(service.save_properties("u1", [3, 3, 4]))
+    assert len(collection.operations) == 2
+    assert sync.calls == []
+
+
+def test_bulk_save_operations_are_deduplicated_upserts():
+    operations = _save_operations("u1", [5, 6, 5])
+    assert [op._filter for op in operations] == [
+        {"user_id": "u1", "property_id": 5},
+        {"user_id": "u1", "property_id": 6},
+    ]
+    assert all(op._upsert for op in operations)
+
+
+def test_client_options_exclude_database_name():
+    options = _client_options()
+    assert "database" not in options
+    assert options["maxPoolSize"] == MONGODB_CONFIG["maxPoolSize"]
@@ -0,0 +1,46 @@
+"""Benchmark harness: latency summaries, results documents, regression comparison and catalog generation"""
+import json
+
+from benchmarks.compare import compare
+from benchmarks.generate_catalog import generate_catalog
+from benchmarks.results import measure, summarize, write_results
+from services.property_service import PropertyService
+
+
+def test_summarize_percentiles():
+    stats = summarize([float(ms) for ms in range(100, 0, -1)])
+    assert stats["runs"] == 100
+    assert (stats["min_ms"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"]) == (1, 50, 95, 99, 100)
+    assert stats["mean_ms"] == 50.5
+
+
+def test_measure_runs_warmup_untimed():
+    calls = []
+    stats = measure(lambda: calls.append(1), repeat=5, warmup=2)
+    assert len(calls) == 7 and stats["runs"] == 5
+
+
+def test_write_results_records_meta(tmp_path, capsys):
+    out = tmp_path / "head.json"
+    document = write_results("micro", {"search": {"p50_ms": 1.0}}, {"rows": 10}, str(out))
+    assert json.loads(out.read_text()) == document
+    assert document["meta"]["rows"] == 10 and document["meta"]["python"]
+
+
+def test_compare_flags_only_regressions_over_threshold():
+    base = {"results": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}, "gone": {"p50_ms": 1.0}}}
+    head = {"results": {"a": {"p50_ms": 10.5}, "b": {"p50_ms": 12.0}, "new": {"p50_ms": 1.0}}}
+    rows = {row[0]: row for row in compare(base, head, "p50_ms", 0.10)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"][4] and rows["b"][4]
+    assert abs(rows["b"][3] - 0.2) < 1e-9
+
+
+def test_generated_catalog_is_deterministic_and_loads(tmp_path):
+    first = generate_catalog(50, str(tmp_path / "one"), seed=7)
+    second = generate_catalog(50, str(tmp_path / "two"), seed=7)
+    for name in ("property_basics.json", "property_characteristics.json", "property_images.json"):
+        assert (first / name).read_text() == (second / name).read_text()
+        assert len(json.loads((first / name).read_text())) == 50
+    service = PropertyService(data_dir=str(first))
+    assert len(service.merge_property_data()) == 50
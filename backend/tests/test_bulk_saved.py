@@ -0,0 +1,37 @@
+"""Bulk save/remove endpoints for saved properties (memory fallback store)"""
+
+
+def saved_ids(api_client, user_id="u1"):
+    response = api_client.get(f"/api/properties/saved/{user_id}")
+    assert response.status_code == 200
+    return [p["id"] for p in response.json()["properties"]]
+
+
+def test_bulk_save_keeps_first_saved_order_and_deduplicates(api_client):
+    response = api_client.post("/api/properties/save/bulk", json={"user_id": "u1", "property_ids": [3, 1, 3]})
+    assert response.status_code == 200
+    assert response.json()["saved_properties"] == [3, 1]
+    assert response.json()["message"] == "Properties saved"
+    response = api_client.post("/api/properties/save/bulk", json={"user_id": "u1", "property_ids": [1, 2]})
+    assert response.json()["saved_properties"] == [3, 1, 2]
+    assert saved_ids(api_client) == [3, 1, 2]
+
+
+def test_bulk_save_rejects_unknown_ids(api_client):
+    response = api_client.post("/api/properties/save/bulk", json={"user_id": "u1", "property_ids": [1, 999]})
+    assert response.status_code == 404
+    assert "999" in response.json()["detail"]
+    assert saved_ids(api_client) == []
+
+
+def test_bulk_and_single_remove(api_client):
+    api_client.post("/api/properties/save/bulk", json={"user_id": "u1", "property_ids": [1, 2, 3, 4]})
+    response = api_client.post("/api/properties/saved/remove", json={"user_id": "u1", "property_ids": [2, 4]})
+    assert response.json()["saved_properties"] == [1, 3]
+    response = api_client.delete("/api/properties/saved/u1/1")
+    assert response.json() == {"message": "Property removed", "saved_properties": [3], "storage": "memory"}
+    assert saved_ids(api_client) == [3]
+
+
+def test_empty_bulk_request_is_invalid(api_client):
+    assert api_client.post("/api/properties/save/bulk", json={"user_id": "u1", "property_ids": []}).status_code == 422
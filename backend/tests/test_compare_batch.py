@@ -0,0 +1,84 @@
+"""Batched scoring (predict_many) and the N-way comparison built from it"""
+from services.ml_service import ComplexTrapModelRenamed, MLModelService
+
+PROPERTIES = [
+    {"id": 1, "price": 450000, "bedrooms": 2, "bathrooms": 1, "size": 900, "amenities": ["pool"]},
+    {"id": 2, "price": 800000, "bedrooms": 4, "bathrooms": 3, "size": 2400, "amenities": ["garage"]},
+    {"id": 3, "price": 300000, "bedrooms": 1, "bathrooms": 1, "size": 600, "amenities": []},
+]
+
+
+class BatchModel:
+    """Accepts a list of inputs and counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, data):
+        self.calls += 1
+        return [100000.0 * row["bedrooms"] for row in data]
+
+
+def ml_service_with(model):
+    service = MLModelService(model_path="/nonexistent/model.pkl")
+    service.model = model
+    return service
+
+
+def test_batch_capable_model_is_called_once():
+    model = BatchModel()
+    predictions = ml_service_with(model).predict_many(PROPERTIES)
+    assert model.calls == 1
+    assert [p.predicted_price for p in predictions] == [200000.0, 400000.0, 100000.0]
+    assert [p.listed_price for p in predictions] == [450000, 800000, 300000]
+
+
+def test_row_model_matches_single_predictions():
+    service = ml_service_with(ComplexTrapModelRenamed())
+    batch = service.predict_many(PROPERTIES)
+    single = [service.predict_from_property_data(p, property_id=p["id"]) for p in PROPERTIES]
+    assert [p.predicted_price for p in batch] == [p.predicted_price for p in single]
+    assert [p.property_id for p in batch] == [1, 2, 3]
+
+
+def test_build_comparison_columns_and_deltas(property_service):
+    rows = [{**p, "title": f"P{p['id']}", "size_sqft": p["size"]} for p in PROPERTIES]
+    predictions = [{"predicted_price": 500000.0}, None, {"predicted_price": 250000.0}]
+    comparison = property_service.build_comparison(rows, predictions)
+    columns, stats = comparison["columns"], comparison["stats"]
+    assert columns["title"] == ["P1", "P2", "P3"]
+    assert columns["price_vs_predicted"] == [-50000.0, None, 50000.0]
+    assert columns["amenity_count"] == [1, 1, 0]
+    assert stats["price"] == {"min": 300000, "max": 800000, "deltas": [150000, 500000, 0]}
+    assert stats["predicted_price"]["deltas"] == [250000.0, None, 0.0]
+
+
+def test_compare_batch_endpoint(api_client, monkeypatch):
+    from routes import properties as property_routes
+
+    monkeypatch.setattr(property_routes, "ml_service", ml_service_with(BatchModel()))
+    response = api_client.post("/api/properties/compare/batch", json={"property_ids": [2, 4, 2]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["property_ids"] == [2, 4]
+    assert [p["prediction"]["predicted_price"] for p in body["properties"]] == [100000.0, 300000.0]
+    missing = api_client.post("/api/properties/compare/batch", json={"property_ids": [1, 999]})
+    assert missing.status_code == 404
+    duplicates = api_client.post("/api/properties/compare/batch", json={"property_ids": [3, 3]})
+    assert duplicates.status_code == 400
+
+
+def test_invalid_rows_are_validated_and_reported_as_none():
+    model = BatchModel()
+    rows = PROPERTIES + [{"id": 4, "price": 1, "bedrooms": -1, "bathrooms": 1, "size": 500, "amenities": []}]
+    predictions = ml_service_with(model).predict_many(rows)
+    assert model.calls == 1
+    assert [p.predicted_price if p else None for p in predictions] == [200000.0, 400000.0, 100000.0, None]
+
+
+def test_single_and_batch_share_model_input():
+    service = ml_service_with(ComplexTrapModelRenamed())
+    row = {"id": 9, "price": 1, "bedrooms": 3, "bathrooms": 2, "size": None, "amenities": ["garage", "pool"]}
+    single = service.predict_from_property_data(row, property_id=9)
+    assert service.predict_many([row])[0].model_input == single.model_input
+    assert single.model_input["lot_area"] == 5000 and single.model_input["has_pool"] is True
@@ -0,0 +1,69 @@
+"""Lazy service container: build-once semantics, proxies, warm-up and cold import cost"""
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from services.container import ServiceContainer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Service:
+    def __init__(self):
+        self.value = 1
+
+
+def test_factory_runs_once_on_first_use_even_when_concurrent():
+    container = ServiceContainer()
+    builds = []
+    container.register("svc", lambda: builds.append(1) or Service())
+    assert builds == [] and not container.is_initialized("svc")
+    threads = [threading.Thread(target=container.get, args=("svc",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
+    assert container.get("svc") is container.get("svc")
+
+
+def test_proxy_forwards_attribute_reads_and_writes():
+    container = ServiceContainer()
+    container.register("svc", Service)
+    proxy = container.proxy("svc")
+    assert "lazy" in repr(proxy)
+    assert proxy.value == 1
+    proxy.value = 2
+    assert container.get("svc").value == 2
+    assert "initialized" in repr(proxy)
+
+
+def test_warm_up_reports_timings_and_survives_failures():
+    container = ServiceContainer()
+    container.register("ok", Service)
+    container.register("broken", lambda: 1 / 0)
+    timings = container.warm_up(["ok", "broken"])
+    assert set(timings) == {"ok", "broken"}
+    assert container.is_initialized("ok") and not container.is_initialized("broken")
+    with pytest.raises(KeyError):
+        container.get("missing")
+
+
+def test_importing_the_app_builds_no_services_and_skips_heavy_imports():
+    script = (
+        "import sys, main\n"
+        "from services.container import container\n"
+        "heavy = [m for m in ('pymongo', 'motor', 'tiktoken', 'openai') if m in sys.modules]\n"
+        "built = [n for n in ('property_service', 'ml_service', 'llm_service', 'chatbot_service', 'mongodb_service')"
+        " if container.is_initialized(n)]\n"
+        "print(heavy, built)\n"
+    )
+    env = {**os.environ, "MONGODB_URI": ""}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[] []"
@@ -0,0 +1,50 @@
+"""Facet counts: price bucket edges, one-pass counting, cached facets across pages and the faceted route"""
+from models.schemas import PropertyFilterRequest
+from services.facets import compute_facets, price_edges
+
+
+def test_price_edges_cover_every_price_with_round_steps():
+    prices = [120000, 250000, 380000, 410000, 990000]
+    edges = price_edges(prices, 4)
+    assert edges[0] <= min(prices) and edges[-1] > max(prices)
+    steps = {b - a for a, b in zip(edges, edges[1:-1])}
+    assert len(steps) == 1 and steps.pop() % 50000 == 0
+    assert price_edges([], 4) == []
+    assert price_edges([5, 5], 4) == [5, 6]
+
+
+def test_compute_facets_counts_all_columns():
+    properties = [
+        {"location": "A", "bedrooms": 2, "price": 100, "amenities": ["Gym", "Pool"]},
+        {"location": "A", "bedrooms": 7, "price": 250, "amenities": ["Gym"]},
+        {"location": None, "bedrooms": None, "price": "n/a"},
+    ]
+    facets = compute_facets(properties, [100, 200, 300])
+    assert facets["locations"] == {"A": 2, "unknown": 1}
+    assert facets["bedrooms"] == {"2": 1, "5+": 1, "unknown": 1}
+    assert [bucket["count"] for bucket in facets["price"]] == [1, 1]
+    assert facets["amenities"] == {"Gym": 2, "Pool": 1}
+
+
+def test_search_with_facets_counts_all_matches_not_the_page(property_service):
+    filters = PropertyFilterRequest(location="San Francisco")
+    page, total, facets = property_service.search_with_facets(filters=filters, limit=1)
+    assert len(page) == 1 and total == 2
+    assert facets["locations"] == {"San Francisco, CA": 2}
+    assert sum(bucket["count"] for bucket in facets["price"]) == 2
+
+    second, _, cached = property_service.search_with_facets(filters=filters, offset=1, limit=1, sort_by="price")
+    assert second[0]["id"] == 3
+    assert cached is facets
+
+
+def test_faceted_route(api_client):
+    response = api_client.post(
+        "/api/properties/search/faceted?limit=2&sort_by=price&sort_order=desc",
+        json={}
+    )
+    body = response.json()
+    assert response.status_code == 200
+    assert body["total"] == 6 and body["count"] == 2 and body["offset"] == 0
+    assert [p["id"] for p in body["properties"]] == [3, 5]
+    assert body["facets"]["bedrooms"] == {"1": 1, "2": 2, "3": 1, "4": 1, "5+": 1}
@@ -0,0 +1,35 @@
+"""orjson rendering: same bytes as the stdlib fallback and same shape as the Pydantic response models"""
+import json
+
+from services import fast_json
+from services.fast_json import FastJSONResponse, dumps
+
+
+PAYLOAD = {"title": "Café", "price": 450000.0, "tags": ["a", "b"], "score": None, "nested": {"ok": True}}
+
+
+def test_dumps_is_compact_utf8_json():
+    body = dumps(PAYLOAD)
+    assert json.loads(body) == PAYLOAD
+    assert b", " not in body and b": " not in body
+    assert "Café".encode() in body
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    fast = dumps(PAYLOAD)
+    monkeypatch.setattr(fast_json, "_orjson_available", False)
+    assert dumps(PAYLOAD) == fast
+    assert json.loads(dumps({1: "x"})) == {"1": "x"}
+
+
+def test_response_renders_with_dumps():
+    response = FastJSONResponse({"count": 1})
+    assert response.body == dumps({"count": 1})
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_property_payloads_match_response_model(property_service):
+    properties = property_service.merge_property_data()
+    payloads = property_service.property_payloads(properties)
+    expected = [property_service.convert_to_property_response(p).model_dump(mode="json") for p in properties]
+    assert dumps(payloads) == dumps(expected)
@@ -0,0 +1,83 @@
+"""Geocoding, grid index queries and spatial search filters"""
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from models.schemas import PropertyFilterRequest
+from services.geo import CITY_COORDINATES, GeoIndex, geocode, haversine_km, in_bounds, property_coordinates
+
+
+def test_geocode_accepts_city_with_or_without_state():
+    assert geocode("San Francisco, CA") == CITY_COORDINATES["san francisco, ca"]
+    assert geocode("  seattle ") == CITY_COORDINATES["seattle, wa"]
+    assert geocode("Atlantis") is None
+
+
+def test_property_coordinates_prefers_listing_coordinates():
+    assert property_coordinates({"latitude": 1.5, "longitude": 2.5, "location": "Austin, TX"}) == (1.5, 2.5, False)
+
+
+def test_centroid_coordinates_are_exact_centroid_and_marked_approximate():
+    lat, lon, approximate = property_coordinates({"id": 1, "location": "New York, NY"})
+    assert (lat, lon) == CITY_COORDINATES["new york, ny"]
+    assert approximate is True
+    assert property_coordinates({"id": 2, "location": "Atlantis"}) is None
+
+
+def test_haversine_known_distance():
+    # New York to Boston is about 306 km
+    ny, boston = CITY_COORDINATES["new york, ny"], CITY_COORDINATES["boston, ma"]
+    assert haversine_km(*ny, *boston) == pytest.approx(306, abs=3)
+
+
+def test_grid_queries_match_brute_force():
+    rng = random.Random(3)
+    points = [(rng.uniform(30, 31), rng.uniform(-98, -97)) for _ in range(2000)] + [None]
+    index = GeoIndex(cell_degrees=0.05).build(points)
+
+    center, radius = (30.5, -97.5), 12.0
+    expected = [i for i, p in enumerate(points) if p and haversine_km(*center, *p) <= radius]
+    assert index.query_radius(*center, radius) == expected
+
+    bounds = (30.2, -97.9, 30.4, -97.6)
+    assert index.query_bounds(bounds) == [i for i, p in enumerate(points) if p and in_bounds(*p, bounds)]
+    # A box much larger than the occupied cells takes the sparse path and still agrees
+    huge = (-90, -180, 90, 180)
+    assert index.query_bounds(huge) == [i for i, p in enumerate(points) if p]
+
+
+def test_filter_request_validates_geo_fields():
+    with pytest.raises(ValidationError):
+        PropertyFilterRequest(radius_km=5)
+    with pytest.raises(ValidationError):
+        PropertyFilterRequest(min_latitude=1, max_latitude=2)
+    with pytest.raises(ValidationError):
+        PropertyFilterRequest(min_latitude=3, max_latitude=2, min_longitude=0, max_longitude=1)
+
+
+def test_radius_search_and_distance_sort(property_service):
+    pier = (37.8080, -122.4177)
+    filters = PropertyFilterRequest(latitude=pier[0], longitude=pier[1], radius_km=10)
+    results = property_service.search_properties(filters=filters, sort_by="distance", limit=10)
+    assert [p["id"] for p in results] == [5, 3]
+
+    # Candidate subsets are filtered by scanning and give the same answer
+    catalog = property_service.merge_property_data()
+    assert [p["id"] for p in property_service.filter_properties(list(catalog), filters)] == [3, 5]
+
+
+def test_bounding_box_search(property_service):
+    # Roughly Florida and Texas
+    filters = PropertyFilterRequest(min_latitude=24, max_latitude=33, min_longitude=-100, max_longitude=-79)
+    assert {p["id"] for p in property_service.search_properties(filters=filters, limit=10)} == {2, 4}
+
+
+def test_responses_expose_approximate_flag(property_service):
+    centroid = property_service.get_property_by_id(1)
+    exact = property_service.get_property_by_id(5)
+    unknown = property_service.get_property_by_id(6)
+    payloads = property_service.property_payloads([centroid, exact, unknown])
+    assert [p["coordinates_approximate"] for p in payloads] == [True, False, False]
+    assert payloads[2]["latitude"] is None
+    assert property_service.convert_to_property_response(centroid).coordinates_approximate is True
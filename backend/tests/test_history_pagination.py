@@ -0,0 +1,78 @@
+"""Chat history paging: a default page size without a limit, and a (timestamp, tiebreak) cursor"""
+import pytest
+
+from services.history_store import BoundedHistoryStore
+from services.state_store import MemoryStateBackend, SQLiteStateBackend
+
+
+def message(n, timestamp):
+    return {"id": str(n), "type": "user", "text": f"m{n}", "timestamp": timestamp}
+
+
+# Messages 2-5 share one timestamp, as a user/bot pair written in the same instant can
+MESSAGES = [
+    message(1, "2024-01-01T10:00:00"),
+    message(2, "2024-01-01T10:00:01"),
+    message(3, "2024-01-01T10:00:01"),
+    message(4, "2024-01-01T10:00:01"),
+    message(5, "2024-01-01T10:00:01"),
+    message(6, "2024-01-01T10:00:02"),
+]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    store = MemoryStateBackend() if request.param == "memory" else SQLiteStateBackend(str(tmp_path / "state.db"))
+    store.append_messages([dict(m, user_id="u1") for m in MESSAGES])
+    return store
+
+
+def ids(page):
+    return [m["id"] for m in page]
+
+
+def test_no_limit_returns_default_page(backend, monkeypatch):
+    from config import CHAT_HISTORY_CONFIG
+    page, next_before = backend.get_history_page("u1")
+    assert ids(page) == ["1", "2", "3", "4", "5", "6"]
+    assert next_before is None
+    monkeypatch.setitem(CHAT_HISTORY_CONFIG, "default_page_size", 4)
+    page, next_before = backend.get_history_page("u1")
+    assert ids(page) == ["3", "4", "5", "6"]
+    older, _ = backend.get_history_page("u1", next_before)
+    assert ids(older) == ["1", "2"]
+
+
+def test_pages_do_not_skip_messages_sharing_the_boundary_timestamp(backend):
+    seen = []
+    before = None
+    while True:
+        page, before = backend.get_history_page("u1", before, 2)
+        seen = ids(page) + seen
+        if before is None:
+            break
+    assert seen == ["1", "2", "3", "4", "5", "6"]
+
+
+def test_bare_timestamp_cursor_still_accepted(backend):
+    page, _ = backend.get_history_page("u1", "2024-01-01T10:00:01", 10)
+    assert ids(page) == ["1"]
+
+
+def test_explicit_limit_is_capped(backend, monkeypatch):
+    from config import CHAT_HISTORY_CONFIG
+    monkeypatch.setitem(CHAT_HISTORY_CONFIG, "max_page_size", 3)
+    page, next_before = backend.get_history_page("u1", None, 100)
+    assert ids(page) == ["4", "5", "6"]
+    assert next_before is not None
+
+
+def test_memory_store_evicts_oldest_messages_and_users():
+    store = BoundedHistoryStore(max_messages_per_user=2, max_users=2)
+    for n in range(3):
+        store.append("a", message(n, f"t{n}"))
+    store.append("b", message(9, "t9"))
+    store.append("c", message(9, "t9"))
+    assert "a" not in store
+    assert ids(store.get("b")) == ["9"]
+    assert len(store) == 2
@@ -0,0 +1,42 @@
+"""Chat history stores property id references and re-hydrates them from the catalog on read"""
+from models.schemas import PropertyResponse
+
+
+def make_chatbot(property_service):
+    from services.chatbot_service import ChatbotService
+
+    service = ChatbotService()
+    service.property_service = property_service
+    return service
+
+
+def test_refs_keep_ids_and_prediction_snapshot(property_service):
+    chatbot = make_chatbot(property_service)
+    responses = [
+        PropertyResponse(id=1, title="Loft", price=450000, location="New York, NY", bedrooms=2, bathrooms=1,
+                         size=900, amenities=[], images=[], prediction={"predicted_price": 470000, "listed_price": 450000, "extra": 1}),
+        PropertyResponse(id=4, title="Starter Home", price=250000, location="Austin, TX", bedrooms=3,
+                         bathrooms=2, size=1400, amenities=[], images=[]),
+    ]
+    refs = chatbot._property_refs(responses)
+    assert refs == {
+        "property_ids": [1, 4],
+        "predictions": {"1": {"predicted_price": 470000, "listed_price": 450000}},
+    }
+
+
+def test_hydrate_reattaches_catalog_rows(property_service):
+    chatbot = make_chatbot(property_service)
+    messages = [
+        {"id": "1", "type": "user", "text": "lofts"},
+        {"id": "2", "type": "bot", "text": "found", "property_ids": [1, 999, 4],
+         "predictions": {"1": {"predicted_price": 470000, "listed_price": 450000}}},
+    ]
+    hydrated = chatbot._hydrate_messages(messages)
+    assert hydrated[0] == messages[0]
+    properties = hydrated[1]["properties"]
+    # Ids no longer in the catalog are skipped
+    assert [p["id"] for p in properties] == [1, 4]
+    assert properties[0]["title"] == "Loft in SoHo"
+    assert properties[0]["prediction"] == {"predicted_price": 470000, "listed_price": 450000}
+    assert properties[1]["prediction"] is None
@@ -0,0 +1,62 @@
+"""HTTP caching: weak ETags, Accept-Encoding negotiation, the encoded body cache and 304 revalidation"""
+import gzip
+import json
+
+from services import http_cache
+from services.http_cache import EncodedBodyCache, etag_matches, make_etag, negotiate_encoding
+
+
+def test_etag_weak_comparison():
+    etag = make_etag("properties", "v1")
+    assert etag.startswith('W/"') and etag != make_etag("properties", "v2")
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag[2:], etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_negotiate_encoding_honours_q_values(monkeypatch):
+    monkeypatch.setattr(http_cache, "_brotli_available", False)
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*;q=0.5") == "gzip"
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_encoded_body_cache_is_bounded_by_bytes():
+    cache = EncodedBodyCache(max_bytes=10)
+    cache.set("a", None, b"12345")
+    cache.set("b", None, b"12345")
+    cache.set("c", "gzip", b"123")
+    assert cache.get("a", None) is None
+    assert cache.get("c", "gzip") == b"123"
+    assert cache.bytes == 8
+    cache.set("huge", None, b"x" * 11)
+    assert cache.get("huge", None) is None
+
+
+def test_properties_revalidate_with_304_and_gzip(api_client, monkeypatch):
+    monkeypatch.setitem(http_cache.HTTP_CACHE_CONFIG, "min_compress_bytes", 0)
+    first = api_client.get("/api/properties", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json()["count"] == 6
+    etag = first.headers["etag"]
+
+    again = api_client.get("/api/properties", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+
+    plain = api_client.get("/api/properties", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert json.loads(plain.content) == json.loads(gzip.decompress(http_cache.encoded_bodies.get(etag, "gzip")))
+
+
+def test_saved_etag_changes_with_the_saved_set(api_client):
+    before = api_client.get("/api/properties/saved/alice").headers["etag"]
+    api_client.post("/api/properties/save", json={"user_id": "alice", "property_id": 2})
+    after = api_client.get("/api/properties/saved/alice", headers={"If-None-Match": before})
+    assert after.status_code == 200 and after.headers["etag"] != before
+    assert [p["id"] for p in after.json()["properties"]] == [2]
@@ -0,0 +1,67 @@
+"""LLM backends: local OpenAI-compatible HTTP adapter and per-call-type routing"""
+import httpx
+
+from services import llm_backends
+from services.llm_backends import LLMBackend, LocalHTTPBackend, create_backend
+
+
+def test_local_http_backend_posts_chat_completion():
+    seen = {}
+
+    def handler(request):
+        seen["url"] = str(request.url)
+        seen["auth"] = request.headers.get("authorization")
+        seen["body"] = request.read()
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "  hi there  "}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3},
+        })
+
+    backend = LocalHTTPBackend(base_url="http://localhost:8080/v1/", api_key="key")
+    backend.client = httpx.Client(
+        base_url=backend.base_url, headers={"Authorization": "Bearer key"}, transport=httpx.MockTransport(handler)
+    )
+    result = backend.complete([{"role": "user", "content": "hi"}], "llama", 0.2, 50, timeout=1.0)
+    assert result == {"content": "hi there", "usage": {"prompt_tokens": 12, "completion_tokens": 3}}
+    assert seen["url"] == "http://localhost:8080/v1/chat/completions"
+    assert seen["auth"] == "Bearer key"
+    assert b'"max_tokens":50' in seen["body"].replace(b" ", b"")
+
+
+def test_unknown_backend_is_none():
+    assert create_backend("nope") is None
+
+
+class FakeBackend(LLMBackend):
+    def __init__(self, name, reply):
+        self.name = name
+        self.reply = reply
+        self.models = []
+
+    def is_available(self):
+        return True
+
+    def complete(self, messages, model, temperature, max_tokens, timeout=None):
+        self.models.append((model, max_tokens))
+        return {"content": self.reply, "usage": None}
+
+
+def test_call_types_route_to_their_backend_and_model(monkeypatch):
+    from services.llm_service import LLMService
+
+    extract = FakeBackend("local", '{"location": "Austin"}')
+    respond = FakeBackend("openai", "Here you go")
+    monkeypatch.setattr(llm_backends, "BACKEND_FACTORIES", {"local": lambda: extract, "openai": lambda: respond})
+    service = LLMService(routes={
+        "extract_preferences": {"backend": "local", "model": "small"},
+        "extract_property_name": {"backend": "local", "model": "small"},
+        "generate_response": {"backend": "openai", "model": "large"},
+    })
+    assert service.extract_preferences("homes in austin") == {"location": "Austin"}
+    assert service._generate_response("tell me more", [], {}, "open_ended") == "Here you go"
+    assert [model for model, _ in extract.models] == ["small"]
+    assert [model for model, _ in respond.models] == ["large"]
+    # Without provider usage, tokens are counted locally
+    usage = service.get_token_usage()
+    assert usage["extract_preferences"]["calls"] == 1
+    assert usage["extract_preferences"]["prompt_tokens"] > 0
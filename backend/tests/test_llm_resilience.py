@@ -0,0 +1,150 @@
+"""Circuit breaker state machine and LLMResilience call paths"""
+import threading
+import time
+
+import pytest
+
+from services.llm_resilience import CircuitBreaker, LLMResilience, LLMUnavailableError
+
+
+def make_breaker(cooldown=0.05):
+    return CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, slow_call_seconds=1.0, cooldown=cooldown)
+
+
+def make_resilience(**config):
+    base = {
+        "max_concurrency": 1,
+        "queue_timeout": 0.05,
+        "max_retries": 0,
+        "backoff_base": 0.0,
+        "backoff_max": 0.0,
+        "breaker_window": 4,
+        "breaker_min_calls": 2,
+        "breaker_failure_ratio": 0.5,
+        "breaker_slow_call_seconds": 1.0,
+        "breaker_cooldown": 0.05,
+    }
+    base.update(config)
+    return LLMResilience(config=base, deadlines={"stage": 2.0})
+
+
+def trip(breaker):
+    breaker.record(False, 0.0)
+    breaker.record(False, 0.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_opens_on_failure_ratio_and_rejects():
+    breaker = make_breaker(cooldown=60)
+    assert breaker.allow()
+    trip(breaker)
+    assert not breaker.allow()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker()
+    breaker.record(True, 5.0)
+    breaker.record(True, 5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_admits_single_probe_then_closes_on_success():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_release_probe_frees_half_open_slot():
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_half_open_probe_rejected_by_saturated_semaphore_does_not_wedge_breaker():
+    resilience = make_resilience()
+    trip(resilience.breaker)
+    time.sleep(0.06)
+
+    # Hold the only concurrency slot so the probe times out waiting for it
+    assert resilience._semaphore.acquire()
+    try:
+        with pytest.raises(LLMUnavailableError, match="concurrency"):
+            resilience.call("stage", lambda timeout: "never")
+    finally:
+        resilience._semaphore.release()
+
+    assert resilience.breaker.state == CircuitBreaker.HALF_OPEN
+    # The next caller gets the probe and a success closes the breaker
+    assert resilience.call("stage", lambda timeout: "ok") == "ok"
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_rejects_without_calling():
+    resilience = make_resilience(breaker_cooldown=60)
+    trip(resilience.breaker)
+    calls = []
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        resilience.call("stage", lambda timeout: calls.append(timeout))
+    assert calls == []
+
+
+def test_retries_transient_failures_within_deadline():
+    resilience = make_resilience(max_retries=2, breaker_min_calls=10)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise RuntimeError("transient")
+        return "ok"
+
+    assert resilience.call("stage", flaky) == "ok"
+    assert len(attempts) == 3
+    assert all(0 < timeout <= 2.0 for timeout in attempts)
+
+
+def test_gives_up_after_max_retries():
+    resilience = make_resilience(max_retries=1, breaker_min_calls=10)
+    with pytest.raises(RuntimeError):
+        resilience.call("stage", lambda timeout: (_ for _ in ()).throw(RuntimeError("down")))
+
+
+def test_semaphore_bounds_concurrency():
+    resilience = make_resilience(max_concurrency=2, queue_timeout=1.0)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(timeout):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=resilience.call, args=("stage", work)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 2
@@ -0,0 +1,74 @@
+"""Prometheus-style metrics: histograms, counters, cache collectors and the /metrics endpoint"""
+import asyncio
+
+from config import METRICS_CONFIG
+from services.metrics import MetricsRegistry, timed
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    latency.observe(0.05, "a")
+    latency.observe(0.5, "a")
+    latency.observe(5.0, "a")
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
+    assert 'test_seconds_sum{stage="a"} 5.55' in text
+
+
+def test_counter_and_cache_collectors():
+    registry = MetricsRegistry()
+    turns = registry.counter("test_turns_total", "Turns", ("path",))
+    turns.inc("search")
+    turns.inc("search", amount=2)
+    registry.register_cache("results", lambda: {"hits": 3, "misses": 1, "hit_rate": 0.75})
+    registry.register_cache("broken", lambda: 1 / 0)
+    registry.register_collector(lambda: ["custom_metric 1"])
+    text = registry.render()
+    assert 'test_turns_total{path="search"} 3' in text
+    assert 'app_cache_hits_total{cache="results"} 3' in text
+    assert 'app_cache_hit_ratio{cache="results"} 0.75' in text
+    assert 'cache="broken"' not in text
+    assert text.endswith("custom_metric 1\n")
+
+
+def test_timed_decorator_handles_sync_async_and_errors():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_stage_seconds", "Stage", ("stage",))
+
+    @timed(latency, "sync")
+    def work():
+        raise ValueError
+
+    @timed(latency, "async")
+    async def async_work():
+        return 1
+
+    try:
+        work()
+    except ValueError:
+        pass
+    assert asyncio.run(async_work()) == 1
+    text = registry.render()
+    assert 'test_stage_seconds_count{stage="sync"} 1' in text
+    assert 'test_stage_seconds_count{stage="async"} 1' in text
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setitem(METRICS_CONFIG, "enabled", False)
+    registry = MetricsRegistry()
+    registry.counter("test_total", "Test").inc()
+    assert "test_total 1" not in registry.render()
+
+
+def test_metrics_endpoint_labels_requests_by_handler(api_client):
+    api_client.get("/api/properties")
+    response = api_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'app_http_request_duration_seconds_count{method="GET",handler="get_all_properties",status="200"}' in response.text
+    assert 'app_cache_hits_total{cache="search_results"}' in response.text
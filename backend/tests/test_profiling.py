@@ -0,0 +1,64 @@
+"""X-Profile signatures and access to the /admin/profiles and /api/startup endpoints"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import PROFILING_CONFIG
+from services.profiling import sign_profile_header, verify_profile_header
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "secret", SECRET)
+    monkeypatch.setitem(PROFILING_CONFIG, "header_max_age", 30)
+    return SECRET
+
+
+def test_signature_is_bound_to_method_and_path(secret):
+    header = sign_profile_header(secret, "GET", "/api/properties")
+    assert verify_profile_header(header, "GET", "/api/properties")
+    assert not verify_profile_header(header, "GET", "/admin/profiles")
+    assert not verify_profile_header(header, "POST", "/api/properties")
+    assert not verify_profile_header(sign_profile_header("other", "GET", "/api/properties"), "GET", "/api/properties")
+
+
+def test_signature_expires(secret):
+    stale = sign_profile_header(secret, "GET", "/x", int(time.time()) - 31)
+    assert not verify_profile_header(stale, "GET", "/x")
+    assert not verify_profile_header("garbage", "GET", "/x")
+
+
+@pytest.fixture
+def client():
+    from main import app
+    return TestClient(app)
+
+
+def test_admin_profiles_closed_without_secret(client, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "secret", "")
+    monkeypatch.setitem(PROFILING_CONFIG, "enabled", True)
+    assert client.get("/admin/profiles").status_code == 404
+
+
+def test_admin_profiles_require_signature_for_that_path(client, secret):
+    assert client.get("/admin/profiles").status_code == 403
+    replayed = sign_profile_header(secret, "GET", "/api/properties")
+    assert client.get("/admin/profiles", headers={"X-Profile": replayed}).status_code == 403
+    signed = sign_profile_header(secret, "GET", "/admin/profiles")
+    response = client.get("/admin/profiles", headers={"X-Profile": signed})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_startup_timings_gated_like_profiles(client, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "secret", "")
+    assert client.get("/api/startup").status_code == 404
+    monkeypatch.setitem(PROFILING_CONFIG, "secret", SECRET)
+    assert client.get("/api/startup").status_code == 403
+    signed = sign_profile_header(SECRET, "GET", "/api/startup")
+    response = client.get("/api/startup", headers={"X-Profile": signed})
+    assert response.status_code == 200
+    assert set(response.json()) == {"imports_ms", "services"}
@@ -0,0 +1,73 @@
+"""Prompt token budgets, including the conservative estimate used without tiktoken"""
+import pytest
+
+from services import prompt_builder as prompt_builder_module
+from services.prompt_builder import PromptBuilder, count_message_tokens, count_tokens, truncate_to_tokens
+
+
+@pytest.fixture(autouse=True)
+def no_tiktoken(monkeypatch):
+    monkeypatch.setattr(prompt_builder_module, "_tiktoken", lambda: None)
+
+
+def test_estimate_errs_high():
+    assert count_tokens("") == 0
+    assert count_tokens("a" * 400) == 134
+    assert count_tokens("日本語のテキスト") == 8
+    assert count_tokens("café") == 2
+
+
+@pytest.mark.parametrize("text", ["word " * 500, "日本語" * 300, "mixé " * 400])
+def test_truncate_stays_within_budget(text):
+    truncated = truncate_to_tokens(text, 50)
+    assert count_tokens(truncated) <= 50
+    assert text.startswith(truncated)
+    assert truncate_to_tokens("short", 50) == "short"
+    assert truncate_to_tokens(text, 0) == ""
+
+
+@pytest.mark.parametrize("stage", ["extract_preferences", "extract_property_name"])
+def test_extraction_messages_fit_prompt_budget(stage):
+    builder = PromptBuilder()
+    messages = builder.extraction_messages(stage, "find me a house " * 200, "gpt-3.5-turbo")
+    assert count_message_tokens(messages) <= builder.budgets[stage]["prompt"]
+
+
+def test_response_messages_drop_properties_to_fit():
+    builder = PromptBuilder()
+    properties = [
+        {"title": f"Listing {n} " * 10, "location": "Austin, TX", "price": 400000, "bedrooms": 3, "bathrooms": 2}
+        for n in range(20)
+    ]
+    messages = builder.response_messages("3 beds in austin", properties, {"location": "Austin"}, "gpt-3.5-turbo")
+    assert count_message_tokens(messages) <= builder.budgets["generate_response"]["prompt"]
+    assert "Found 20" in messages[1]["content"]
+
+
+class OfflineTiktoken:
+    """tiktoken whose BPE download fails, as on a host without network access"""
+
+    calls = 0
+
+    def encoding_for_model(self, model):
+        raise KeyError(model)
+
+    def get_encoding(self, name):
+        OfflineTiktoken.calls += 1
+        raise OSError("could not download cl100k_base")
+
+
+def test_encoding_load_failure_falls_back_to_estimate(monkeypatch, capsys):
+    monkeypatch.setattr(prompt_builder_module, "_tiktoken", lambda: OfflineTiktoken())
+    monkeypatch.setattr(prompt_builder_module, "_encoding_error_logged", False)
+    prompt_builder_module._encoding.cache_clear()
+    try:
+        assert count_tokens("a" * 400) == 134
+        assert truncate_to_tokens("word " * 500, 50)
+        builder = PromptBuilder()
+        messages = builder.extraction_messages("extract_preferences", "3 beds in austin", "gpt-3.5-turbo")
+        assert "3 beds in austin" in messages[-1]["content"]
+    finally:
+        prompt_builder_module._encoding.cache_clear()
+    assert OfflineTiktoken.calls == 1
+    assert capsys.readouterr().out.count("tiktoken encoding unavailable") == 1
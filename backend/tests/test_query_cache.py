@@ -0,0 +1,55 @@
+"""Search result cache: canonical keys, LRU/byte bounds and catalog-version invalidation"""
+import json
+
+from models.schemas import PropertyFilterRequest
+from services.query_cache import QueryResultCache, canonical_key
+
+
+def test_equivalent_searches_share_a_key():
+    a = canonical_key({"location": "Austin", "amenities": ["Pool", "gym"], "bedrooms": None}, "Loft", "price", "ASC", 10)
+    b = canonical_key({"amenities": ["GYM", "pool", "pool"], "location": "austin"}, "loft", "price", "asc", 10)
+    assert a == b
+    assert a != canonical_key({"location": "Austin"}, None, None, "asc", 10)
+    # Sort order is irrelevant without a sort field
+    assert canonical_key(None, None, None, "asc", 5) == canonical_key(None, None, None, "desc", 5)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = QueryResultCache(max_entries=2, max_bytes=10_000_000)
+    for key in ("a", "b"):
+        cache.get(key, 1)
+        cache.set(key, 1, [1])
+    cache.get("a", 1)
+    cache.set("c", 1, [1])
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == [1]
+    assert cache.stats()["evictions"] == 1
+    small = QueryResultCache(max_entries=100, max_bytes=300)
+    small.get("a", 1)
+    small.set("a", 1, list(range(1000)))
+    assert small.get("a", 1) is None
+
+
+def test_newer_catalog_version_invalidates_and_stale_results_are_not_stored():
+    cache = QueryResultCache(max_entries=10, max_bytes=10_000_000)
+    cache.get("k", 1)
+    cache.set("k", 1, [1, 2])
+    assert cache.get("k", 2) is None
+    assert cache.stats()["invalidations"] == 1
+    # A search that started on version 1 finishes after the reload
+    cache.set("k", 1, [1, 2])
+    assert cache.get("k", 2) is None
+
+
+def test_property_service_serves_cached_results_until_reload(property_service, catalog_dir):
+    filters = PropertyFilterRequest(location="San Francisco")
+    first = property_service.search_properties(filters=filters)
+    assert [p["id"] for p in first] == [3, 5]
+    assert property_service.search_properties(filters=filters) == first
+    assert property_service.query_cache.stats()["hits"] == 1
+
+    basics = json.loads((catalog_dir / "property_basics.json").read_text())
+    basics[2]["location"] = "Austin, TX"
+    (catalog_dir / "property_basics.json").write_text(json.dumps(basics))
+    property_service.clear_cache()
+    assert [p["id"] for p in property_service.search_properties(filters=filters)] == [5]
@@ -0,0 +1,66 @@
+"""Template response mode: intent classification, per-intent LLM policy and rendering"""
+import pytest
+
+from services.response_templates import ResponseTemplateEngine, classify_intent, should_use_llm
+
+PROPERTIES = [
+    {"id": 1, "title": "Loft", "price": 450000, "location": "Austin, TX"},
+    {"id": 2, "title": "Villa", "price": 900000, "location": "Austin, TX"},
+]
+
+
+@pytest.mark.parametrize("properties, preferences, name, wants_prediction, intent", [
+    ([], {"location": "Austin"}, None, False, "no_results"),
+    (PROPERTIES, {}, "Loft", False, "property_detail"),
+    ([{**PROPERTIES[0], "prediction": {"predicted_price": 1}}], {}, None, True, "prediction"),
+    (PROPERTIES, {"sort_by": "price_asc"}, None, False, "cheapest"),
+    (PROPERTIES, {"sort_by": "price_desc"}, None, False, "most_expensive"),
+    (PROPERTIES, {"bedrooms": 2}, None, False, "search"),
+    (PROPERTIES, {}, None, False, "open_ended"),
+])
+def test_classify_intent(properties, preferences, name, wants_prediction, intent):
+    assert classify_intent(properties, preferences, name, wants_prediction) == intent
+
+
+def test_should_use_llm_modes():
+    assert should_use_llm("search", "llm")
+    assert not should_use_llm("open_ended", "template")
+    assert not should_use_llm("search", "auto")
+    assert should_use_llm("open_ended", "auto")
+
+
+def test_render_search_summary():
+    engine = ResponseTemplateEngine(max_listed=2)
+    text = engine.render(PROPERTIES, {"location": "Austin", "max_price": 1000000}, "search")
+    assert text.startswith("I found 2 properties in Austin under $1,000,000, priced from $450,000 to $900,000.")
+    assert "The most affordable option is Loft at $450,000." in text
+    assert "Top matches include Loft in Austin, TX and Villa in Austin, TX." in text
+
+
+@pytest.mark.parametrize("intent, expected", [
+    ("most_expensive", "The most expensive is Villa at $900,000."),
+    ("cheapest", "The most affordable option is Loft at $450,000."),
+])
+def test_render_skips_rows_without_a_price(intent, expected):
+    unpriced = {"id": 3, "title": "Shack", "price": None, "location": "Austin, TX"}
+    assert expected in ResponseTemplateEngine().render(PROPERTIES + [unpriced], {}, intent)
+
+
+def test_render_no_results_and_prediction():
+    engine = ResponseTemplateEngine()
+    assert engine.render([], {"bedrooms": 3}, "no_results").startswith("I couldn't find any 3-bedroom properties.")
+    predicted = [{**PROPERTIES[0], "prediction": {"predicted_price": 495000, "listed_price": 450000}}]
+    assert "about 10% above its listed price of $450,000" in engine.render(predicted, {}, "prediction")
+
+
+def test_generate_response_skips_llm_for_template_intents(monkeypatch):
+    from services.llm_service import LLMService
+
+    service = LLMService()
+    monkeypatch.setattr(service, "_backend_for", lambda stage: object())
+    calls = []
+    monkeypatch.setattr(service, "_generate_response", lambda *args: calls.append(args) or "llm")
+    assert service.generate_response("cheap lofts", PROPERTIES, {"sort_by": "price_asc"}).startswith("I found 2")
+    assert calls == []
+    assert service.generate_response("tell me more", PROPERTIES, {}) == "llm"
+    assert len(calls) == 1
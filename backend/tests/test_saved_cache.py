@@ -0,0 +1,118 @@
+"""Saved-set cache: local LRU, Redis-first reads with a short local TTL, and multi-worker gating"""
+import pytest
+
+from services import saved_cache as saved_cache_module
+from services.saved_cache import SavedPropertiesCache
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the redis client methods the cache uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(saved_cache_module.time, "monotonic", fake)
+    return fake
+
+
+def shared_cache(redis_client, local_ttl=1.0):
+    cache = SavedPropertiesCache(max_users=10, redis_url="", local_ttl=local_ttl)
+    cache.redis = redis_client
+    return cache
+
+
+def test_local_cache_hits_misses_and_in_place_updates():
+    cache = SavedPropertiesCache(max_users=10, redis_url="", workers=1)
+    assert cache.get_ids("u1") is None
+    cache.set("u1", [1, 2])
+    assert cache.get_ids("u1") == [1, 2]
+    assert cache.add("u1", [2, 3, 3]) == [1, 2, 3]
+    assert cache.remove("u1", [1]) == [2, 3]
+    assert cache.get_ids("u1") == [2, 3]
+    assert cache.add("cold", [1]) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_lru_evicts_least_recently_used_user():
+    cache = SavedPropertiesCache(max_users=2, redis_url="", workers=1)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get_ids("a")
+    cache.set("c", [3])
+    assert cache.get_ids("b") is None
+    assert cache.get_ids("a") == [1]
+    assert cache.stats()["users"] == 2
+
+
+def test_multiple_workers_without_redis_never_update_in_place():
+    cache = SavedPropertiesCache(max_users=10, redis_url="", workers=4)
+    assert not cache.coherent
+    cache.set("u1", [1])
+    assert cache.add("u1", [2]) is None
+    assert cache.get_ids("u1") is None
+
+
+def test_redis_is_read_once_the_local_copy_expires(clock):
+    redis_client = FakeRedis()
+    cache = shared_cache(redis_client, local_ttl=1.0)
+    cache.set("u1", [1, 2])
+    # Another worker replaces the set in Redis
+    redis_client.set("saved:u1", "1,2,3")
+    assert cache.get_ids("u1") == [1, 2]
+    clock.now += 1.5
+    assert cache.get_ids("u1") == [1, 2, 3]
+
+
+def test_shared_writes_invalidate_instead_of_read_modify_write():
+    redis_client = FakeRedis()
+    cache = shared_cache(redis_client)
+    cache.set("u1", [1])
+    assert cache.add("u1", [2]) is None
+    assert "saved:u1" not in redis_client.data
+    assert cache.get_ids("u1") is None
+
+
+def test_other_worker_cache_sees_invalidation_after_local_ttl(clock):
+    redis_client = FakeRedis()
+    worker_a = shared_cache(redis_client)
+    worker_b = shared_cache(redis_client)
+    worker_a.set("u1", [1])
+    assert worker_b.get_ids("u1") == [1]
+    worker_a.remove("u1", [1])
+    clock.now += 2
+    assert worker_b.get_ids("u1") is None
+
+
+def test_saved_route_gating(monkeypatch):
+    from routes import properties as routes
+
+    monkeypatch.setattr(routes.async_mongodb_service, "is_available", lambda: True)
+    monkeypatch.setattr(routes, "saved_properties_cache", SavedPropertiesCache(redis_url="", workers=1))
+    assert routes._saved_cache_enabled()
+    monkeypatch.setattr(routes, "saved_properties_cache", SavedPropertiesCache(redis_url="", workers=3))
+    assert not routes._saved_cache_enabled()
+    monkeypatch.setattr(routes, "saved_properties_cache", shared_cache(FakeRedis()))
+    assert routes._saved_cache_enabled()
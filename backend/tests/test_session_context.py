@@ -0,0 +1,133 @@
+"""Follow-up shortcut: only pure narrowing deltas skip LLM extraction"""
+import pytest
+
+from models.schemas import PropertyFilterRequest
+from services import session_context as session_context_module
+from services.session_context import (
+    SessionContextCache,
+    build_vocabulary,
+    is_refinement,
+    merge_filters,
+    parse_followup,
+)
+
+AMENITIES = {
+    "swimming pool": "Swimming Pool",
+    "parking": "Parking",
+    "garage": "Garage",
+    "swimming": "Swimming Pool",
+    "pool": "Swimming Pool",
+    "gym": "Gym",
+}
+CITIES = ["san francisco", "new york", "austin"]
+CONTEXT = {"filters": {"location": "Austin", "max_price": 500000}, "max_result_price": 450000}
+
+
+def parse(message, context=CONTEXT):
+    return parse_followup(message, context, AMENITIES, CITIES)
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("only ones with a pool", {"amenities": ["Swimming Pool"]}),
+    ("only those with a swimming pool and parking", {"amenities": ["Swimming Pool", "Parking"]}),
+    ("just 3 bedrooms", {"bedrooms": 3}),
+    ("and under $400k", {"max_price": 400000}),
+    ("cheaper", {"max_price": 449999, "sort": ("price", "asc")}),
+    ("only those in austin with a gym", {"amenities": ["Gym"]}),
+])
+def test_refinements_parse_locally(message, expected):
+    assert parse(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "now show me places in new york",
+    "but what about san francisco with parking",
+    "just condos with a pool",
+    "also show me apartments",
+    "then tell me about the market",
+    "show me 2 bedroom homes in austin",
+])
+def test_new_searches_fall_through(message):
+    assert parse(message) is None
+
+
+def test_vocabulary_maps_words_to_most_common_catalog_name():
+    vocabulary = build_vocabulary([
+        {"amenities": ["Swimming Pool", "Gym"], "location": "Austin, TX"},
+        {"amenities": ["Swimming Pool"], "location": "Austin, TX"},
+        {"amenities": ["Community Pool"], "location": "New York, NY"},
+    ])
+    assert vocabulary["amenities"]["pool"] == "Swimming Pool"
+    assert vocabulary["amenities"]["community pool"] == "Community Pool"
+    assert vocabulary["amenities"]["community"] == "Community Pool"
+    assert list(vocabulary["amenities"])[0] == "community pool"
+    assert vocabulary["cities"] == ["new york", "austin"]
+
+
+def test_plain_search_amenities_match_exactly(property_service):
+    def ids(amenities):
+        results = property_service.search_properties(filters=PropertyFilterRequest(amenities=amenities), limit=10)
+        return {p["id"] for p in results}
+
+    pool = ids(["Swimming Pool"])
+    assert pool
+    # A partial name is not an amenity; case is still ignored
+    assert ids(["Pool"]) == set()
+    assert ids(["swimming pool"]) == pool
+
+
+def test_is_refinement_rejects_widening():
+    previous = {"location": "Austin", "max_price": 500000, "bedrooms": 2, "amenities": ["gym"]}
+    assert is_refinement(previous, merge_filters(previous, {"max_price": 400000, "amenities": ["pool"]}))
+    assert not is_refinement(previous, merge_filters(previous, {"max_price": 900000}))
+    assert not is_refinement(previous, merge_filters(previous, {"bedrooms": 3}))
+
+
+def test_context_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(session_context_module.time, "monotonic", lambda: now[0])
+    cache = SessionContextCache(max_users=2, ttl_seconds=10)
+    cache.set("a", {"filters": {}})
+    cache.set("b", {"filters": {}})
+    cache.get("a")
+    cache.set("c", {"filters": {}})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def chatbot(property_service, monkeypatch):
+    from services import chatbot_service as chatbot_module
+
+    monkeypatch.setitem(chatbot_module.SESSION_CONTEXT_CONFIG, "enabled", True)
+    service = chatbot_module.ChatbotService()
+    service.property_service = property_service
+    service.session_context = SessionContextCache()
+    calls = []
+    monkeypatch.setattr(service, "_search_and_respond", lambda *args, **kwargs: calls.append((args, kwargs)) or ("ok", [], {}))
+    service.session_context.set("u1", {
+        "filters": {"location": "San Francisco", "max_price": 1000000},
+        "query": None,
+        "sort_by": None,
+        "sort_order": "asc",
+        "result_ids": [5],
+        "complete": True,
+        "max_result_price": 900000,
+    })
+    service.calls = calls
+    return service
+
+
+def test_followup_narrows_previous_results(chatbot):
+    assert chatbot._answer_followup("only ones with a gym", "u1") is not None
+    args, kwargs = chatbot.calls[0]
+    assert args[3].amenities == ["Gym"]
+    assert [p["id"] for p in kwargs["candidates"]] == [5]
+
+
+@pytest.mark.parametrize("message", ["now show me condos", "and under $2m", "what about austin only"])
+def test_followup_falls_through_to_extraction(chatbot, message):
+    assert chatbot._answer_followup(message, "u1") is None
+    assert chatbot.calls == []
@@ -0,0 +1,94 @@
+"""Single-flight coalescing: one computation per key, shared results and errors, no stale keys"""
+import threading
+
+import pytest
+
+from services.singleflight import SingleFlight, canonical_preferences, normalize_message
+
+
+def run_concurrently(flight, key, fn, callers):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threads, results, errors = run_concurrently(flight, "k", compute, 5)
+    # Wait until every follower has joined the leader's call
+    while flight.stats()["coalesced"] < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ["result"] * 5 and errors == []
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_error_propagates_to_waiters_and_key_is_released():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    threads, results, errors = run_concurrently(flight, "k", fail, 3)
+    while flight.stats()["coalesced"] < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [] and len(errors) == 3
+    assert all(isinstance(e, ValueError) for e in errors)
+    # A later call recomputes instead of replaying the failure
+    assert flight.do("k", lambda: "fresh") == "fresh"
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.stats()["executed"] == 2
+
+
+@pytest.mark.parametrize("message", ["Show me  condos in Austin?", "show me condos in austin", " SHOW ME CONDOS IN AUSTIN!! "])
+def test_normalize_message(message):
+    assert normalize_message(message) == "show me condos in austin"
+
+
+def test_canonical_preferences_ignore_key_order():
+    assert canonical_preferences({"a": 1, "b": [2]}) == canonical_preferences({"b": [2], "a": 1})
+    assert canonical_preferences(None) == canonical_preferences({})
+    assert canonical_preferences({"max_price": 500000}) != canonical_preferences({"max_price": 900000})
+
+
+def test_generate_response_key_includes_preferences(monkeypatch):
+    from services.llm_service import LLMService
+
+    service = LLMService()
+    monkeypatch.setattr(service, "_backend_for", lambda stage: object())
+    keys = []
+    monkeypatch.setattr(service._flight, "do", lambda key, fn: keys.append(key))
+    properties = [{"id": 1, "title": "Loft", "price": 450000}]
+    for max_price in (500000, 900000):
+        service.generate_response("tell me more", properties, {"max_price": max_price}, "open_ended")
+    assert len(set(keys)) == 2
@@ -0,0 +1,57 @@
+"""Fallback state backends: per-process memory, and SQLite shared by workers on one host"""
+import multiprocessing
+
+import pytest
+
+from services.state_store import MemoryStateBackend, SQLiteStateBackend, create_state_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "state.db"))
+
+
+def test_saved_sets_keep_first_saved_order(backend):
+    assert backend.get_saved("u1") == []
+    assert backend.add_saved("u1", [3, 1]) == [3, 1]
+    assert backend.add_saved("u1", [1, 2]) == [3, 1, 2]
+    assert backend.remove_saved("u1", [1, 9]) == [3, 2]
+    assert backend.get_saved("u2") == []
+
+
+def test_clear_history(backend):
+    backend.append_messages([{"user_id": "u1", "id": "1", "timestamp": "t1", "text": "hi"}])
+    assert backend.clear_history("u1")
+    assert backend.get_history_page("u1") == ([], None)
+
+
+def _worker_save(path, property_id):
+    SQLiteStateBackend(path).add_saved("u1", [property_id])
+
+
+def test_sqlite_state_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    here = SQLiteStateBackend(path)
+    here.add_saved("u1", [1])
+    context = multiprocessing.get_context("spawn")
+    worker = context.Process(target=_worker_save, args=(path, 2))
+    worker.start()
+    worker.join(30)
+    assert worker.exitcode == 0
+    assert here.get_saved("u1") == [1, 2]
+    # and survives a restart
+    assert SQLiteStateBackend(path).get_saved("u1") == [1, 2]
+    assert here.shared and not MemoryStateBackend().shared
+
+
+def test_create_state_backend(tmp_path, monkeypatch):
+    from config import STATE_BACKEND_CONFIG
+
+    monkeypatch.setitem(STATE_BACKEND_CONFIG, "sqlite_path", str(tmp_path / "state.db"))
+    assert create_state_backend("sqlite").name == "sqlite"
+    assert create_state_backend("memory").name == "memory"
+    assert create_state_backend("bogus").name == "memory"
+    monkeypatch.setitem(STATE_BACKEND_CONFIG, "sqlite_path", str(tmp_path / "missing" / "state.db"))
+    assert create_state_backend("sqlite").name == "memory"
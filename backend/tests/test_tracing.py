@@ -0,0 +1,86 @@
+"""Built-in tracer: span trees, sampling, errors, threadpool propagation and the X-Trace-Id header"""
+import asyncio
+
+import pytest
+from fastapi.concurrency import run_in_threadpool
+
+from services import tracing
+from services.tracing import SpanExporter, Tracer, extract_parent, get_current_span, set_span_attributes
+
+
+class MemoryExporter(SpanExporter):
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append([span.to_dict() for span in spans])
+
+
+def test_child_spans_share_the_trace_and_export_with_the_root():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter)
+    with tracer.start_as_current_span("root") as root:
+        with tracer.start_as_current_span("child", attributes={"a": 1}):
+            set_span_attributes({"b": 2})
+        assert exporter.traces == []
+    spans = {span["name"]: span for span in exporter.traces[0]}
+    assert spans["child"]["trace_id"] == spans["root"]["trace_id"]
+    assert spans["child"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["child"]["attributes"] == {"a": 1, "b": 2}
+    assert not root.is_recording() and get_current_span() is None
+
+
+def test_unsampled_traces_record_nothing():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    with tracer.start_as_current_span("root") as span:
+        span.set_attribute("a", 1)
+        assert not span.is_recording()
+    assert exporter.traces == [] and span.attributes == {}
+
+
+def test_exceptions_mark_the_span_and_propagate():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter)
+    with pytest.raises(ValueError):
+        with tracer.start_as_current_span("root"):
+            raise ValueError("bad")
+    root = exporter.traces[0][0]
+    assert root["status"] == "ERROR: bad"
+    assert root["events"][0]["exception.type"] == "ValueError"
+
+
+def test_spans_follow_requests_into_the_threadpool():
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter)
+
+    def work():
+        with tracer.start_as_current_span("in_thread"):
+            pass
+
+    async def request():
+        with tracer.start_as_current_span("root"):
+            await run_in_threadpool(work)
+
+    asyncio.run(request())
+    spans = {span["name"]: span for span in exporter.traces[0]}
+    assert spans["in_thread"]["parent_id"] == spans["root"]["span_id"]
+
+
+def test_extract_parent_from_traceparent():
+    parent = extract_parent({"traceparent": "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"})
+    assert parent.trace_id == int("ab" * 16, 16) and parent.is_remote
+    assert extract_parent({"traceparent": "garbage"}) is None
+    assert extract_parent({}) is None
+
+
+def test_middleware_returns_trace_id_and_continues_remote_trace(api_client, monkeypatch):
+    exporter = MemoryExporter()
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter))
+    trace_id = "12" * 16
+    response = api_client.get("/", headers={"traceparent": f"00-{trace_id}-{'34' * 8}-01"})
+    assert response.headers["x-trace-id"] == trace_id
+    root = exporter.traces[-1][-1]
+    assert root["name"].startswith("HTTP GET")
+    assert root["parent_id"] == "34" * 8
+    assert root["attributes"]["http.status_code"] == 200
@@ -0,0 +1,52 @@
+"""Startup warm-up and the /ready readiness endpoint"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import STARTUP_WARMUP_CONFIG
+from services.warmup import _timed, run_warmup
+
+
+def test_ready_is_503_until_warmup_finishes():
+    from main import app
+
+    app.state.ready = False
+    client = TestClient(app)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+    # Entering the client runs the lifespan handler (warm-up), leaving it runs shutdown
+    with TestClient(app) as started:
+        response = started.get("/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ready"] is True
+        assert {"catalog", "search", "ml_model", "mongodb_indexes"} <= set(body["warmup_ms"])
+        assert body["warmup_ms"]["catalog"] >= 0
+    assert app.state.ready is False
+
+
+def test_failed_step_is_recorded_not_raised():
+    steps = {}
+    _timed(steps, "ok", lambda: None)
+    _timed(steps, "broken", lambda: 1 / 0)
+    assert steps["ok"] >= 0 and steps["broken"] == -1.0
+
+
+def test_disabled_warmup_does_nothing(monkeypatch):
+    monkeypatch.setitem(STARTUP_WARMUP_CONFIG, "enabled", False)
+    assert run_warmup() == {}
+
+
+def test_serverless_handler_marks_app_ready(monkeypatch):
+    pytest.importorskip("mangum")
+    from main import app
+
+    monkeypatch.setattr(app.state, "ready", False, raising=False)
+    # Mangum runs with lifespan="off", so the import-time warm-up has to flip readiness itself
+    index_path = Path(__file__).resolve().parents[2] / "api" / "index.py"
+    spec = importlib.util.spec_from_file_location("vercel_index", index_path)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    assert app.state.ready is True
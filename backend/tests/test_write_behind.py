@@ -0,0 +1,103 @@
+"""Write-behind queue: batching, retries of failed batches, backpressure and writes after close"""
+import threading
+
+from services.write_behind import WriteBehindQueue
+
+CONFIG = {
+    "batch_size": 2,
+    "flush_interval": 60,
+    "max_queue": 10,
+    "enqueue_timeout": 0.01,
+    "max_retries": 2,
+    "durability": "none",
+}
+
+
+class Writer:
+    """Records written batches; fails the next `failures` calls"""
+
+    def __init__(self, failures=0, raises=False):
+        self.failures = failures
+        self.raises = raises
+        self.batches = []
+
+    def __call__(self, documents):
+        if self.failures:
+            self.failures -= 1
+            if self.raises:
+                raise RuntimeError("database down")
+            return False
+        self.batches.append([d["n"] for d in documents])
+        return True
+
+    @property
+    def written(self):
+        return [n for batch in self.batches for n in batch]
+
+
+def make_queue(writer, **overrides):
+    write_queue = WriteBehindQueue(writer, {**CONFIG, **overrides})
+    # Keep the background flusher out of the way; tests flush explicitly
+    write_queue._thread = threading.Thread(target=lambda: None)
+    write_queue._thread.start()
+    return write_queue
+
+
+def test_flush_writes_in_batches():
+    writer = Writer()
+    write_queue = make_queue(writer)
+    for n in range(5):
+        write_queue.enqueue({"n": n})
+    assert write_queue.flush() == 5
+    assert writer.batches == [[0, 1], [2, 3], [4]]
+    assert write_queue.pending() == 0
+
+
+def test_failed_batch_is_requeued_and_retried():
+    writer = Writer(failures=1, raises=True)
+    write_queue = make_queue(writer)
+    write_queue.enqueue({"n": 1})
+    assert write_queue.flush() == 0
+    assert write_queue.pending() == 1
+    assert write_queue.flush() == 1
+    assert writer.written == [1]
+    assert (write_queue.retried, write_queue.failed) == (1, 0)
+
+
+def test_batch_dropped_after_max_retries():
+    writer = Writer(failures=10)
+    write_queue = make_queue(writer)
+    write_queue.enqueue({"n": 1})
+    for _ in range(5):
+        write_queue.flush()
+    assert write_queue.pending() == 0
+    assert (write_queue.retried, write_queue.failed) == (2, 1)
+
+
+def test_full_queue_writes_inline_without_blocking():
+    writer = Writer()
+    write_queue = make_queue(writer, max_queue=1, batch_size=10)
+    write_queue.enqueue({"n": 1})
+    write_queue.enqueue({"n": 2})
+    assert writer.written == [2]
+    assert write_queue.inline_writes == 1
+    assert write_queue.pending() == 1
+
+
+def test_enqueue_after_close_writes_inline():
+    writer = Writer()
+    write_queue = make_queue(writer, durability="flush_on_shutdown")
+    write_queue.enqueue({"n": 1})
+    write_queue.close()
+    assert writer.written == [1]
+    write_queue.enqueue({"n": 2})
+    assert writer.written == [1, 2]
+    assert write_queue.pending() == 0
+
+
+def test_close_retries_failed_batches_before_exit():
+    writer = Writer(failures=1)
+    write_queue = make_queue(writer, durability="flush_on_shutdown")
+    write_queue.enqueue({"n": 1})
+    write_queue.close()
+    assert writer.written == [1]
@@ -81,14 +81,16 @@ interface ChatHistoryResponse {
     isError?: boolean;
   }>;
   count: number;
+  next_before?: string | null;
 }
 
 export const chatAPI = {
   sendMessage: (message: string, userId: string = 'default'): Promise<AxiosResponse<ChatResponse>> => 
     api.post('/api/chat', { message, user_id: userId }),
   
-  getHistory: (userId: string = 'default'): Promise<AxiosResponse<ChatHistoryResponse>> =>
-    api.get(`/api/chat/history/${userId}`),
+  // Newest page first; pass next_before from a response to load older messages
+  getHistory: (userId: string = 'default', before?: string): Promise<AxiosResponse<ChatHistoryResponse>> =>
+    api.get(`/api/chat/history/${userId}`, { params: before ? { before } : undefined }),
   
   clearHistory: (userId: string = 'default'): Promise<AxiosResponse<{ success: boolean; message: string }>> =>
     api.delete(`/api/chat/history/${userId}`),